@@ -22,6 +22,129 @@ var Color = {
     Reset: "\x1b[0m"
 };
 
+// ===== FRIDAC_TRANSPORT_BEGIN =====
+// 批量消息传输：LOG/emitEvent 先入队，按大小或时间合并为一条 send()
+// 宿主端通过 fridac_core.transport.iter_payloads 解包
+var __fridacTransport = (function() {
+    var cfg = { enabled: true, flushMs: 50, maxBytes: 65536 };
+    try {
+        if (typeof __FRIDAC_BATCH_OVERRIDE !== 'undefined' && __FRIDAC_BATCH_OVERRIDE) {
+            for (var k in __FRIDAC_BATCH_OVERRIDE) { cfg[k] = __FRIDAC_BATCH_OVERRIDE[k]; }
+        }
+    } catch (_) {}
+
+    var queue = [];
+    var bytes = 0;
+    var timer = null;
+
+    function flush() {
+        if (timer !== null) {
+            try { clearTimeout(timer); } catch (_) {}
+            timer = null;
+        }
+        if (queue.length === 0) return;
+        var entries = queue;
+        queue = [];
+        bytes = 0;
+        try {
+            send({ type: '__fridac_batch', entries: entries });
+        } catch (e) {
+            // 整批发送失败时逐条兜底
+            for (var i = 0; i < entries.length; i++) {
+                try { send(entries[i]); } catch (_) {}
+            }
+        }
+    }
+
+    function push(payload) {
+        if (!cfg.enabled || !(cfg.flushMs > 0)) {
+            send(payload);
+            return;
+        }
+        queue.push(payload);
+        // 对象不做序列化估算，按固定开销计数
+        bytes += (typeof payload === 'string') ? payload.length : 256;
+        if (bytes >= cfg.maxBytes) {
+            flush();
+        } else if (timer === null) {
+            timer = setTimeout(flush, cfg.flushMs);
+        }
+    }
+
+    function configure(options) {
+        options = options || {};
+        if (typeof options.enabled !== 'undefined') cfg.enabled = !!options.enabled;
+        if (typeof options.flushMs === 'number') cfg.flushMs = options.flushMs;
+        if (typeof options.maxBytes === 'number' && options.maxBytes > 0) cfg.maxBytes = options.maxBytes;
+        if (!cfg.enabled || !(cfg.flushMs > 0)) flush();
+        return { enabled: cfg.enabled, flushMs: cfg.flushMs, maxBytes: cfg.maxBytes };
+    }
+
+    return { push: push, flush: flush, configure: configure };
+})();
+
+function __fridacSend(payload) {
+    try {
+        __fridacTransport.push(payload);
+    } catch (e) {
+        try { send(payload); } catch (_) {}
+    }
+}
+
+/**
+ * 调整批量发送参数
+ * @example fridacBatchConfig({ flushMs: 10 })  // flushMs=0 关闭批量
+ */
+function fridacBatchConfig(options) {
+    return __fridacTransport.configure(options);
+}
+
+// 统一转换为 ArrayBuffer（支持 ArrayBuffer / TypedArray / Java byte[] / 普通数组）
+function __fridacToArrayBuffer(bytes, limit) {
+    if (bytes === null || typeof bytes === 'undefined') return null;
+    var cap = (typeof limit === 'number' && limit >= 0) ? limit : Infinity;
+    if (bytes instanceof ArrayBuffer) return cap < bytes.byteLength ? bytes.slice(0, cap) : bytes;
+    if (bytes.buffer instanceof ArrayBuffer && typeof bytes.byteLength === 'number') {
+        var start = bytes.byteOffset || 0;
+        return bytes.buffer.slice(start, start + Math.min(bytes.byteLength, cap));
+    }
+    var n = Math.min(bytes.length || 0, cap);
+    var out = new Uint8Array(n);
+    for (var i = 0; i < n; i++) { out[i] = bytes[i] & 0xff; }
+    return out.buffer;
+}
+
+/**
+ * 发送携带原始字节的结构化事件（走 send 的 data 通道，不在目标进程内做 hexdump）
+ * 宿主端由 fridac_core.hexdump 按需格式化
+ * @param limit 可选，最多发送的字节数（Java byte[] 等需逐字节拷贝时建议设置）
+ * @example emitBinaryEvent('net_send_data', { fd: fd }, buf.readByteArray(len))
+ */
+function emitBinaryEvent(eventType, fields, bytes, limit) {
+    try {
+        var evt = fields || {};
+        evt.type = eventType || evt.type || 'binary';
+        evt.ts = Date.now();
+        try { evt.pid = Process.id; } catch(_){ }
+        try { evt.tid = Process.getCurrentThreadId(); } catch(_){ }
+        var data = __fridacToArrayBuffer(bytes, limit);
+        evt.size = data ? data.byteLength : 0;
+        // 带 data 的消息不能合并进批次：先刷新队列保证先后顺序
+        __fridacTransport.flush();
+        send(evt, data);
+    } catch (e) {
+        try { send({ type: 'event', error: e.message }); } catch(_){ }
+    }
+}
+
+// 脚本卸载前刷新队列，避免丢失最后一批消息
+try {
+    if (typeof rpc !== 'undefined' && rpc.exports) {
+        rpc.exports.dispose = function() { __fridacTransport.flush(); };
+    }
+} catch (_) {}
+// ===== FRIDAC_TRANSPORT_END =====
+
 function LOG(message, options) {
     try {
         options = options || {};
@@ -30,7 +153,7 @@ function LOG(message, options) {
         if (options.c) {
             text = options.c + text + Color.Reset;
         }
-        send(text);
+        __fridacSend(text);
     } catch (e) {
         // 兜底：即使 send 出错也不抛异常，避免打断执行
         try { send(String(message)); } catch (_) {}
@@ -23,7 +23,7 @@ var Color = {
 function LOG(message, options) {
     try {
         var text = (message === null || typeof message === 'undefined') ? '' : String(message);
-        send(text);
+        if (typeof __fridacSend === 'function') { __fridacSend(text); } else { send(text); }
     } catch (e) {
         try { send(String(message)); } catch (_) {}
     }
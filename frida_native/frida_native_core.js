@@ -129,6 +129,11 @@ var Color = {
     }
 };
 
+// 优先走批量传输（frida_common_new.js 提供），独立加载时退化为直接 send()
+function __nativeSend(payload) {
+    if (typeof __fridacSend === 'function') { __fridacSend(payload); } else { send(payload); }
+}
+
 var LOG = function (input, kwargs) {
     // 统一通过 send() 输出，避免ANSI颜色残留噪音
     try {
@@ -144,7 +149,7 @@ var LOG = function (input, kwargs) {
         } else {
             text = String(input);
         }
-        send(text);
+        __nativeSend(text);
     } catch (e) {
         try { send(String(input)); } catch (_) {}
     }
@@ -158,12 +163,32 @@ function emitEvent(eventType, fields) {
         evt.ts = Date.now();
         try { evt.pid = Process.id; } catch(_){ }
         try { evt.tid = Process.getCurrentThreadId(); } catch(_){ }
-        send(evt);
+        __nativeSend(evt);
     } catch (e) {
         try { send({ type: 'event', error: e.message }); } catch(_){ }
     }
 }
 
+// 携带原始字节的事件：hexdump 交给宿主端按需生成，目标进程只负责 readByteArray
+// 优先走 frida_common_new.js 的 emitBinaryEvent，独立加载时直接 send(evt, data)
+function emitNativeBytes(eventType, fields, p, length) {
+    try {
+        if (!p || (p.isNull && p.isNull()) || !(length > 0)) return;
+        var data = p.readByteArray(length);
+        if (typeof emitBinaryEvent === 'function') {
+            emitBinaryEvent(eventType, fields, data);
+            return;
+        }
+        var evt = fields || {};
+        evt.type = eventType;
+        evt.ts = Date.now();
+        evt.size = length;
+        send(evt, data);
+    } catch (e) {
+        try { LOG('读取字节失败(' + eventType + '): ' + e.message); } catch(_){ }
+    }
+}
+
 // 安全读取C字符串
 function safeCString(p) {
     try { return (!p || (p.isNull && p.isNull())) ? 'NULL' : Memory.readCString(p); } catch (_) { return '[读取失败]'; }
@@ -43,7 +43,7 @@ function nativeHookNetworkFunctions(showStack) {
                         var sockfd = args[0].toInt32();
                         var len = args[2].toInt32();
                         if (__rateLimiter.shouldLog('send:'+sockfd, 100, 1000)) emitEvent('net_send', { fd: sockfd, len: len });
-                        if (len > 0 && len <= 1024 && __rateLimiter.shouldLog('send:dump', 10, 1000)) LOG(hexdump(args[1], { length: Math.min(len, 128) }));
+                        if (len > 0 && len <= 1024 && __rateLimiter.shouldLog('send:dump', 10, 1000)) emitNativeBytes('net_send_data', { fd: sockfd, len: len }, args[1], Math.min(len, 128));
                         if (needStack) LOG(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('\n'));
                     } catch(_){}
                 }
@@ -55,7 +55,7 @@ function nativeHookNetworkFunctions(showStack) {
             Interceptor.attach(recv, {
                 onEnter: function(args) { this.sockfd=args[0].toInt32(); this.buf=args[1]; this.len=args[2].toInt32(); },
                 onLeave: function(retval) {
-                    try { var n=retval.toInt32(); if (n>0) { if (__rateLimiter.shouldLog('recv:'+this.sockfd, 100, 1000)) emitEvent('net_recv', { fd: this.sockfd, len: n }); if (n<=1024 && this.buf && __rateLimiter.shouldLog('recv:dump', 10, 1000)) LOG(hexdump(this.buf, { length: Math.min(n, 128) })); } } catch(_){}
+                    try { var n=retval.toInt32(); if (n>0) { if (__rateLimiter.shouldLog('recv:'+this.sockfd, 100, 1000)) emitEvent('net_recv', { fd: this.sockfd, len: n }); if (n<=1024 && this.buf && __rateLimiter.shouldLog('recv:dump', 10, 1000)) emitNativeBytes('net_recv_data', { fd: this.sockfd, len: n }, this.buf, Math.min(n, 128)); } } catch(_){}
                 }
             });
         }
@@ -104,7 +104,7 @@ function nativeHookTLSFunctions(showStack) {
             var addr = Module.findExportByName(t.lib, t.name); if (!addr) return;
             Interceptor.attach(addr, {
                 onEnter: function(args){ this.buf=args[1]; this.len=args[2].toInt32?args[2].toInt32():parseInt(args[2]); this.dir=t.dir; if (__rateLimiter.shouldLog(t.name+':'+t.dir, 20, 1000)) { LOG('🔐 '+t.name+'('+t.dir+') len='+this.len); if (needStack) { try { LOG(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('\n')); } catch(_){} } } },
-                onLeave: function(retval){ try { var n=retval.toInt32?retval.toInt32():parseInt(retval); if (n>0 && n<=4096 && this.buf && __rateLimiter.shouldLog(t.name+':dump', 10, 1000)) LOG('📦 TLS('+this.dir+') 前256字节:\n' + hexdump(this.buf, { length: Math.min(n, 256) })); } catch(_){} }
+                onLeave: function(retval){ try { var n=retval.toInt32?retval.toInt32():parseInt(retval); if (n>0 && n<=4096 && this.buf && __rateLimiter.shouldLog(t.name+':dump', 10, 1000)) emitNativeBytes('tls_data', { func: t.name, dir: this.dir, len: n }, this.buf, Math.min(n, 256)); } catch(_){} }
             });
         });
     } catch (e) { LOG('[-] TLS Hook失败: ' + e.message); }
@@ -113,7 +113,7 @@ function nativeHookTLSFunctions(showStack) {
 function nativeHookConscryptTLS(showStack) {
     showStack = showStack || 0; var needStack = showStack === 1;
     function hookAddr(addr, name, dir) {
-        try { Interceptor.attach(addr, { onEnter: function(args){ this.buf=args[2]||args[1]; this.len=(args[3]||args[2]); try{ this.n=this.len.toInt32?this.len.toInt32():parseInt(this.len);}catch(_){ this.n=0; } this.dir=dir; if (__rateLimiter.shouldLog('Conscrypt:'+name, 20, 1000)) { LOG('🔐 Conscrypt '+name+'('+dir+') len='+this.n); if (needStack) { try { LOG(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('\n')); } catch(_){} } } }, onLeave: function(retval){ try { var r=retval.toInt32?retval.toInt32():parseInt(retval); if (r>0 && r<=4096 && this.buf && __rateLimiter.shouldLog('Conscrypt:'+name+':dump', 10, 1000)) { LOG('📦 Conscrypt('+this.dir+') 前256字节:\n' + hexdump(this.buf, { length: Math.min(r, 256) })); } } catch(_){} } }); return true; } catch(e){ return false; }
+        try { Interceptor.attach(addr, { onEnter: function(args){ this.buf=args[2]||args[1]; this.len=(args[3]||args[2]); try{ this.n=this.len.toInt32?this.len.toInt32():parseInt(this.len);}catch(_){ this.n=0; } this.dir=dir; if (__rateLimiter.shouldLog('Conscrypt:'+name, 20, 1000)) { LOG('🔐 Conscrypt '+name+'('+dir+') len='+this.n); if (needStack) { try { LOG(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('\n')); } catch(_){} } } }, onLeave: function(retval){ try { var r=retval.toInt32?retval.toInt32():parseInt(retval); if (r>0 && r<=4096 && this.buf && __rateLimiter.shouldLog('Conscrypt:'+name+':dump', 10, 1000)) { emitNativeBytes('tls_data', { func: name, dir: this.dir, len: r }, this.buf, Math.min(r, 256)); } } catch(_){} } }); return true; } catch(e){ return false; }
     }
     try {
         var targets = []; var modules = Process.enumerateModules();
@@ -125,7 +125,7 @@ function nativeHookConscryptTLS(showStack) {
 function nativeHookBIOFunctions(showStack) {
     showStack = showStack || 0; var needStack = showStack === 1;
     try {
-        [{name:'BIO_read', dir:'recv'},{name:'BIO_write', dir:'send'}].forEach(function(t){ var addr=Module.findExportByName(null,t.name)||Module.findExportByName('libssl.so',t.name); if (!addr) return; Interceptor.attach(addr,{ onEnter:function(args){ this.buf=args[1]; this.len=args[2].toInt32?args[2].toInt32():parseInt(args[2]); this.dir=t.dir; if (__rateLimiter.shouldLog('BIO:'+t.name, 50, 1000)) { LOG('🔎 '+t.name+'('+t.dir+') len='+this.len); if (needStack) { try { LOG(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('\n')); } catch(_){} } } }, onLeave:function(retval){ try { var n=retval.toInt32?retval.toInt32():parseInt(retval); if (n>0 && n<=4096 && this.buf && __rateLimiter.shouldLog('BIO:dump',10,1000)) LOG('📦 BIO('+this.dir+') 前256字节:\n' + hexdump(this.buf, { length: Math.min(n, 256) })); } catch(_){} } }); LOG('[+] Hook BIO: '+(addr.moduleName||'any')+'!'+t.name); });
+        [{name:'BIO_read', dir:'recv'},{name:'BIO_write', dir:'send'}].forEach(function(t){ var addr=Module.findExportByName(null,t.name)||Module.findExportByName('libssl.so',t.name); if (!addr) return; Interceptor.attach(addr,{ onEnter:function(args){ this.buf=args[1]; this.len=args[2].toInt32?args[2].toInt32():parseInt(args[2]); this.dir=t.dir; if (__rateLimiter.shouldLog('BIO:'+t.name, 50, 1000)) { LOG('🔎 '+t.name+'('+t.dir+') len='+this.len); if (needStack) { try { LOG(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('\n')); } catch(_){} } } }, onLeave:function(retval){ try { var n=retval.toInt32?retval.toInt32():parseInt(retval); if (n>0 && n<=4096 && this.buf && __rateLimiter.shouldLog('BIO:dump',10,1000)) emitNativeBytes('bio_data', { func: t.name, dir: this.dir, len: n }, this.buf, Math.min(n, 256)); } catch(_){} } }); LOG('[+] Hook BIO: '+(addr.moduleName||'any')+'!'+t.name); });
         LOG('[+] BIO 函数Hook已启用', { c: Color.Green });
     } catch (e) { LOG('[-] BIO 函数Hook失败: ' + e.message, { c: Color.Red }); }
 }
@@ -135,6 +135,11 @@ var Color = {
     }
 };
 
+// 优先走批量传输（frida_common_new.js 提供），独立加载时退化为直接 send()
+function __nativeSend(payload) {
+    if (typeof __fridacSend === 'function') { __fridacSend(payload); } else { send(payload); }
+}
+
 var LOG = function (input, kwargs) {
     // 统一通过 send() 输出，避免ANSI颜色残留导致的“m/undefined”噪音
     try {
@@ -150,7 +155,7 @@ var LOG = function (input, kwargs) {
         } else {
             text = String(input);
         }
-        send(text);
+        __nativeSend(text);
     } catch (e) {
         try { send(String(input)); } catch (_) {}
     }
@@ -164,7 +169,7 @@ function emitEvent(eventType, fields) {
         evt.ts = Date.now();
         try { evt.pid = Process.id; } catch(_){}
         try { evt.tid = Process.getCurrentThreadId(); } catch(_){}
-        send(evt);
+        __nativeSend(evt);
     } catch (e) {
         try { send({ type: 'event', error: e.message }); } catch(_){}
     }
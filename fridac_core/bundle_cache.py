@@ -0,0 +1,226 @@
+"""
+fridac Agent 脚本包缓存模块
+将拼装好的主脚本（frida_common_new.js + frida_native/*.js + 定位 Hook + 自定义脚本）
+缓存到 ~/.fridac/cache，键为全部输入文件的路径/mtime/大小与影响拼装结果的选项的哈希，
+重连与再次启动时命中缓存即可跳过读取、拼接与字符串替换
+
+脚本字节码同样缓存在此：首次加载源码后在后台用 session.compile_script 编译 QuickJS 字节码，
+之后以 (源码哈希, Frida 版本, 运行时) 为键直接 create_script_from_bytes，
+字节码不兼容时由调用方回退到源码
+
+FRIDAC_CACHE_DIR 可指定缓存目录，FRIDAC_NO_CACHE=1 关闭缓存
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .logger import log_debug
+
+# 拼装逻辑变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+# 每类缓存最多保留的文件数（按修改时间淘汰）
+MAX_CACHED_ENTRIES = 8
+
+BUNDLE_PREFIX = 'bundle-'
+BUNDLE_SUFFIX = '.js'
+
+# 字节码仅 QuickJS 运行时支持
+BYTECODE_RUNTIME = 'qjs'
+BYTECODE_PREFIX = 'qjs-'
+BYTECODE_SUFFIX = '.bin'
+
+
+def cache_enabled() -> bool:
+    """缓存是否开启"""
+    return os.environ.get('FRIDAC_NO_CACHE', '') not in ('1', 'true', 'yes')
+
+
+def get_cache_dir() -> str:
+    """缓存目录（默认 ~/.fridac/cache）"""
+    return os.environ.get('FRIDAC_CACHE_DIR') or os.path.expanduser('~/.fridac/cache')
+
+
+def _file_signature(path: str) -> Optional[List]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+
+
+def iter_js_files(directory: str) -> Iterable[str]:
+    """递归列出目录下的 .js 文件（排序，保证键稳定）"""
+    if not os.path.isdir(directory):
+        return
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.js'):
+                yield os.path.join(dirpath, filename)
+
+
+def compute_key(paths: Iterable[str], options: Dict[str, str]) -> str:
+    """
+    计算缓存键
+
+    Args:
+        paths: 参与拼装的候选文件（不存在的文件同样计入，出现后即失效）
+        options: 影响拼装结果的其他输入（脚本过滤器、批量配置等）
+
+    Returns:
+        十六进制哈希
+    """
+    signature = {
+        'version': CACHE_VERSION,
+        'files': [[path, _file_signature(path)] for path in paths],
+        'options': options,
+    }
+    encoded = json.dumps(signature, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _entry_path(key: str, prefix: str, suffix: str) -> str:
+    return os.path.join(get_cache_dir(), f"{prefix}{key}{suffix}")
+
+
+def load_entry(key: str, prefix: str = BUNDLE_PREFIX, suffix: str = BUNDLE_SUFFIX) -> Optional[bytes]:
+    """读取缓存条目，不存在或读取失败返回 None"""
+    path = _entry_path(key, prefix, suffix)
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    try:
+        # 刷新修改时间，淘汰时视为最近使用
+        os.utime(path, None)
+    except OSError:
+        pass
+    return content
+
+
+def store_entry(key: str, content: bytes, prefix: str = BUNDLE_PREFIX, suffix: str = BUNDLE_SUFFIX):
+    """原子写入缓存条目并淘汰同类旧条目（失败时静默忽略）"""
+    cache_dir = get_cache_dir()
+    path = _entry_path(key, prefix, suffix)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log_debug(f"写入脚本缓存失败: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+    _prune(cache_dir, prefix, suffix)
+
+
+def _prune(cache_dir: str, prefix: str, suffix: str):
+    try:
+        entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+                   if name.startswith(prefix) and name.endswith(suffix)]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for stale in entries[MAX_CACHED_ENTRIES:]:
+            os.remove(stale)
+    except OSError:
+        pass
+
+
+def load_bundle(key: str) -> Optional[str]:
+    """读取缓存的主脚本包"""
+    content = load_entry(key)
+    if content is None:
+        return None
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+def store_bundle(key: str, js_content: str):
+    """写入主脚本包缓存"""
+    store_entry(key, js_content.encode('utf-8'))
+
+
+def _frida_version() -> str:
+    # 延迟导入：脚本解析缓存等不涉及字节码的路径无需加载 frida
+    try:
+        import frida
+    except ImportError:
+        return ''
+    return getattr(frida, '__version__', '')
+
+
+def bytecode_key(source: str) -> str:
+    """字节码缓存键：源码哈希 + Frida 版本 + 运行时"""
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_VERSION}|{_frida_version()}|{BYTECODE_RUNTIME}|".encode('utf-8'))
+    digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def create_script_cached(session: Any, source: str, name: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+    """
+    创建脚本：有缓存的字节码时从字节码创建，否则从源码创建
+
+    Args:
+        session: Frida Session
+        source: 脚本源码
+        name: 脚本名（可选）
+
+    Returns:
+        (script, key)，key 非 None 表示脚本来自字节码，load() 失败时应
+        调用 invalidate_bytecode(key) 并改用源码重建
+    """
+    if cache_enabled() and hasattr(session, 'create_script_from_bytes'):
+        key = bytecode_key(source)
+        data = load_entry(key, BYTECODE_PREFIX, BYTECODE_SUFFIX)
+        if data:
+            try:
+                script = session.create_script_from_bytes(data, name=name, runtime=BYTECODE_RUNTIME)
+                log_debug(f"使用缓存的脚本字节码: {key[:12]} ({len(data) // 1024} KB)")
+                return script, key
+            except Exception as e:
+                log_debug(f"缓存字节码不可用，回退源码: {e}")
+                invalidate_bytecode(key)
+    return session.create_script(source, name=name), None
+
+
+def invalidate_bytecode(key: str):
+    """删除不兼容的字节码缓存"""
+    try:
+        os.remove(_entry_path(key, BYTECODE_PREFIX, BYTECODE_SUFFIX))
+    except OSError:
+        pass
+
+
+def schedule_bytecode_compile(session: Any, source: str, name: Optional[str] = None):
+    """
+    后台编译脚本字节码并写入缓存（已有缓存或不支持时直接返回）
+
+    编译在目标进程内进行，放在后台线程以免拖慢本次连接
+    """
+    if not cache_enabled() or not hasattr(session, 'compile_script'):
+        return
+    key = bytecode_key(source)
+    if os.path.exists(_entry_path(key, BYTECODE_PREFIX, BYTECODE_SUFFIX)):
+        return
+
+    def compile_worker():
+        try:
+            data = session.compile_script(source, name=name, runtime=BYTECODE_RUNTIME)
+        except Exception as e:
+            log_debug(f"编译脚本字节码失败: {e}")
+            return
+        if data:
+            store_entry(key, bytes(data), BYTECODE_PREFIX, BYTECODE_SUFFIX)
+
+    threading.Thread(target=compile_worker, name='fridac-bytecode-compile', daemon=True).start()
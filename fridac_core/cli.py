@@ -13,6 +13,9 @@ import traceback
 import json
 import time
 
+# 启动计时起点（--profile-startup 以此计算导入耗时）
+_CLI_START = time.perf_counter()
+
 # 获取数据文件路径
 def get_data_path():
     """获取数据文件路径（JS文件、scripts目录等）"""
@@ -55,14 +58,35 @@ DATA_PATH = get_data_path()
 # 将数据路径设置为环境变量供其他模块使用
 os.environ['FRIDAC_DATA_PATH'] = DATA_PATH
 
+# 仅导入轻量模块：environment / session（frida、prompt_toolkit、补全器等）在需要连接设备时才导入，
+# 使 --version / --list-scripts / --stop-server / --server-only 无需加载会话依赖
 from fridac_core.logger import show_banner, log_info, log_success, log_error, log_warning, log_exception, log_debug
-from fridac_core.environment import (
-    detect_python_environment, 
-    get_frida_version, 
-    get_frontmost_app, 
-    find_target_app
-)
-from fridac_core.session import FridacSession, run_interactive_session
+from fridac_core.startup_profile import get_startup_profiler
+
+
+class _VersionAction(argparse.Action):
+    """--version：仅在实际请求时检测 Frida 版本（不在构建参数解析器时执行）"""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.exit(message='fridac 1.0.0 (Frida {})\n'.format(_installed_frida_version()))
+
+
+def _installed_frida_version():
+    """读取当前解释器已安装的 frida 版本（不导入 frida，读取失败时回退到环境检测）"""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        version = None
+    if version is not None:
+        try:
+            return version('frida')
+        except PackageNotFoundError:
+            pass
+    from fridac_core.environment import get_frida_version
+    return get_frida_version()
 
 
 def _load_early_hooks_config(config_file=None):
@@ -173,16 +197,66 @@ def _execute_early_hooks(session, early_hook, hook_args, preset, config_file):
 def run_frida_session(spawn_mode=False, target_package=None, force_show_apps=False, 
                       early_hook=None, hook_args=None, preset=None, config_file=None, 
                       output_file=None, append_mode=False, 
-                      select_scripts=False, scripts_filter=None, no_scripts=False):
+                      select_scripts=False, scripts_filter=None, no_scripts=False,
+                      batch_ms=None, render_queue=None, render_policy=None,
+                      rotate_size=None, rotate_time=None, compression=None, flush_interval=None,
+                      events_file=None, events_format='jsonl', coalesce=None,
+                      headless=False, headless_interval=None, task_runtime=None,
+                      unload_timeout=None, no_cache=False, eager_modules=False,
+                      features=None, minify=False, hot_reload=False, task_profile=False):
     """运行 Frida 会话"""
+    with get_startup_profiler().phase('导入会话模块'):
+        from fridac_core.environment import find_target_app
+        from fridac_core.session import FridacSession, run_interactive_session
     
     # 设置脚本加载选项
     os.environ['FRIDAC_NO_CUSTOM_SCRIPTS'] = '1' if no_scripts else ''
     os.environ['FRIDAC_SCRIPTS_FILTER'] = scripts_filter or ''
     os.environ['FRIDAC_SELECT_SCRIPTS'] = '1' if select_scripts else ''
     
+    # 批量消息传输刷新延迟（0 表示逐条发送）
+    if batch_ms is not None:
+        os.environ['FRIDAC_BATCH_MS'] = str(max(0, batch_ms))
+    
+    # 控制台渲染队列（0 表示在消息线程同步渲染）
+    if render_queue is not None:
+        os.environ['FRIDAC_RENDER_QUEUE'] = str(max(0, render_queue))
+    if render_policy:
+        os.environ['FRIDAC_RENDER_POLICY'] = render_policy
+    if coalesce:
+        os.environ['FRIDAC_COALESCE'] = coalesce
+    
+    # 任务脚本模式：shared 共享运行时 / isolated 每任务独立脚本
+    if task_runtime:
+        os.environ['FRIDAC_TASK_RUNTIME'] = task_runtime
+    
+    # Native / 定位工具默认按需加载，--eager-modules 时全部随主脚本注入
+    os.environ['FRIDAC_EAGER_MODULES'] = '1' if eager_modules else ''
+    
+    # 精简构建：按功能裁剪未引用的顶层函数并去除注释/空白
+    os.environ['FRIDAC_FEATURES'] = features or ''
+    os.environ['FRIDAC_MINIFY'] = '1' if minify else ''
+    
+    # 任务 Hook 开销统计（默认关闭，REPL 中 taskprof on/off）
+    os.environ['FRIDAC_TASK_PROFILE'] = '1' if task_profile else ''
+    
+    # 连接后监视脚本目录，变化的文件即时热加载
+    os.environ['FRIDAC_HOT_RELOAD'] = '1' if hot_reload else ''
+    
+    # 主脚本包缓存（~/.fridac/cache）
+    if no_cache:
+        os.environ['FRIDAC_NO_CACHE'] = '1'
+    
+    # 单个任务卸载超时（超时任务转入后台，退出时强制分离会话）
+    if unload_timeout is not None:
+        os.environ['FRIDAC_UNLOAD_TIMEOUT'] = str(max(0.1, unload_timeout))
+    
+    # 无界面采集：不做任何控制台渲染，事件只写入 -o / --events
+    os.environ['FRIDAC_HEADLESS'] = '1' if headless else ''
+    
     if force_show_apps or not target_package:
-        target_app = find_target_app()
+        with get_startup_profiler().phase('find_target_app'):
+            target_app = find_target_app()
         if not target_app:
             return
     else:
@@ -192,15 +266,24 @@ def run_frida_session(spawn_mode=False, target_package=None, force_show_apps=Fal
     session = FridacSession()
     
     if output_file:
-        session.setup_output_redirect(output_file, append_mode)
+        session.setup_output_redirect(output_file, append_mode, rotate_size=rotate_size,
+                                      rotate_time=rotate_time, compression=compression,
+                                      flush_interval=flush_interval)
         log_info(f"📁 Hook输出将重定向到: {output_file} ({'追加' if append_mode else '覆盖'}模式)")
     
+    if events_file:
+        session.setup_event_log(events_file, events_format, append_mode, rotate_size=rotate_size,
+                                rotate_time=rotate_time, compression=compression,
+                                flush_interval=flush_interval)
+    
     def signal_handler(sig, frame):
         log_info("正在退出...")
         session.disconnect()
         sys.exit(0)
     
-    signal.signal(signal.SIGINT, signal_handler)
+    # headless 模式由主循环捕获 KeyboardInterrupt，统一输出最终统计后再断开
+    if not headless:
+        signal.signal(signal.SIGINT, signal_handler)
     
     if not session.connect_to_app(target_app, spawn_mode):
         return
@@ -223,7 +306,12 @@ def run_frida_session(spawn_mode=False, target_package=None, force_show_apps=Fal
         _execute_early_hooks(session, early_hook, hook_args, preset, config_file)
     
     try:
-        run_interactive_session(session)
+        if headless:
+            from fridac_core.headless import run_headless_session, DEFAULT_STATS_INTERVAL
+            get_startup_profiler().report()
+            run_headless_session(session, headless_interval or DEFAULT_STATS_INTERVAL)
+        else:
+            run_interactive_session(session)
     except OSError as e:
         log_exception("交互会话 I/O 异常", e)
     except Exception as e:
@@ -234,6 +322,12 @@ def run_frida_session(spawn_mode=False, target_package=None, force_show_apps=Fal
 
 def main():
     """主函数 - CLI 入口点"""
+    main_start = time.perf_counter()
+    # 子命令: fridac replay <file> （离线回放，无需连接设备）
+    if len(sys.argv) > 1 and sys.argv[1] == 'replay':
+        from fridac_core.replay import main as replay_main
+        sys.exit(replay_main(sys.argv[2:]))
+    
     parser = argparse.ArgumentParser(
         description='fridac - 专业级 Frida Hook 工具集',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -249,6 +343,10 @@ frida-server 管理:
   fridac --stop-server                      # 停止 frida-server
   # 注: fridac 会自动检测并启动 frida-server，无需手动管理
   
+事件日志与回放:
+  fridac -f com.app --events events.jsonl   # 记录结构化事件
+  fridac replay events.jsonl --speed 10x    # 离线回放 (--speed max 尽快渲染)
+  
 早期 Hook (仅 Spawn 模式):
   fridac -f com.app --hook traceRegisterNatives
   fridac -f com.app --preset jni_analysis
@@ -290,6 +388,24 @@ frida-server 管理:
     parser.add_argument('--append', action='store_true',
                        help='追加模式 (配合 -o)')
     
+    parser.add_argument('--rotate-size', type=str, default=None,
+                       help='输出文件按大小轮转 (配合 -o，如 100M)')
+    
+    parser.add_argument('--rotate-time', type=str, default=None,
+                       help='输出文件按时间轮转 (配合 -o，如 30m、1h)')
+    
+    parser.add_argument('--compress', type=str, default=None, choices=['gzip', 'zstd'],
+                       help='输出文件流式压缩 (配合 -o，zstd 需安装 zstandard)')
+    
+    parser.add_argument('--flush-interval', type=float, default=None,
+                       help='输出文件最长刷新间隔 (秒，默认 1.0，配合 -o)')
+    
+    parser.add_argument('--events', type=str, default=None,
+                       help='结构化事件日志文件 (JSON Lines，可与 -o 同时使用)')
+    
+    parser.add_argument('--events-format', type=str, default='jsonl', choices=['jsonl', 'lp'],
+                       help='事件日志格式: jsonl 或 lp (4 字节长度前缀 + JSON)')
+    
     parser.add_argument('--data-path', type=str,
                        help='指定数据文件路径 (JS 脚本目录)')
     
@@ -306,11 +422,64 @@ frida-server 管理:
     parser.add_argument('--list-scripts', action='store_true',
                        help='列出所有可用的自定义脚本')
     
-    parser.add_argument('--version', action='version', 
-                       version='fridac 1.0.0 (Frida {})'.format(get_frida_version()))
+    parser.add_argument('--batch-ms', type=int, default=None,
+                       help='Agent 端日志批量发送的刷新延迟 (毫秒，默认 50，0 为逐条发送)')
+    
+    parser.add_argument('--render-queue', type=int, default=None,
+                       help='控制台渲染队列容量 (默认 10000，0 为同步渲染)')
+    
+    parser.add_argument('--render-policy', type=str, default=None,
+                       choices=['block', 'drop-oldest', 'drop-newest', 'sample'],
+                       help='渲染队列满时的处理策略 (默认 drop-oldest)')
+    
+    parser.add_argument('--coalesce', type=str, default=None, choices=['off', 'exact', 'template'],
+                       help='控制台合并连续重复输出为 xN 计数 (template: 忽略数字/地址差异)')
+    
+    parser.add_argument('--task-runtime', type=str, default=None, choices=['shared', 'isolated'],
+                       help='任务脚本模式: shared 共享运行时只加载一次基础函数 (默认) / isolated 每任务独立脚本')
+    
+    parser.add_argument('--eager-modules', action='store_true',
+                       help='随主脚本注入全部 Native / 定位 Hook 工具 (默认首次调用时按需加载)')
+    
+    parser.add_argument('--no-cache', action='store_true',
+                       help='不使用 ~/.fridac/cache 中缓存的 Agent 脚本包，每次重新拼装')
+    
+    parser.add_argument('--hot-reload', action='store_true',
+                       help='监视脚本目录，修改的自定义脚本即时以独立脚本加载 (无需重连，REPL 中 hotreload on/off)')
+    
+    parser.add_argument('--task-profile', action='store_true',
+                       help='统计每个任务 Hook 的附加延迟 (每次命中额外计时，taskprof 查看；REPL 中 taskprof on/off)')
+    
+    parser.add_argument('--features', type=str, default=None, metavar='LIST',
+                       help='精简构建: 只保留指定功能 (java,objects,fetch,okhttp,hierarchy,help,native,location，逗号分隔)')
+    
+    parser.add_argument('--minify', action='store_true',
+                       help='去除 Agent 脚本中的注释与多余空白 (--features 时默认开启)')
+    
+    parser.add_argument('--profile-startup', nargs='?', const='1', default=None, metavar='JSON',
+                       help='输出启动各阶段耗时分解，可选写入 JSON 文件')
+    
+    parser.add_argument('--unload-timeout', type=float, default=None,
+                       help='killall/退出时单个任务卸载的最长等待 (秒，默认 3，任务并发卸载)')
+    
+    parser.add_argument('--headless', action='store_true',
+                       help='无界面采集: 不显示 Banner/REPL/控制台渲染，事件只写入 -o / --events')
+    
+    parser.add_argument('--headless-interval', type=float, default=None,
+                       help='headless 模式吞吐统计输出间隔 (秒，默认 10)')
+    
+    parser.add_argument('--version', action=_VersionAction,
+                       help='显示 fridac 与 Frida 版本并退出')
     
     args = parser.parse_args()
     
+    if args.profile_startup:
+        os.environ['FRIDAC_PROFILE_STARTUP'] = args.profile_startup
+        profiler = get_startup_profiler()
+        profiler.enable(None if args.profile_startup == '1' else args.profile_startup, origin=_CLI_START)
+        profiler.record('导入模块', _CLI_START, main_start, 0)
+        profiler.record('参数解析', main_start, time.perf_counter(), 0)
+    
     # 如果指定了数据路径，更新环境变量（需在使用 DATA_PATH 前处理）
     if args.data_path:
         os.environ['FRIDAC_DATA_PATH'] = args.data_path
@@ -338,7 +507,8 @@ frida-server 管理:
         ensure_frida_server()
         return
     
-    # 数据路径已在前面处理
+    # 以下为会话路径：导入设备连接与环境检测
+    from fridac_core.environment import detect_python_environment, get_frontmost_app
     
     target_package = None
     spawn_mode = False
@@ -353,7 +523,8 @@ frida-server 管理:
     elif args.apps:
         force_show_apps = True
     else:
-        frontmost_id, frontmost_name = get_frontmost_app()
+        with get_startup_profiler().phase('get_frontmost_app'):
+            frontmost_id, frontmost_name = get_frontmost_app()
         if frontmost_id:
             target_package = frontmost_id
             spawn_mode = False
@@ -364,8 +535,12 @@ frida-server 管理:
             force_show_apps = True
     
     # 检测环境并显示 Banner（集成版本信息）
-    env_info = detect_python_environment()
-    show_banner(env_info)
+    if not args.headless:
+        with get_startup_profiler().phase('detect_python_environment'):
+            env_info = detect_python_environment()
+        show_banner(env_info)
+    elif not args.output and not args.events:
+        log_warning("⚠️ --headless 未指定 -o 或 --events，事件将不会被保存")
     
     try:
         run_frida_session(
@@ -380,7 +555,27 @@ frida-server 管理:
             append_mode=args.append,
             select_scripts=args.select_scripts,
             scripts_filter=args.scripts,
-            no_scripts=args.no_scripts
+            no_scripts=args.no_scripts,
+            batch_ms=args.batch_ms,
+            render_queue=args.render_queue,
+            render_policy=args.render_policy,
+            rotate_size=args.rotate_size,
+            rotate_time=args.rotate_time,
+            compression=args.compress,
+            flush_interval=args.flush_interval,
+            events_file=args.events,
+            events_format=args.events_format,
+            coalesce=args.coalesce,
+            headless=args.headless,
+            headless_interval=args.headless_interval,
+            task_runtime=args.task_runtime,
+            unload_timeout=args.unload_timeout,
+            no_cache=args.no_cache,
+            eager_modules=args.eager_modules,
+            features=args.features,
+            minify=args.minify,
+            hot_reload=args.hot_reload,
+            task_profile=args.task_profile
         )
     except KeyboardInterrupt:
         log_info("程序被用户中断")
@@ -0,0 +1,134 @@
+"""
+fridac 重复输出合并模块
+将连续相同（或同模板）的控制台消息折叠为一条，并周期性输出 xN 重复计数；
+只作用于控制台渲染，文件/事件日志仍记录完整数据流
+"""
+
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+MODE_OFF = 'off'
+MODE_EXACT = 'exact'          # 完全相同才合并
+MODE_TEMPLATE = 'template'    # 数字/十六进制地址归一化后相同即合并
+MODES = (MODE_OFF, MODE_EXACT, MODE_TEMPLATE)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_TEMPLATE_RE = re.compile(r'0x[0-9a-fA-F]+|\d+')
+# 结构化事件中每条都会变化、不参与比较的字段
+_VOLATILE_KEYS = ('ts', 'timestamp', 'pid', 'tid')
+
+
+def make_key(func: Callable, args: Tuple, kwargs: Dict[str, Any], template: bool) -> Optional[str]:
+    """
+    计算渲染调用的合并键
+
+    Returns:
+        合并键；参数中含不可比较对象（如二进制载荷）时返回 None 表示不合并
+    """
+    parts = [getattr(func, '__name__', repr(func)), str(kwargs.get('task_id'))]
+    for arg in args:
+        if isinstance(arg, str):
+            text = arg
+        elif isinstance(arg, dict):
+            stable = {k: v for k, v in arg.items() if k not in _VOLATILE_KEYS}
+            try:
+                text = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+            except Exception:
+                return None
+        else:
+            return None
+        if template:
+            text = _TEMPLATE_RE.sub('#', text)
+        parts.append(text)
+    return '\x00'.join(parts)
+
+
+class Coalescer:
+    """
+    连续重复消息合并器
+
+    首条消息立即渲染；后续重复只计数，在出现不同消息或定时刷新时输出一行重复计数
+    """
+
+    def __init__(self, emit: Callable, render_summary: Callable, mode: str = MODE_OFF,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        Args:
+            emit: 实际提交渲染的函数 emit(func, *args, **kwargs)
+            render_summary: 渲染重复计数行的函数 render_summary(text, task_id=...)
+        """
+        self._emit = emit
+        self._render_summary = render_summary
+        self.mode = mode if mode in MODES else MODE_OFF
+        self.flush_interval = flush_interval
+        self.coalesced = 0
+
+        self._lock = threading.Lock()
+        self._key = None  # type: Optional[str]
+        self._count = 0
+        self._task_id = None
+        self._stop_event = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != MODE_OFF
+
+    def set_mode(self, mode: str) -> bool:
+        if mode not in MODES:
+            return False
+        self.flush()
+        with self._lock:
+            self.mode = mode
+            self._key = None
+        return True
+
+    def offer(self, func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> bool:
+        """
+        尝试合并一次渲染调用
+
+        Returns:
+            True 表示已被合并（调用方不再渲染），False 表示调用方应正常渲染
+        """
+        if self.mode == MODE_OFF:
+            return False
+        key = make_key(func, args, kwargs, self.mode == MODE_TEMPLATE)
+        with self._lock:
+            if key is not None and key == self._key:
+                self._count += 1
+                self.coalesced += 1
+                self._ensure_thread()
+                return True
+            self._flush_locked()
+            self._key = key
+            self._task_id = kwargs.get('task_id')
+        return False
+
+    def _flush_locked(self):
+        if self._count > 0:
+            count = self._count
+            self._count = 0
+            self._emit(self._render_summary, f"⟳ 上一条重复 x{count}", task_id=self._task_id)
+
+    def flush(self):
+        """输出当前累计的重复计数（合并键保留，后续重复继续计数）"""
+        with self._lock:
+            self._flush_locked()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name='fridac-coalesce', daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def stop(self):
+        self._stop_event.set()
+        self.flush()
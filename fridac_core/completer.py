@@ -26,7 +26,7 @@ except ImportError:
     PROMPT_TOOLKIT_AVAILABLE = False
 
 from .logger import get_console
-from .script_manager import get_custom_script_manager
+from .script_manager import get_custom_script_manager, get_lazy_functions
 
 class FridacCompleter:
     """fridac 命令的增强自动补全（支持 rich 展示）"""
@@ -65,6 +65,7 @@ class FridacCompleter:
             'printStack': ('📚 打印Java调用栈', "printStack()"),
             'findTragetClassLoader': ('🔗 查找目标ClassLoader', "findTragetClassLoader('com.example.Class')"),
             'findStrInMap': ('🗺️ 监控HashMap查找key', "findStrInMap('password', 1)"),
+            'fridacBatchConfig': ('📦 调整日志批量发送参数', "fridacBatchConfig({flushMs: 10})  // 0=逐条发送"),
             
             # ===== 任务管理系统 =====
             'jobs': ('📋 显示所有任务', "jobs"),
@@ -73,6 +74,13 @@ class FridacCompleter:
             'killall': ('🧹 终止所有任务', "killall"),
             'taskinfo': ('🔍 查看任务详情', "taskinfo 1"),
             'taskstats': ('📊 查看任务统计', "taskstats"),
+            'renderstats': ('🖥️ 渲染队列统计 (丢弃/已渲染计数)', "renderstats [reset]"),
+            'renderpolicy': ('🖥️ 切换渲染队列溢出策略', "renderpolicy <block|drop-oldest|drop-newest|sample> [queue_size] [sample_rate]"),
+            'coalesce': ('🖥️ 合并连续重复输出为 xN 计数', "coalesce <off|exact|template>"),
+            'taskprof': ('⏱️ 任务插桩开销排行', "taskprof [latency|rate|on|off]"),
+            'taskevents': ('📜 检索任务最近事件 (内存缓冲)', "taskevents <task_id> [--last N] [--grep 正则] [--type 类型]"),
+            'hitevents': ('📊 开关逐次命中事件 (计数照常)', "hitevents <on|off>"),
+            'hotreload': ('♻️ 自定义脚本热重载', "hotreload <on|off|status>"),
             'taskhelp': ('❓ 任务命令帮助', "taskhelp"),
             
             # 类/方法追踪 (使用任务系统)
@@ -164,12 +172,16 @@ class FridacCompleter:
             'grename': ('✏️ 重命名函数', "grename sub_401000 decrypt_data"),
             
             'help': ('❓ 显示帮助信息', "help()"),
+            'fridacModules': ('📦 按需加载模块状态', "fridacModules()"),
             'q': ('🚪 退出程序', "q"),
             }
         
         # 加载自定义函数
         self._load_custom_functions()
         
+        # 按需加载模块中未在上面列出的函数
+        self._load_lazy_functions()
+        
         # Common Java class patterns for suggestions with categories
         self.common_patterns = {
             'Android系统类': [
@@ -210,6 +222,15 @@ class FridacCompleter:
             # 如果自定义脚本管理器还未初始化，忽略错误
             pass
     
+    def _load_lazy_functions(self):
+        """将按需加载模块（Native / 定位工具）提供的函数加入补全列表"""
+        try:
+            for func_name, module in get_lazy_functions().items():
+                if func_name not in self.functions:
+                    self.functions[func_name] = (f"💤 按需加载: {module}", f"{func_name}()")
+        except Exception:
+            pass
+    
     def reload_custom_functions(self):
         """重新加载自定义函数（用于脚本重载后）"""
         # 移除现有的自定义函数
@@ -8,11 +8,15 @@ import os
 import re
 import json
 import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from datetime import datetime
 
 from .logger import log_info, log_success, log_warning, log_error, log_debug
+from .startup_profile import profiled_phase
+from .parse_cache import open_parse_cache, content_digest
+from . import js_tokens
 
 # 尝试导入 esprima 用于 JavaScript AST 解析
 try:
@@ -21,6 +25,12 @@ try:
 except ImportError:
     HAS_ESPRIMA = False
 
+# 待解析脚本不少于该数量时才启用进程池（进程启动本身有开销）
+PARALLEL_PARSE_MIN_SCRIPTS = 8
+
+# scan_scripts 中未变化（无需重新登记）的脚本
+_UNCHANGED = object()
+
 @dataclass
 class CustomFunction:
     """自定义函数信息"""
@@ -42,6 +52,99 @@ class CustomScript:
     last_modified: float
     load_time: datetime
     error_message: Optional[str] = None
+    import_code: Optional[str] = None  # 去除 JSDoc 后用于注入主脚本的源码
+
+
+@dataclass
+class ParsedScript:
+    """单个脚本的解析结果"""
+    functions: Dict[str, CustomFunction]
+    import_code: str
+
+
+def get_scripts_dirs(base_dir: str) -> List[str]:
+    """
+    获取所有脚本目录
+    
+    Args:
+        base_dir: fridac 项目根目录
+    
+    Returns:
+        脚本目录列表（按优先级排序，后加载覆盖先加载）
+    """
+    dirs = []
+    
+    # 1. 安装目录/scripts/
+    install_scripts = os.path.join(base_dir, 'scripts')
+    dirs.append(install_scripts)
+    
+    # 2. ~/.fridac/scripts/（用户全局脚本）
+    user_scripts = os.path.expanduser('~/.fridac/scripts')
+    if user_scripts not in dirs:
+        dirs.append(user_scripts)
+    
+    # 3. 当前目录/scripts/（项目特定脚本）
+    cwd_scripts = os.path.join(os.getcwd(), 'scripts')
+    if cwd_scripts not in dirs and cwd_scripts != install_scripts:
+        dirs.append(cwd_scripts)
+    
+    # 4. FRIDAC_SCRIPTS_PATH 环境变量（可指定多个，用:分隔）
+    env_paths = os.environ.get('FRIDAC_SCRIPTS_PATH', '')
+    if env_paths:
+        for p in env_paths.split(':'):
+            p = p.strip()
+            if p and p not in dirs:
+                dirs.append(p)
+    
+    return dirs
+
+
+def _parse_worker_count(job_count: int) -> int:
+    """进程池大小：默认 CPU 核数，FRIDAC_PARSE_WORKERS 可覆盖（<=1 为顺序解析）"""
+    if job_count < PARALLEL_PARSE_MIN_SCRIPTS:
+        return 1
+    try:
+        workers = int(os.environ.get('FRIDAC_PARSE_WORKERS', '') or (os.cpu_count() or 1))
+    except ValueError:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, job_count))
+
+
+def _parse_script_job(job: Tuple[str, str]) -> Optional[ParsedScript]:
+    """解析单个脚本（进程池工作函数，失败返回 None）"""
+    file_path, script_content = job
+    try:
+        # 解析方法不依赖管理器状态，无需初始化（避免在子进程中扫描目录）
+        parser = CustomScriptManager.__new__(CustomScriptManager)
+        return parser._parse_script(script_content, file_path)
+    except Exception as e:
+        log_error(f"❌ 加载脚本失败 {file_path}: {e}")
+        return None
+
+
+def parse_scripts(jobs: List[Tuple[str, str]]) -> List[Optional[ParsedScript]]:
+    """
+    批量解析脚本，数量较多时在进程池中并发解析
+    
+    Args:
+        jobs: (脚本路径, 脚本内容) 列表
+    
+    Returns:
+        与 jobs 顺序一致的解析结果（失败为 None）
+    """
+    workers = _parse_worker_count(len(jobs))
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                results = list(executor.map(_parse_script_job, jobs, chunksize=chunksize))
+            log_debug(f"并发解析 {len(jobs)} 个脚本 ({workers} 进程)")
+            return results
+        except Exception as e:
+            # 受限环境（无法创建子进程 / 信号量）或子进程异常退出时回退顺序解析
+            log_debug(f"并发解析不可用，改为顺序解析: {e}")
+    return [_parse_script_job(job) for job in jobs]
+
 
 class CustomScriptManager:
     """
@@ -72,6 +175,8 @@ class CustomScriptManager:
         self.scripts_dirs = self._get_scripts_dirs()
         self.scripts: Dict[str, CustomScript] = {}
         self.functions: Dict[str, CustomFunction] = {}
+        # 跨进程的解析结果缓存（未变化的脚本不再重新解析）
+        self.parse_cache = open_parse_cache('esprima' if HAS_ESPRIMA else 'regex')
         
         # 确保至少一个scripts目录存在
         primary_scripts_dir = os.path.join(base_dir, 'scripts')
@@ -86,31 +191,7 @@ class CustomScriptManager:
         Returns:
             脚本目录列表（按优先级排序，后加载覆盖先加载）
         """
-        dirs = []
-        
-        # 1. 安装目录/scripts/
-        install_scripts = os.path.join(self.base_dir, 'scripts')
-        dirs.append(install_scripts)
-        
-        # 2. ~/.fridac/scripts/（用户全局脚本）
-        user_scripts = os.path.expanduser('~/.fridac/scripts')
-        if user_scripts not in dirs:
-            dirs.append(user_scripts)
-        
-        # 3. 当前目录/scripts/（项目特定脚本）
-        cwd_scripts = os.path.join(os.getcwd(), 'scripts')
-        if cwd_scripts not in dirs and cwd_scripts != install_scripts:
-            dirs.append(cwd_scripts)
-        
-        # 4. FRIDAC_SCRIPTS_PATH 环境变量（可指定多个，用:分隔）
-        env_paths = os.environ.get('FRIDAC_SCRIPTS_PATH', '')
-        if env_paths:
-            for p in env_paths.split(':'):
-                p = p.strip()
-                if p and p not in dirs:
-                    dirs.append(p)
-        
-        return dirs
+        return get_scripts_dirs(self.base_dir)
     
     @property
     def scripts_dir(self) -> str:
@@ -314,6 +395,7 @@ function monitorSensitiveNetwork(sensitiveFields) {
         
         log_success(f"✅ 已创建示例脚本: {example_path}")
     
+    @profiled_phase('CustomScriptManager.scan_scripts')
     def scan_scripts(self) -> int:
         """
         扫描所有scripts目录，加载JavaScript脚本
@@ -329,32 +411,64 @@ function monitorSensitiveNetwork(sensitiveFields) {
         """
         loaded_count = 0
         error_count = 0
-        scanned_dirs = 0
+        if self.parse_cache:
+            self.parse_cache.reset_stats()
 
+        # 1. 收集脚本（目录优先级 + 遍历顺序决定最终的覆盖顺序）
+        entries = []  # type: List[Tuple[str, str]]
         for scripts_dir in self.scripts_dirs:
             if not os.path.exists(scripts_dir):
                 continue
-            
-            scanned_dirs += 1
 
-            # 递归扫描 scripts/ 子目录，支持按文件夹分类
-            for dirpath, _dirnames, filenames in os.walk(scripts_dir):
-                for filename in filenames:
+            # 递归扫描 scripts/ 子目录，支持按文件夹分类（排序，保证覆盖顺序稳定）
+            for dirpath, dirnames, filenames in os.walk(scripts_dir):
+                dirnames.sort()
+                for filename in sorted(filenames):
                     if not filename.endswith('.js'):
                         continue
 
                     file_path = os.path.join(dirpath, filename)
                     # 使用相对路径作为脚本唯一键
-                    rel_key = os.path.relpath(file_path, scripts_dir)
-
-                    try:
-                        if self._load_script(file_path, rel_key):
-                            loaded_count += 1
-                        else:
-                            error_count += 1
-                    except Exception as e:
-                        log_error(f"❌ 加载脚本失败 {rel_key}: {e}")
-                        error_count += 1
+                    entries.append((file_path, os.path.relpath(file_path, scripts_dir)))
+        
+        # 2. 未变化或命中解析缓存的脚本直接取结果，其余待解析
+        results = [None] * len(entries)  # type: List[Any]
+        pending = []
+        for index, (file_path, rel_key) in enumerate(entries):
+            try:
+                stat_info = os.stat(file_path)
+                if self._is_unchanged(rel_key, stat_info.st_mtime):
+                    results[index] = _UNCHANGED
+                    continue
+                parsed, content, digest = self._lookup_cached(file_path, stat_info)
+            except Exception as e:
+                log_error(f"❌ 加载脚本失败 {rel_key}: {e}")
+                continue
+            if parsed is None:
+                pending.append((index, file_path, stat_info, content, digest))
+            else:
+                results[index] = (stat_info, parsed)
+        
+        # 3. 未命中缓存的脚本并发解析（结果与任务顺序一一对应）
+        parsed = parse_scripts([(file_path, content) for _, file_path, _, content, _ in pending])
+        for (index, file_path, stat_info, _, digest), result in zip(pending, parsed):
+            if result is None:
+                continue
+            self._store_parsed(file_path, stat_info, digest, result)
+            results[index] = (stat_info, result)
+        
+        # 4. 按扫描顺序合并，后加载的同名函数覆盖先加载的
+        for (file_path, rel_key), result in zip(entries, results):
+            if result is _UNCHANGED:
+                loaded_count += 1
+            elif result is not None and self._register_script(file_path, rel_key, *result):
+                loaded_count += 1
+            else:
+                error_count += 1
+        
+        if self.parse_cache:
+            self.parse_cache.save()
+            log_debug(f"脚本解析缓存: 命中 {self.parse_cache.hits}，未命中 {self.parse_cache.misses}")
         
         # 只在加载了自定义脚本时显示汇总信息
         if loaded_count > 0:
@@ -379,65 +493,129 @@ function monitorSensitiveNetwork(sensitiveFields) {
             # 以相对路径作为唯一键，避免同名文件冲突
             rel_key = key_name or os.path.relpath(file_path, self.scripts_dir)
             stat_info = os.stat(file_path)
-            last_modified = stat_info.st_mtime
             
             # 检查是否需要重新加载
-            if rel_key in self.scripts:
-                existing = self.scripts[rel_key]
-                if existing.last_modified >= last_modified:
-                    return True  # 文件未变化，跳过
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                script_content = f.read()
-            
-            # 解析函数
-            functions = self._parse_functions(script_content, file_path)
+            if self._is_unchanged(rel_key, stat_info.st_mtime):
+                return True  # 文件未变化，跳过
             
-            if not functions:
-                # 修复未定义变量 filename，改为使用文件名
-                log_debug(f"⚠️ 脚本中未找到函数定义: {os.path.basename(file_path)}")
-                return False
-            
-            # 创建脚本对象
-            script = CustomScript(
-                file_path=file_path,
-                file_name=os.path.basename(file_path),
-                functions=functions,
-                last_modified=last_modified,
-                load_time=datetime.now()
-            )
+            parsed, content, digest = self._lookup_cached(file_path, stat_info)
+            if parsed is None:
+                parsed = self._parse_script(content, file_path)
+                self._store_parsed(file_path, stat_info, digest, parsed)
             
-            # 保存到管理器
-            self.scripts[rel_key] = script
-            
-            # 更新函数索引
-            for func_name, func_info in functions.items():
-                self.functions[func_name] = func_info
-            
-            return True
+            return self._register_script(file_path, rel_key, stat_info, parsed)
             
         except Exception as e:
             log_error(f"❌ 加载脚本失败 {file_path}: {e}")
             return False
     
-    def _parse_functions(self, script_content: str, file_path: str) -> Dict[str, CustomFunction]:
+    def _is_unchanged(self, rel_key: str, last_modified: float) -> bool:
+        existing = self.scripts.get(rel_key)
+        return existing is not None and existing.last_modified >= last_modified
+    
+    def _register_script(self, file_path: str, rel_key: str, stat_info: os.stat_result,
+                         parsed: ParsedScript) -> bool:
+        """将解析结果登记到管理器（脚本未变化时跳过，无函数时返回 False）"""
+        last_modified = stat_info.st_mtime
+        if self._is_unchanged(rel_key, last_modified):
+            return True
+        
+        functions = parsed.functions
+        if not functions:
+            # 修复未定义变量 filename，改为使用文件名
+            log_debug(f"⚠️ 脚本中未找到函数定义: {os.path.basename(file_path)}")
+            return False
+        
+        # 创建脚本对象
+        script = CustomScript(
+            file_path=file_path,
+            file_name=os.path.basename(file_path),
+            functions=functions,
+            last_modified=last_modified,
+            load_time=datetime.now(),
+            import_code=parsed.import_code
+        )
+        
+        # 保存到管理器
+        self.scripts[rel_key] = script
+        
+        # 更新函数索引
+        for func_name, func_info in functions.items():
+            self.functions[func_name] = func_info
+        
+        return True
+    
+    def _lookup_cached(self, file_path: str, stat_info: os.stat_result):
+        """
+        从磁盘缓存查找解析结果
+        
+        (路径, 大小, mtime) 未变化时不读取文件；内容哈希未变化时不重新解析
+        
+        Returns:
+            (parsed, content, digest)：未命中时 parsed 为 None，content 为已读取的源码
+        """
+        if self.parse_cache:
+            cached = self.parse_cache.lookup(file_path, stat_info)
+            if cached is not None:
+                return self._parsed_from_cache(cached), None, None
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            script_content = f.read()
+        
+        digest = None
+        if self.parse_cache:
+            digest = content_digest(script_content)
+            cached = self.parse_cache.lookup_content(file_path, stat_info, digest)
+            if cached is not None:
+                return self._parsed_from_cache(cached), script_content, digest
+        return None, script_content, digest
+    
+    @staticmethod
+    def _parsed_from_cache(entry: Dict[str, Any]) -> ParsedScript:
+        functions = {item['name']: CustomFunction(**item) for item in entry['functions']}
+        return ParsedScript(functions=functions, import_code=entry['import_code'])
+    
+    def _store_parsed(self, file_path: str, stat_info: os.stat_result, digest: Optional[str],
+                      parsed: ParsedScript):
+        if self.parse_cache and digest:
+            self.parse_cache.store(file_path, stat_info, digest,
+                                   [asdict(func) for func in parsed.functions.values()], parsed.import_code)
+    
+    def _parse_script(self, script_content: str, file_path: str) -> ParsedScript:
+        """
+        解析脚本：函数元数据与注入用源码共用一次切分
+        
+        Args:
+            script_content: 脚本内容
+            file_path: 脚本文件路径
+        """
+        tokens = list(js_tokens.iter_tokens(script_content))
+        return ParsedScript(
+            functions=self._parse_functions(script_content, file_path, tokens),
+            # 移除JSDoc注释以减少大小
+            import_code=js_tokens.strip_jsdoc(script_content, tokens)
+        )
+    
+    def _parse_functions(self, script_content: str, file_path: str,
+                         tokens: Optional[List[js_tokens.Token]] = None) -> Dict[str, CustomFunction]:
         """
         解析JavaScript脚本中的函数定义（仅获取最外层函数）
         
         Args:
             script_content: 脚本内容
             file_path: 脚本文件路径
+            tokens: 已切分的片段（可选，回退解析时复用）
             
         Returns:
             函数信息字典
         """
         functions = {}
         
-        # 优先使用 AST 解析，回退到正则表达式
+        # 优先使用 AST 解析，回退到单遍扫描
         if HAS_ESPRIMA:
             functions = self._parse_functions_with_ast(script_content, file_path)
         else:
-            functions = self._parse_functions_with_regex(script_content, file_path)
+            functions = self._parse_functions_with_regex(script_content, file_path, tokens)
             
         return functions
     
@@ -531,56 +709,37 @@ function monitorSensitiveNetwork(sensitiveFields) {
             
         return functions
     
-    def _parse_functions_with_regex(self, script_content: str, file_path: str) -> Dict[str, CustomFunction]:
+    def _parse_functions_with_regex(self, script_content: str, file_path: str,
+                                    tokens: Optional[List[js_tokens.Token]] = None) -> Dict[str, CustomFunction]:
         """
-        使用正则表达式解析 JavaScript 函数（仅最外层函数）
+        无 esprima 时的回退解析：单遍扫描顶层函数（跟踪大括号深度、字符串、模板与注释）
         
         Args:
             script_content: 脚本内容
             file_path: 脚本文件路径
+            tokens: 已切分的片段（可选）
             
         Returns:
             函数信息字典
         """
         functions = {}
         
-        # 匹配函数定义的正则表达式
-        # 支持标准函数定义和带JSDoc注释的函数
-        function_pattern = r'(?:/\*\*[\s\S]*?\*/\s*)?function\s+(\w+)\s*\(([^)]*)\)\s*\{'
-        
-        for match in re.finditer(function_pattern, script_content, re.MULTILINE):
-            func_name = match.group(1)
+        for decl in js_tokens.iter_top_level_functions_with_doc(script_content, tokens):
+            func_name = decl.name
 
             # 过滤内部工具函数：以双下划线开头的不对外展示/导出
             if func_name.startswith('__'):
                 continue
-                
-            # 检查是否为最外层函数（不在其他函数内部）
-            if not self._is_top_level_function(script_content, match.start()):
-                continue
-            params_str = match.group(2).strip()
-            
-            # 解析参数
-            parameters = []
-            if params_str:
-                parameters = [p.strip() for p in params_str.split(',')]
-            
-            # 提取JSDoc注释
-            start_pos = match.start()
-            preceding_text = script_content[:start_pos]
             
-            description = self._extract_description(preceding_text)
-            example = self._extract_example(preceding_text) 
-            
-            # 提取函数体（简化版，找到匹配的大括号）
-            function_start = match.start()
-            function_code = self._extract_function_body(script_content, function_start)
+            # 提取JSDoc注释（仅紧邻函数声明的注释）
+            description = self._extract_description_from_comment(decl.doc[3:-2]) if decl.doc else ""
+            example = self._extract_example_from_comment(decl.doc[3:-2]) if decl.doc else ""
             
             # 默认描述和示例
             if not description:
                 description = f"自定义函数: {func_name}"
             if not example:
-                example_params = ', '.join([f'arg{i+1}' for i in range(len(parameters))])
+                example_params = ', '.join([f'arg{i+1}' for i in range(len(decl.params))])
                 example = f"{func_name}({example_params})"
             
             function_info = CustomFunction(
@@ -588,8 +747,8 @@ function monitorSensitiveNetwork(sensitiveFields) {
                 description=description,
                 example=example,
                 script_path=file_path,
-                function_code=function_code,
-                parameters=parameters,
+                function_code=script_content[decl.start:decl.end],
+                parameters=decl.params,
                 last_modified=time.time(),
                 task_capable=True  # 默认支持任务管理
             )
@@ -598,94 +757,6 @@ function monitorSensitiveNetwork(sensitiveFields) {
         
         return functions
     
-    def _extract_description(self, preceding_text: str) -> str:
-        """从JSDoc注释中提取描述"""
-        # 查找最近的JSDoc块
-        jsdoc_pattern = r'/\*\*\s*(.*?)\s*\*/'
-        matches = list(re.finditer(jsdoc_pattern, preceding_text, re.DOTALL))
-        
-        if not matches:
-            return ""
-        
-        last_match = matches[-1]
-        comment_text = last_match.group(1)
-        
-        # 查找@description标签
-        desc_pattern = r'@description\s+([^\n@]+)'
-        desc_match = re.search(desc_pattern, comment_text)
-        if desc_match:
-            return desc_match.group(1).strip()
-        
-        # 如果没有@description，使用第一行作为描述
-        lines = comment_text.split('\n')
-        for line in lines:
-            line = line.strip().lstrip('*').strip()
-            if line and not line.startswith('@'):
-                return line
-        
-        return ""
-    
-    def _extract_example(self, preceding_text: str) -> str:
-        """从JSDoc注释中提取示例"""
-        # 查找最近的JSDoc块
-        jsdoc_pattern = r'/\*\*\s*(.*?)\s*\*/'
-        matches = list(re.finditer(jsdoc_pattern, preceding_text, re.DOTALL))
-        
-        if not matches:
-            return ""
-        
-        last_match = matches[-1]
-        comment_text = last_match.group(1)
-        
-        # 查找@example标签
-        example_pattern = r'@example\s+([^\n@]+)'
-        example_match = re.search(example_pattern, comment_text)
-        if example_match:
-            return example_match.group(1).strip()
-        
-        return ""
-    
-    def _extract_function_body(self, script_content: str, start_pos: int) -> str:
-        """提取函数体代码"""
-        # 找到函数开始的大括号
-        brace_start = script_content.find('{', start_pos)
-        if brace_start == -1:
-            return ""
-        
-        # 计算匹配的大括号
-        brace_count = 0
-        in_string = False
-        escape_next = False
-        quote_char = None
-        
-        for i in range(brace_start, len(script_content)):
-            char = script_content[i]
-            
-            if escape_next:
-                escape_next = False
-                continue
-            
-            if char == '\\':
-                escape_next = True
-                continue
-            
-            if not in_string:
-                if char in ['"', "'"]:
-                    in_string = True
-                    quote_char = char
-                elif char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        return script_content[start_pos:i+1]
-            else:
-                if char == quote_char:
-                    in_string = False
-                    quote_char = None
-        
-        return script_content[start_pos:]  # 如果没找到匹配的括号，返回到文件末尾
-    
     def _extract_description_from_comment(self, comment_text: str) -> str:
         """从JSDoc注释文本中提取描述"""
         # 查找@description标签
@@ -713,50 +784,6 @@ function monitorSensitiveNetwork(sensitiveFields) {
         
         return ""
     
-    def _is_top_level_function(self, script_content: str, func_start: int) -> bool:
-        """
-        检查函数是否为顶层函数（不在其他函数内部）
-        
-        Args:
-            script_content: 脚本内容
-            func_start: 函数开始位置
-            
-        Returns:
-            是否为顶层函数
-        """
-        # 简单的大括号计数方法
-        brace_count = 0
-        in_string = False
-        escape_next = False
-        quote_char = None
-        
-        for i in range(func_start):
-            char = script_content[i]
-            
-            if escape_next:
-                escape_next = False
-                continue
-            
-            if char == '\\':
-                escape_next = True
-                continue
-            
-            if not in_string:
-                if char in ['"', "'"]:
-                    in_string = True
-                    quote_char = char
-                elif char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-            else:
-                if char == quote_char:
-                    in_string = False
-                    quote_char = None
-        
-        # 如果大括号计数为0，说明是顶层函数
-        return brace_count == 0
-    
     def get_all_functions(self) -> Dict[str, CustomFunction]:
         """获取所有自定义函数"""
         return self.functions.copy()
@@ -785,13 +812,12 @@ function monitorSensitiveNetwork(sensitiveFields) {
             
             imports.append(f"\n// 来自: {script_name}")
             
-            # 读取脚本内容
+            # 使用解析时生成的源码（已去除 JSDoc），无需重新读取
             try:
-                with open(script.file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 移除JSDoc注释以减少大小
-                content = re.sub(r'/\*\*[\s\S]*?\*/', '', content)
+                content = script.import_code
+                if content is None:
+                    with open(script.file_path, 'r', encoding='utf-8') as f:
+                        content = js_tokens.strip_jsdoc(f.read())
                 # 确保脚本内容以换行结尾，避免和下一个脚本连在一起
                 if not content.endswith('\n'):
                     content += '\n'
@@ -866,6 +892,43 @@ function monitorSensitiveNetwork(sensitiveFields) {
         log_success(f"🔄 脚本重载完成: {old_count} → {new_count} 个函数")
         return new_count
     
+    def _rel_key_for(self, file_path: str) -> str:
+        """文件在其所属脚本目录下的相对路径（属于多个目录时取优先级最高的）"""
+        abs_path = os.path.abspath(file_path)
+        rel_key = os.path.basename(file_path)
+        for scripts_dir in self.scripts_dirs:
+            root = os.path.abspath(scripts_dir)
+            if abs_path.startswith(root + os.sep):
+                rel_key = os.path.relpath(abs_path, root)
+        return rel_key
+    
+    def _forget_script(self, rel_key: str):
+        script = self.scripts.pop(rel_key, None)
+        if script is None:
+            return
+        for func_name in script.functions:
+            current = self.functions.get(func_name)
+            if current is not None and current.script_path == script.file_path:
+                del self.functions[func_name]
+    
+    def reload_file(self, file_path: str) -> Optional[CustomScript]:
+        """
+        只重新解析单个脚本（热重载），其余脚本保持不变
+        
+        Returns:
+            更新后的脚本信息，文件中没有函数或解析失败时返回 None
+        """
+        rel_key = self._rel_key_for(file_path)
+        self._forget_script(rel_key)
+        loaded = self._load_script(file_path, rel_key)
+        if self.parse_cache:
+            self.parse_cache.save()
+        return self.scripts.get(rel_key) if loaded else None
+    
+    def remove_file(self, file_path: str):
+        """移除已删除脚本的函数"""
+        self._forget_script(self._rel_key_for(file_path))
+    
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         return {
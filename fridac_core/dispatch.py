@@ -0,0 +1,208 @@
+"""
+fridac 消息分发模块
+按事件类型（payload['type']）O(1) 查找处理器；专用事件（fetch 抓包、SO 分析报告）
+由持有长生命周期文件句柄的处理器负责落盘，未注册的类型交回调用方走通用渲染
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .logger import log_success, log_error, render_structured_event
+from .output_sink import OutputSink
+from .render_queue import get_render_queue
+
+# 处理器签名: handler(payload, data, task_id) -> bool（True 表示已处理，不再通用渲染）
+Handler = Callable[[Dict[str, Any], Optional[bytes], Optional[int]], bool]
+
+
+class MessageDispatcher:
+    """事件类型 -> 处理器 注册表"""
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+        self._owners: List[Any] = []
+
+    def register(self, event_type: str, handler: Handler):
+        """注册单个事件类型的处理器（同类型后注册者覆盖）"""
+        self._handlers[event_type] = handler
+
+    def unregister(self, event_type: str):
+        self._handlers.pop(event_type, None)
+
+    def register_handler(self, owner):
+        """注册处理器对象：按其 event_types 绑定 handle 方法，并托管其 flush/close"""
+        for event_type in owner.event_types:
+            self.register(event_type, owner.handle)
+        if owner not in self._owners:
+            self._owners.append(owner)
+
+    def dispatch(self, payload: Any, data: Optional[bytes] = None, task_id: Optional[int] = None) -> bool:
+        """
+        分发一条消息
+
+        Returns:
+            True 表示已由注册处理器消费
+        """
+        if not isinstance(payload, dict):
+            return False
+        handler = self._handlers.get(payload.get('type'))
+        if handler is None:
+            return False
+        try:
+            return handler(payload, data, task_id) is not False
+        except Exception as e:
+            log_error(f"处理 {payload.get('type')} 事件失败: {e}")
+            return True
+
+    def flush(self):
+        for owner in self._owners:
+            flush = getattr(owner, 'flush', None)
+            if flush:
+                try:
+                    flush()
+                except Exception as e:
+                    log_error(f"刷新处理器失败: {e}")
+
+    def close(self):
+        for owner in self._owners:
+            close = getattr(owner, 'close', None)
+            if close:
+                try:
+                    close()
+                except Exception as e:
+                    log_error(f"关闭处理器失败: {e}")
+
+
+class FetchLogHandler:
+    """
+    fetch 抓包日志
+
+    fetch_start 时新建 fetch_info_<时间>.log 并保持打开；fetch_request 只写入缓冲，
+    由 OutputSink 按大小/定时批量刷新
+    """
+
+    event_types = ('fetch_start', 'fetch_request')
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getcwd()
+        self.sink: Optional[OutputSink] = None
+        self.path: Optional[str] = None
+        self.requests = 0
+
+    def _open(self, flt: Optional[str] = None):
+        self.close()
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.sink = OutputSink(os.path.join(self.directory, f"fetch_info_{ts}.log"), append_mode=True)
+        self.path = self.sink.path
+        self.sink.write(f"# fetch log started at {ts}\n")
+        if flt:
+            self.sink.write(f"# filter: {flt}\n")
+        self.sink.flush()
+
+    def handle(self, payload: Dict[str, Any], data: Optional[bytes], task_id: Optional[int]) -> bool:
+        items = payload.get('items') or {}
+        if payload.get('type') == 'fetch_start':
+            self._open(items.get('filter') if isinstance(items, dict) else None)
+            return True
+
+        if self.sink is None:
+            self._open()
+        method = items.get('method') or 'GET'
+        url = items.get('url') or ''
+        headers = items.get('headers') or {}
+        cookies = items.get('cookies')
+        python_code = items.get('python') or ''
+        stack = items.get('stack') or []
+        tss = datetime.now().strftime('%H:%M:%S')
+        lines = [f"\n[{tss}] {method} {url}\n", f"headers: {headers}\n"]
+        if cookies:
+            lines.append(f"cookies: {cookies}\n")
+        lines.append(f"python: {python_code}\n")
+        if stack:
+            lines.append("stack:\n")
+            lines.extend(f"  {frame}\n" for frame in stack)
+        self.sink.write(''.join(lines))
+        self.requests += 1
+
+        # 同时在控制台结构化展示
+        get_render_queue().submit(render_structured_event, payload, task_id=task_id)
+        return True
+
+    def flush(self):
+        if self.sink:
+            self.sink.flush()
+
+    def close(self):
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+
+
+class SoAnalysisHandler:
+    """
+    SO 分析报告
+
+    每个 outputFile 对应一个常驻句柄；同一路径再次输出时截断重写
+    """
+
+    event_types = ('so_analysis_output',)
+
+    def __init__(self):
+        self._handles: Dict[str, Any] = {}
+
+    def _handle_for(self, output_file: str):
+        path = os.path.abspath(output_file)
+        f = self._handles.get(path)
+        if f is None or f.closed:
+            output_dir = os.path.dirname(path)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir, exist_ok=True)
+            f = open(path, 'w', encoding='utf-8', buffering=1024 * 1024)
+            self._handles[path] = f
+        else:
+            f.seek(0)
+            f.truncate()
+        return f
+
+    def handle(self, payload: Dict[str, Any], data: Optional[bytes], task_id: Optional[int]) -> bool:
+        output_file = payload.get('outputFile')
+        if not output_file:
+            return True
+        content = payload.get('content', '')
+        so_name = payload.get('soName', 'unknown')
+        stats = payload.get('stats', {})
+        try:
+            f = self._handle_for(output_file)
+            f.write(f"# SO Analysis Report: {so_name}\n")
+            f.write(f"# Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"# Stats: exports={stats.get('totalExports', 0)}, imports={stats.get('totalImports', 0)}, jni_static={stats.get('jniStaticFuncs', 0)}\n")
+            f.write("\n")
+            f.write(content)
+            # 报告写完即对外可见
+            f.flush()
+            log_success(f"📄 SO 分析结果已写入: {output_file}")
+        except Exception as e:
+            log_error(f"写入 SO 分析文件失败: {e}")
+        return True
+
+    def flush(self):
+        for f in self._handles.values():
+            if not f.closed:
+                f.flush()
+
+    def close(self):
+        for f in self._handles.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._handles.clear()
+
+
+def create_default_dispatcher() -> MessageDispatcher:
+    """创建带 fetch / SO 分析处理器的分发器"""
+    dispatcher = MessageDispatcher()
+    dispatcher.register_handler(FetchLogHandler())
+    dispatcher.register_handler(SoAnalysisHandler())
+    return dispatcher
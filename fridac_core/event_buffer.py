@@ -0,0 +1,172 @@
+"""
+fridac 任务事件环形缓冲模块
+为每个任务在内存中保留最近 N 条事件（受全局字节预算约束），
+输出滚走或未开启 -o 时仍可在 REPL 中用 taskevents 检索，无需重新 Hook
+
+事件以序列化后的文本保存：结构化事件为 JSON、文本日志为原文，
+内存占用即文本长度（加上二进制附件长度），检索直接在文本上匹配
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+# 每个任务保留的事件条数
+DEFAULT_EVENTS_PER_TASK = 1000
+# 所有任务共享的内存预算（MB）
+DEFAULT_BUDGET_MB = 64
+
+KIND_TEXT = 'text'
+KIND_EVENT = 'event'
+KIND_BINARY = 'binary'
+
+
+class BufferedEvent:
+    """缓冲中的一条事件"""
+
+    __slots__ = ('ts', 'kind', 'text', 'data', 'size')
+
+    def __init__(self, ts: float, kind: str, text: str, data: Optional[bytes]):
+        self.ts = ts
+        self.kind = kind
+        self.text = text
+        self.data = data
+        self.size = len(text) + (len(data) if data else 0)
+
+    @property
+    def payload(self) -> Any:
+        """还原为原始 payload（结构化事件为字典，文本日志为字符串）"""
+        if self.kind == KIND_TEXT:
+            return self.text
+        try:
+            return json.loads(self.text)
+        except ValueError:
+            return self.text
+
+
+def _payload_type(event: BufferedEvent) -> Optional[str]:
+    """结构化事件顶层的 type 字段（嵌套字段与字符串内容不参与匹配）"""
+    payload = event.payload
+    return payload.get('type') if isinstance(payload, dict) else None
+
+
+class TaskEventBuffer:
+    """按任务划分的有界事件缓冲（超出全局预算时从占用最多的任务淘汰最旧事件）"""
+
+    def __init__(self, per_task: int = DEFAULT_EVENTS_PER_TASK, budget_bytes: int = DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.per_task = max(0, per_task)
+        self.budget_bytes = max(0, budget_bytes)
+        self._buffers = {}  # type: Dict[int, Deque[BufferedEvent]]
+        self._bytes = {}  # type: Dict[int, int]
+        self._total_bytes = 0
+        self._evicted = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'TaskEventBuffer':
+        """按 FRIDAC_TASK_EVENTS / FRIDAC_TASK_EVENTS_MB 创建（0 表示关闭）"""
+        def _env_number(name, default):
+            try:
+                return float(os.environ.get(name, '') or default)
+            except ValueError:
+                return default
+
+        per_task = int(_env_number('FRIDAC_TASK_EVENTS', DEFAULT_EVENTS_PER_TASK))
+        budget_mb = _env_number('FRIDAC_TASK_EVENTS_MB', DEFAULT_BUDGET_MB)
+        return cls(per_task, int(budget_mb * 1024 * 1024))
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_task > 0 and self.budget_bytes > 0
+
+    def append(self, task_id: int, payload: Any, data: Optional[bytes] = None):
+        """记录一条任务事件（消息线程调用）"""
+        if not self.enabled:
+            return
+        if isinstance(payload, dict):
+            try:
+                text = json.dumps(payload, ensure_ascii=False, default=str)
+            except (TypeError, ValueError):
+                text = str(payload)
+            kind = KIND_BINARY if data is not None else KIND_EVENT
+        else:
+            text = '' if payload is None else str(payload)
+            kind = KIND_TEXT
+        event = BufferedEvent(time.time(), kind, text, bytes(data) if data is not None else None)
+        if event.size > self.budget_bytes:
+            return
+
+        with self._lock:
+            buffer = self._buffers.get(task_id)
+            if buffer is None:
+                buffer = self._buffers[task_id] = deque()
+                self._bytes[task_id] = 0
+            buffer.append(event)
+            self._bytes[task_id] += event.size
+            self._total_bytes += event.size
+            if len(buffer) > self.per_task:
+                self._evict(task_id)
+            while self._total_bytes > self.budget_bytes:
+                largest = max(self._bytes, key=self._bytes.get)
+                self._evict(largest)
+
+    def _evict(self, task_id: int):
+        buffer = self._buffers[task_id]
+        event = buffer.popleft()
+        self._bytes[task_id] -= event.size
+        self._total_bytes -= event.size
+        self._evicted += 1
+
+    def query(self, task_id: int, last: Optional[int] = None, pattern: Optional[str] = None,
+              event_type: Optional[str] = None) -> List[BufferedEvent]:
+        """
+        检索任务缓冲中的事件
+
+        Args:
+            task_id: 任务ID
+            last: 只返回最后 N 条匹配（None 为全部）
+            pattern: 正则（不区分大小写，非法正则按子串匹配）
+            event_type: 只保留该 type 的结构化事件（text 表示文本日志）
+
+        Returns:
+            按时间顺序排列的事件列表
+        """
+        with self._lock:
+            events = list(self._buffers.get(task_id, ()))
+        if event_type:
+            if event_type == KIND_TEXT:
+                events = [e for e in events if e.kind == KIND_TEXT]
+            else:
+                events = [e for e in events if e.kind != KIND_TEXT and _payload_type(e) == event_type]
+        if pattern:
+            try:
+                regex = re.compile(pattern, re.IGNORECASE)
+                events = [e for e in events if regex.search(e.text)]
+            except re.error:
+                lowered = pattern.lower()
+                events = [e for e in events if lowered in e.text.lower()]
+        if last is not None and last >= 0:
+            events = events[-last:] if last else []
+        return events
+
+    def clear(self, task_id: Optional[int] = None):
+        """清空指定任务（或全部）的缓冲"""
+        with self._lock:
+            task_ids = list(self._buffers) if task_id is None else [task_id]
+            for tid in task_ids:
+                if tid in self._buffers:
+                    self._total_bytes -= self._bytes.pop(tid)
+                    del self._buffers[tid]
+
+    def stats(self, task_id: Optional[int] = None) -> Dict[str, int]:
+        """缓冲占用统计（task_id 为 None 时为全局）"""
+        with self._lock:
+            if task_id is None:
+                return {'events': sum(len(b) for b in self._buffers.values()),
+                        'bytes': self._total_bytes, 'evicted': self._evicted}
+            return {'events': len(self._buffers.get(task_id, ())),
+                    'bytes': self._bytes.get(task_id, 0), 'evicted': self._evicted}
@@ -0,0 +1,144 @@
+"""
+fridac 结构化事件日志模块
+将 Agent 消息以 JSON Lines（或长度前缀二进制帧）写入文件，便于 grep / pandas 加载 / 回放
+
+记录格式（每行一个 JSON 对象）：
+    {"ts": 毫秒时间戳, "type": 事件类型, "pid": ..., "tid": ..., "task_id": ...,
+     "payload": 原始 payload（文本日志为字符串）, "data": 原始字节的 base64（可选）}
+
+长度前缀格式（lp）：每条记录为 4 字节大端长度 + UTF-8 JSON
+"""
+
+import base64
+import gzip
+import io
+import json
+import struct
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from .output_sink import OutputSink, zstandard, ZSTD_AVAILABLE
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_LENGTH_PREFIXED = 'lp'
+FORMATS = (FORMAT_JSONL, FORMAT_LENGTH_PREFIXED)
+
+# 文本日志（LOG 输出）在事件流中的类型
+TEXT_EVENT_TYPE = 'log'
+
+_LENGTH_PREFIX = struct.Struct('>I')
+
+
+def build_record(payload: Any, data: Optional[bytes] = None, task_id: Optional[int] = None) -> dict:
+    """
+    将一条 send() payload 规范化为事件记录
+
+    Args:
+        payload: 结构化事件字典或文本
+        data: send() 附带的原始字节
+        task_id: 来源任务ID（主脚本为 None，结构化事件自带 task_id 时以其为准）
+
+    Returns:
+        事件记录字典
+    """
+    if isinstance(payload, dict):
+        ts = payload.get('ts') or payload.get('timestamp')
+        record = {
+            'ts': ts if isinstance(ts, (int, float)) else int(time.time() * 1000),
+            'type': payload.get('type') or payload.get('event') or 'event',
+            'pid': payload.get('pid'),
+            'tid': payload.get('tid'),
+            'task_id': payload.get('task_id', task_id),
+            'payload': payload,
+        }
+    else:
+        record = {
+            'ts': int(time.time() * 1000),
+            'type': TEXT_EVENT_TYPE,
+            'pid': None,
+            'tid': None,
+            'task_id': task_id,
+            'payload': '' if payload is None else str(payload),
+        }
+    if data is not None:
+        record['data'] = base64.b64encode(bytes(data)).decode('ascii')
+    return record
+
+
+class EventLog:
+    """结构化事件日志（复用 OutputSink 的缓冲、轮转与压缩）"""
+
+    def __init__(self, path: str, fmt: str = FORMAT_JSONL, append_mode: bool = False, **sink_options):
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的事件日志格式: {fmt}")
+        self.format = fmt
+        self.sink = OutputSink(path, append_mode=append_mode,
+                               binary=(fmt == FORMAT_LENGTH_PREFIXED), **sink_options)
+        self.path = self.sink.path
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def write(self, payload: Any, data: Optional[bytes] = None, task_id: Optional[int] = None):
+        """写入一条事件"""
+        record = build_record(payload, data, task_id)
+        line = json.dumps(record, ensure_ascii=False, default=str, separators=(',', ':'))
+        with self._lock:
+            if self.format == FORMAT_JSONL:
+                self.sink.write(line + '\n')
+            else:
+                body = line.encode('utf-8')
+                self.sink.write(_LENGTH_PREFIX.pack(len(body)) + body)
+            self.records += 1
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+
+def _open_for_read(path: str):
+    """按扩展名打开（自动识别 .gz / .zst 压缩）"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise ValueError("读取 .zst 文件需要安装 zstandard: pip install zstandard")
+        # zstd 读取流不支持逐行迭代，包一层 BufferedReader
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    return open(path, 'rb')
+
+
+def read_events(path: str, fmt: Optional[str] = None) -> Iterator[dict]:
+    """
+    读取事件日志，逐条产出记录字典
+
+    Args:
+        path: 事件日志路径（支持 .gz / .zst）
+        fmt: jsonl / lp，None 时按扩展名推断（含 .lp 视为长度前缀格式）
+    """
+    if fmt is None:
+        fmt = FORMAT_LENGTH_PREFIXED if '.lp' in path else FORMAT_JSONL
+    with _open_for_read(path) as f:
+        if fmt == FORMAT_LENGTH_PREFIXED:
+            while True:
+                header = f.read(_LENGTH_PREFIX.size)
+                if len(header) < _LENGTH_PREFIX.size:
+                    break
+                (length,) = _LENGTH_PREFIX.unpack(header)
+                body = f.read(length)
+                if len(body) < length:
+                    break
+                yield json.loads(body.decode('utf-8'))
+        else:
+            for raw in f:
+                raw = raw.strip()
+                if raw:
+                    yield json.loads(raw.decode('utf-8'))
+
+
+def record_bytes(record: dict) -> Optional[bytes]:
+    """取回记录中的原始字节"""
+    data = record.get('data')
+    return base64.b64decode(data) if data else None
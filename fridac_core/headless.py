@@ -0,0 +1,114 @@
+"""
+fridac 无界面采集模块
+--headless 模式：不显示 Banner、不启动 REPL、不做任何 rich 渲染，
+事件只写入已配置的输出（-o / --events），并周期性打印一行吞吐统计
+"""
+
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from .logger import log_info, log_warning
+from .render_queue import get_render_queue
+
+DEFAULT_STATS_INTERVAL = 10.0
+
+
+class ThroughputMonitor:
+    """周期性输出一行吞吐摘要"""
+
+    def __init__(self, session, interval: float = DEFAULT_STATS_INTERVAL):
+        self.session = session
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._last_total = 0
+        self._last_time = time.time()
+
+    def start(self):
+        self._last_time = time.time()
+        self._thread = threading.Thread(target=self._loop, name='fridac-headless-stats', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self.print_summary()
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.print_summary()
+
+    def print_summary(self):
+        """打印一行统计（纯文本，不经过 rich）"""
+        counts = get_render_queue().suppressed_counts()
+        total = sum(counts.values())
+        now = time.time()
+        elapsed = max(now - self._last_time, 1e-6)
+        rate = (total - self._last_total) / elapsed
+        self._last_total = total
+        self._last_time = now
+
+        parts = [
+            f"[{datetime.now().strftime('%H:%M:%S')}] 📊 事件 {total} (+{rate:.0f}/s)",
+            f"文本 {counts.get('render_text_message', 0)}",
+            f"结构化 {counts.get('render_structured_event', 0)}",
+            f"二进制 {counts.get('render_binary_event', 0)}",
+        ]
+        sink = getattr(self.session, 'output_handle', None)
+        if sink is not None:
+            parts.append(f"-o {sink.lines} 行")
+        event_log = getattr(self.session, 'event_log', None)
+        if event_log is not None:
+            parts.append(f"events {event_log.records} 条")
+        task_manager = getattr(self.session, 'task_manager', None)
+        if task_manager is not None:
+            parts.append(f"任务 {len(task_manager.tasks)}")
+        try:
+            sys.stdout.write(' | '.join(parts) + '\n')
+            sys.stdout.flush()
+        except Exception:
+            pass
+
+
+def run_headless_session(session, interval: float = DEFAULT_STATS_INTERVAL):
+    """
+    无界面主循环：等待 Ctrl+C / SIGTERM 或目标进程分离
+
+    Args:
+        session: 已连接的 FridacSession
+        interval: 吞吐统计输出间隔（秒）
+    """
+    stopped = threading.Event()
+
+    def _on_detached(reason, *args):
+        log_warning(f"⚠️ 目标进程已分离: {reason}")
+        stopped.set()
+
+    try:
+        session.target_process.on('detached', _on_detached)
+    except Exception:
+        pass
+
+    def _on_term(sig, frame):
+        stopped.set()
+
+    try:
+        signal.signal(signal.SIGTERM, _on_term)
+    except Exception:
+        pass
+
+    monitor = ThroughputMonitor(session, interval)
+    monitor.start()
+    log_info(f"🛰️  headless 采集中（每 {interval:g}s 输出统计，Ctrl+C 结束）")
+    try:
+        while session.running and not stopped.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
@@ -0,0 +1,73 @@
+"""
+fridac 二进制载荷模块
+接收 send(payload, data) 附带的原始字节，在宿主端按需生成 hexdump
+"""
+
+from typing import Any, Dict, Optional
+
+# 单次控制台展示的最大字节数（完整数据仍保留在 BinaryPayload 中）
+DEFAULT_DISPLAY_LIMIT = 256
+
+
+def format_hexdump(data: bytes, limit: Optional[int] = None, width: int = 16) -> str:
+    """
+    生成与 Frida hexdump() 相近格式的文本
+
+    Args:
+        data: 原始字节
+        limit: 最多展示的字节数（None 表示全部）
+        width: 每行字节数
+
+    Returns:
+        hexdump 文本
+    """
+    if not data:
+        return ''
+    view = data if limit is None else data[:limit]
+    header_hex = ' '.join(f"{i:x}".rjust(2) for i in range(width))
+    header_ascii = ''.join(f"{i:X}"[-1] for i in range(width))
+    lines = [f"{'':8}  {header_hex}  {header_ascii}"]
+    for offset in range(0, len(view), width):
+        chunk = view[offset:offset + width]
+        hex_part = ' '.join(f"{b:02x}" for b in chunk).ljust(width * 3 - 1)
+        ascii_part = ''.join(chr(b) if 0x20 <= b < 0x7f else '.' for b in chunk)
+        lines.append(f"{offset:08x}  {hex_part}  {ascii_part}")
+    if limit is not None and len(data) > limit:
+        lines.append(f"... ({len(data) - limit} more bytes)")
+    return '\n'.join(lines)
+
+
+class BinaryPayload:
+    """
+    带原始字节的事件
+
+    hexdump 文本只在首次访问时生成并缓存，未展示的数据不产生格式化开销
+    """
+
+    __slots__ = ('event', 'data', '_hexdump')
+
+    def __init__(self, event: Dict[str, Any], data: bytes):
+        self.event = event
+        self.data = bytes(data) if data is not None else b''
+        self._hexdump = None
+
+    @property
+    def length(self) -> int:
+        return len(self.data)
+
+    def hexdump(self, limit: Optional[int] = DEFAULT_DISPLAY_LIMIT) -> str:
+        """获取 hexdump 文本（默认截断到 DEFAULT_DISPLAY_LIMIT）"""
+        if limit != DEFAULT_DISPLAY_LIMIT:
+            return format_hexdump(self.data, limit)
+        if self._hexdump is None:
+            self._hexdump = format_hexdump(self.data, limit)
+        return self._hexdump
+
+    def hex(self) -> str:
+        """紧凑十六进制（用于文件输出）"""
+        return self.data.hex()
+
+
+def is_binary_message(payload: Any, data: Any) -> bool:
+    """判断一条 send() 消息是否携带了原始字节"""
+    return data is not None and isinstance(payload, dict)
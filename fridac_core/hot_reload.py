@@ -0,0 +1,343 @@
+"""
+fridac 自定义脚本热重载模块
+监视各 scripts 目录（Linux 使用 inotify，其他平台轮询 mtime），只重新解析变化的文件，
+并把每个变化的文件作为独立、可替换的 Frida 脚本加载到目标进程：
+再次修改时卸载旧脚本（撤销其 Hook）后加载新脚本，无需重新 attach
+
+热重载后的函数通过 REPL 命令调用时在其独立脚本中执行
+"""
+
+import ctypes
+import ctypes.util
+import functools
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from .logger import log_info, log_success, log_warning, log_error, log_debug
+from .script_manager import build_hot_reload_script, LAZY_MODULE_REQUEST
+
+# 轮询间隔（秒）
+DEFAULT_POLL_INTERVAL = 0.5
+# 收到变化后等待编辑器写完的合并窗口（秒）
+DEBOUNCE_SECONDS = 0.1
+
+# inotify 常量（linux/inotify.h）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _walk_dirs(roots: List[str]):
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, _filenames in os.walk(root):
+            dirnames.sort()
+            yield dirpath
+
+
+class _InotifyBackend:
+    """inotify 监视（递归为每个子目录添加 watch，新建的子目录自动加入）"""
+
+    name = 'inotify'
+
+    def __init__(self, roots: List[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._libc = libc
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+        self._dirs = {}  # type: Dict[int, str]
+        for dirpath in _walk_dirs(roots):
+            self._add_watch(dirpath)
+
+    def _add_watch(self, dirpath: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = dirpath
+
+    def wait(self, timeout: float) -> Set[str]:
+        changed = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+            dirpath = self._dirs.get(wd)
+            if dirpath is None or not name:
+                continue
+            path = os.path.join(dirpath, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # 新目录：加入监视，并把其中已有的脚本视为新增
+                    for subdir in _walk_dirs([path]):
+                        self._add_watch(subdir)
+                        changed.update(os.path.join(subdir, f) for f in os.listdir(subdir) if f.endswith('.js'))
+                continue
+            if name.endswith('.js'):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+
+class _PollingBackend:
+    """轮询 mtime / 大小变化"""
+
+    name = 'polling'
+
+    def __init__(self, roots: List[str], interval: float):
+        self._roots = roots
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for dirpath in _walk_dirs(self._roots):
+            try:
+                names = os.listdir(dirpath)
+            except OSError:
+                continue
+            for name in names:
+                if not name.endswith('.js'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self._interval))
+        current = self._scan()
+        previous, self._snapshot = self._snapshot, current
+        return {path for path in set(previous) | set(current) if previous.get(path) != current.get(path)}
+
+    def close(self):
+        pass
+
+
+class ScriptWatcher:
+    """脚本目录监视器：在后台线程中检测 .js 变化，合并短时间内的多次事件后回调"""
+
+    def __init__(self, roots: List[str], callback: Callable[[List[str]], None],
+                 interval: float = DEFAULT_POLL_INTERVAL):
+        self.roots = [root for root in roots if os.path.isdir(root)]
+        self.callback = callback
+        self.interval = interval
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def _create_backend(self):
+        if sys.platform.startswith('linux') and os.environ.get('FRIDAC_WATCH_POLL', '') != '1':
+            try:
+                return _InotifyBackend(self.roots)
+            except (OSError, AttributeError) as e:
+                log_debug(f"inotify 不可用，改为轮询: {e}")
+        return _PollingBackend(self.roots, self.interval)
+
+    def start(self):
+        self.backend = self._create_backend()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='fridac-script-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                changed = self.backend.wait(self.interval)
+                if not changed:
+                    continue
+                # 编辑器保存常伴随多次写入 / 重命名，合并窗口内的事件
+                deadline = time.monotonic() + DEBOUNCE_SECONDS
+                while not self._stop.is_set() and time.monotonic() < deadline:
+                    changed |= self.backend.wait(max(0.0, deadline - time.monotonic()))
+                if not self._stop.is_set():
+                    self.callback(sorted(changed))
+            except Exception as e:
+                log_error(f"脚本监视出错: {e}")
+                self._stop.wait(self.interval)
+
+
+class HotReloader:
+    """
+    将变化的自定义脚本增量加载到当前会话
+
+    每个文件对应一个独立的 Frida 脚本（基础函数 + 引用到的公共函数 + 文件内容），
+    文件再次变化时先卸载旧脚本再加载新脚本；文件删除时卸载并移除其函数
+    """
+
+    def __init__(self, session, custom_manager, on_reloaded: Optional[Callable[[], None]] = None):
+        self.session = session
+        self.manager = custom_manager
+        self.on_reloaded = on_reloaded
+        self.scripts = {}  # type: Dict[str, object]
+        self.functions = {}  # type: Dict[str, str]
+        self.watcher = None  # type: Optional[ScriptWatcher]
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.watcher is not None and self.watcher.running
+
+    def start(self) -> bool:
+        """开始监视脚本目录"""
+        if self.running:
+            return True
+        if not self.session.target_process or not self.session.script_engine:
+            log_error("❌ 会话或任务管理器未就绪，无法开启热重载")
+            return False
+        self.watcher = ScriptWatcher(self.manager.scripts_dirs, self._on_changes)
+        self.watcher.start()
+        log_success(f"♻️ 脚本热重载已开启 ({self.watcher.backend.name}): {', '.join(self.watcher.roots)}")
+        return True
+
+    def stop(self, unload: bool = True):
+        """停止监视；unload 时同时卸载已热加载的脚本"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if unload:
+            with self._lock:
+                for script in self.scripts.values():
+                    self._unload(script)
+                self.scripts.clear()
+                self.functions.clear()
+
+    def handles(self, func_name: str) -> bool:
+        """函数是否由热加载脚本提供"""
+        return func_name in self.functions
+
+    def call(self, func_name: str, js_code: str):
+        """在提供该函数的热加载脚本中执行代码"""
+        script = self.scripts.get(self.functions.get(func_name, ''))
+        if script is None:
+            raise KeyError(func_name)
+        return script.exports.eval(js_code)
+
+    def status(self) -> List[str]:
+        """已热加载的脚本及其函数"""
+        lines = []
+        with self._lock:
+            for path in sorted(self.scripts):
+                names = sorted(name for name, owner in self.functions.items() if owner == path)
+                lines.append(f"{path}: {', '.join(names) or '-'}")
+        return lines
+
+    def _on_changes(self, paths: List[str]):
+        reloaded = False
+        for path in paths:
+            try:
+                reloaded = self.reload_file(path) or reloaded
+            except Exception as e:
+                log_error(f"❌ 热重载失败 {os.path.basename(path)}: {e}")
+        if reloaded and self.on_reloaded:
+            try:
+                self.on_reloaded()
+            except Exception as e:
+                log_debug(f"热重载回调失败: {e}")
+
+    def reload_file(self, path: str) -> bool:
+        """
+        重新解析并加载单个脚本文件
+
+        Returns:
+            函数表是否发生变化
+        """
+        start = time.perf_counter()
+        label = os.path.basename(path)
+        with self._lock:
+            if not os.path.exists(path):
+                had_script = self._drop(path)
+                self.manager.remove_file(path)
+                if had_script:
+                    log_info(f"🗑️ 已卸载热重载脚本: {label}")
+                return had_script
+
+            script_info = self.manager.reload_file(path)
+            self._drop(path)
+            if script_info is None:
+                log_warning(f"⚠️ {label} 中未找到可用函数，已卸载旧版本")
+                return True
+
+            # 复用解析时生成的源码（已去除 JSDoc），与主脚本导入保持一致
+            source = script_info.import_code
+            if source is None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    source = f.read()
+            script_source = build_hot_reload_script(source, self.session.script_engine.base_functions, label)
+            script = self.session.target_process.create_script(script_source, name=f"fridac-hot-{label}")
+            script.on('message', functools.partial(self._on_message, script))
+            script.load()
+
+            self.scripts[path] = script
+            for name in script_info.functions:
+                self.functions[name] = path
+        log_success(f"♻️ 已热重载 {label}: {', '.join(script_info.functions)} "
+                    f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return True
+
+    def _on_message(self, script, message, data):
+        """热重载脚本的消息：模块请求回复到该脚本，其余交给会话统一处理"""
+        payload = message.get('payload') if message.get('type') == 'send' else None
+        if isinstance(payload, dict) and payload.get('type') == LAZY_MODULE_REQUEST:
+            self.session._on_module_request(payload, data, None, script=script)
+            return
+        self.session.on_message(message, data)
+
+    def _drop(self, path: str) -> bool:
+        """卸载文件对应的旧脚本（其 Hook 随之撤销）"""
+        script = self.scripts.pop(path, None)
+        for name in [name for name, owner in self.functions.items() if owner == path]:
+            del self.functions[name]
+        if script is None:
+            return False
+        self._unload(script)
+        return True
+
+    @staticmethod
+    def _unload(script):
+        try:
+            script.unload()
+        except Exception as e:
+            log_debug(f"卸载热重载脚本失败: {e}")
@@ -0,0 +1,308 @@
+"""
+fridac JavaScript 轻量扫描模块
+单遍切分 JS 源码为 代码 / 字符串 / 模板字符串 / 正则 / 注释 片段，
+供脚本包精简（去注释与空白、裁剪未引用的顶层函数）与自定义脚本解析（顶层函数 + JSDoc、
+生成导入代码）复用；不是完整的 JS 解析器
+"""
+
+import bisect
+import re
+from typing import Iterator, List, NamedTuple, Tuple
+
+CODE = 'code'
+STRING = 'string'
+TEMPLATE = 'template'
+REGEX = 'regex'
+LINE_COMMENT = 'line_comment'
+BLOCK_COMMENT = 'block_comment'
+
+COMMENTS = (LINE_COMMENT, BLOCK_COMMENT)
+
+# 其后出现的 / 为正则字面量而非除号
+_REGEX_PRECEDING_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PRECEDING_WORDS = {
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+    'void', 'throw', 'instanceof', 'yield', 'await',
+}
+
+_WORD_TAIL_RE = re.compile(r'([A-Za-z_$][\w$]*)\s*$')
+_ASYNC_TAIL_RE = re.compile(r'(?<![\w$])async[ \t]+$')
+_FUNCTION_DECL_RE = re.compile(r'function\s*\*?\s*([A-Za-z_$][\w$]*)\s*\(')
+
+Token = Tuple[str, int, int]
+
+
+class TopLevelFunction(NamedTuple):
+    """顶层函数声明"""
+    name: str
+    start: int      # 声明起始（function / async 关键字）
+    end: int        # 函数体结束之后的位置
+    params: List[str]
+    doc: str        # 紧邻声明之前的 JSDoc（含 /** */），没有时为空串
+
+
+def _skip_quoted(source: str, i: int, quote: str) -> int:
+    """跳过 '...' / "..."，返回结束引号之后的位置"""
+    n = len(source)
+    i += 1
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote or ch == '\n':
+            return i + 1
+        i += 1
+    return n
+
+
+def _skip_template(source: str, i: int) -> int:
+    """跳过模板字符串（含嵌套的 ${...} 表达式），返回结束反引号之后的位置"""
+    n = len(source)
+    i += 1
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '`':
+            return i + 1
+        if ch == '$' and i + 1 < n and source[i + 1] == '{':
+            i = _skip_expression(source, i + 2)
+            continue
+        i += 1
+    return n
+
+
+def _skip_expression(source: str, i: int) -> int:
+    """跳过 ${...} 内的表达式直到匹配的 }"""
+    n = len(source)
+    depth = 1
+    while i < n:
+        ch = source[i]
+        if ch in '\'"':
+            i = _skip_quoted(source, i, ch)
+            continue
+        if ch == '`':
+            i = _skip_template(source, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _skip_regex(source: str, i: int) -> int:
+    """跳过正则字面量（含字符类与标志），返回其后位置"""
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '\n':
+            return i
+        if in_class:
+            if ch == ']':
+                in_class = False
+        elif ch == '[':
+            in_class = True
+        elif ch == '/':
+            i += 1
+            while i < n and (source[i].isalnum() or source[i] in '_$'):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def _regex_allowed(source: str, code_start: int, i: int, last_significant: str) -> bool:
+    """根据 / 之前最近的有效字符判断是否为正则"""
+    if not last_significant:
+        return True
+    if last_significant in _REGEX_PRECEDING_CHARS:
+        return True
+    if last_significant.isalnum() or last_significant in '_$':
+        match = _WORD_TAIL_RE.search(source, code_start, i)
+        return bool(match) and match.group(1) in _REGEX_PRECEDING_WORDS
+    return False
+
+
+def iter_tokens(source: str) -> Iterator[Token]:
+    """
+    单遍切分源码
+
+    Yields:
+        (类型, 起始, 结束)，类型为 CODE / STRING / TEMPLATE / REGEX / LINE_COMMENT / BLOCK_COMMENT，
+        片段首尾相接覆盖全文
+    """
+    n = len(source)
+    code_start = 0
+    last_significant = ''
+    i = 0
+    while i < n:
+        ch = source[i]
+        kind = None
+        if ch in '\'"':
+            kind, end = STRING, _skip_quoted(source, i, ch)
+        elif ch == '`':
+            kind, end = TEMPLATE, _skip_template(source, i)
+        elif ch == '/' and i + 1 < n and source[i + 1] == '/':
+            newline = source.find('\n', i)
+            kind, end = LINE_COMMENT, (n if newline == -1 else newline)
+        elif ch == '/' and i + 1 < n and source[i + 1] == '*':
+            close = source.find('*/', i + 2)
+            kind, end = BLOCK_COMMENT, (n if close == -1 else close + 2)
+        elif ch == '/' and _regex_allowed(source, code_start, i, last_significant):
+            kind, end = REGEX, _skip_regex(source, i)
+
+        if kind is None:
+            if not ch.isspace():
+                last_significant = ch
+            i += 1
+            continue
+
+        if code_start < i:
+            yield CODE, code_start, i
+        yield kind, i, end
+        if kind not in COMMENTS:
+            # 字符串 / 正则之后的 / 视为除号
+            last_significant = 'a'
+        code_start = i = end
+    if code_start < n:
+        yield CODE, code_start, n
+
+
+def iter_top_level_functions(source: str, tokens: List[Token] = None) -> Iterator[Tuple[str, int, int]]:
+    """
+    找出顶层（大括号深度为 0）的 function 声明
+
+    Yields:
+        (函数名, 声明起始, 函数体结束之后的位置)
+    """
+    if tokens is None:
+        tokens = list(iter_tokens(source))
+    depth = 0
+    pending = None  # (name, start)，等待函数体的左大括号
+    body_depth = 0
+    for kind, start, end in tokens:
+        if kind != CODE:
+            continue
+        i = start
+        while i < end:
+            ch = source[i]
+            if pending is None and depth == 0 and ch == 'f':
+                match = _FUNCTION_DECL_RE.match(source, i, end)
+                if match:
+                    decl_start = _declaration_start(source, start, i)
+                    if decl_start is not None:
+                        pending = (match.group(1), decl_start)
+                        i = match.end()
+                        continue
+            if ch == '{':
+                depth += 1
+                if pending is not None and body_depth == 0:
+                    body_depth = depth
+            elif ch == '}':
+                if pending is not None and depth == body_depth:
+                    yield pending[0], pending[1], i + 1
+                    pending = None
+                    body_depth = 0
+                depth = max(0, depth - 1)
+            i += 1
+
+
+def _declaration_start(source: str, code_start: int, i: int):
+    """function 关键字（或其前的 async）位于语句开头时返回声明起始位置，否则返回 None"""
+    async_match = _ASYNC_TAIL_RE.search(source, code_start, i)
+    if async_match:
+        i = async_match.start()
+    return i if _at_statement_start(source, code_start, i) else None
+
+
+def _at_statement_start(source: str, code_start: int, i: int) -> bool:
+    """位置 i 位于语句开头（前面为文件开头、换行、; 或 }）"""
+    j = i - 1
+    while j >= code_start and source[j] in ' \t':
+        j -= 1
+    if j < code_start:
+        # 片段开头：之前是注释或文件开头
+        return True
+    return source[j] in '\n;}'
+
+
+def _split_params(source: str, open_paren: int) -> List[str]:
+    """读取 ( 之后到匹配的 ) 之间的参数名列表"""
+    depth = 1
+    i = open_paren
+    n = len(source)
+    while i < n and depth:
+        ch = source[i]
+        if ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+        i += 1
+    text = source[open_paren:i - 1].strip()
+    return [param.strip() for param in text.split(',')] if text else []
+
+
+def iter_top_level_functions_with_doc(source: str, tokens: List[Token] = None) -> Iterator[TopLevelFunction]:
+    """
+    找出顶层 function 声明及其参数与紧邻的 JSDoc（与 iter_top_level_functions 共用一次切分）
+    """
+    if tokens is None:
+        tokens = list(iter_tokens(source))
+    docs = [(start, end) for kind, start, end in tokens
+            if kind == BLOCK_COMMENT and source.startswith('/**', start) and end - start > 4]
+    doc_ends = [end for _, end in docs]
+    for name, start, end in iter_top_level_functions(source, tokens):
+        doc = ''
+        index = bisect.bisect_right(doc_ends, start) - 1
+        if index >= 0 and not source[docs[index][1]:start].strip():
+            doc = source[docs[index][0]:docs[index][1]]
+        match = _FUNCTION_DECL_RE.search(source, start, end)
+        params = _split_params(source, match.end()) if match else []
+        yield TopLevelFunction(name, start, end, params, doc)
+
+
+def strip_jsdoc(source: str, tokens: List[Token] = None) -> str:
+    """去除 JSDoc 注释（/** ... */），字符串与模板中的同形文本保持不变"""
+    if tokens is None:
+        tokens = list(iter_tokens(source))
+    return ''.join(source[start:end] for kind, start, end in tokens
+                   if not (kind == BLOCK_COMMENT and source.startswith('/**', start) and end - start > 4))
+
+
+def minify(source: str, tokens: List[Token] = None) -> str:
+    """
+    去除注释与多余空白（保留换行以免触发自动分号插入差异，字符串/模板/正则原样保留）
+    """
+    if tokens is None:
+        tokens = list(iter_tokens(source))
+    out = []
+    for kind, start, end in tokens:
+        if kind == LINE_COMMENT:
+            continue
+        if kind == BLOCK_COMMENT:
+            out.append('\n' if '\n' in source[start:end] else ' ')
+            continue
+        if kind != CODE:
+            out.append(source[start:end])
+            continue
+        lines = re.sub(r'[ \t]+', ' ', source[start:end]).split('\n')
+        pieces = [lines[0].rstrip() if len(lines) > 1 else lines[0]]
+        for line in lines[1:-1]:
+            line = line.strip()
+            if line:
+                pieces.append(line)
+        if len(lines) > 1:
+            pieces.append(lines[-1].lstrip())
+        out.append('\n'.join(pieces))
+    return ''.join(out)
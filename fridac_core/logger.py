@@ -207,6 +207,12 @@ def render_structured_event(payload, task_id=None):
             'net_accept': ('🤝', 'green'),
             'net_sendmsg': ('📤', 'white'),
             'net_recvmsg': ('📥', 'white'),
+            'net_send_data': ('📦', 'white'),
+            'net_recv_data': ('📦', 'white'),
+            'tls_data': ('🔐', 'white'),
+            'bio_data': ('🔐', 'white'),
+            'crypto_data': ('📦', 'magenta'),
+            'crypto_key': ('🔑', 'magenta'),
             'task_hit': ('🎯', 'green'),
             'task_error': ('❌', 'red'),
             'event': ('🔔', 'white'),
@@ -260,3 +266,53 @@ def render_structured_event(payload, task_id=None):
                 print(str(body))
     except Exception as e:
         log_error(f"结构化事件渲染失败: {e}")
+
+
+def render_text_message(text, task_id=None):
+    """
+    渲染来自 JS 的普通文本日志（LOG 输出），按前缀图标着色
+    Args:
+        text (str): 日志文本
+        task_id (int|str|None): 可选的任务ID，用于展示前缀
+    """
+    prefix = f"[#${task_id}] " if task_id is not None else ""
+    if RICH_AVAILABLE and console is not None:
+        try:
+            style = None
+            if text.startswith('✅') or text.startswith('🟢'):
+                style = 'green'
+            elif text.startswith('❌') or text.startswith('🔴'):
+                style = 'red'
+            elif text.startswith('⚠️') or text.startswith('🟡'):
+                style = 'yellow'
+            elif text.startswith('🔍') or text.startswith('📚') or text.startswith('🌐'):
+                style = 'cyan'
+            elif text.startswith('🔧') or text.startswith('🎯'):
+                style = 'bright_white'
+            console.print(Text(f"{prefix}{text}", style=style or 'white'))
+            return
+        except Exception:
+            pass
+    print(f"{prefix}{text}")
+
+
+def render_binary_event(payload, binary, task_id=None):
+    """
+    渲染携带原始字节的事件（send 的 data 通道）
+    头部沿用结构化事件渲染，hexdump 在此处才生成
+    Args:
+        payload (dict): 事件元数据
+        binary (BinaryPayload): 原始字节封装
+        task_id (int|str|None): 可选的任务ID
+    """
+    render_structured_event(payload, task_id)
+    try:
+        dump = binary.hexdump()
+        if not dump:
+            return
+        if RICH_AVAILABLE and console is not None:
+            console.print(Text(dump, style='dim'))
+        else:
+            print(dump)
+    except Exception as e:
+        log_error(f"hexdump 渲染失败: {e}")
@@ -0,0 +1,245 @@
+"""
+fridac 输出落盘模块
+为 -o 输出提供大缓冲写入、按时间/大小刷新、按大小/时间轮转以及可选的 gzip/zstd 流式压缩
+"""
+
+import gzip
+import io
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from .logger import log_info, log_error
+
+# zstd 为可选依赖，缺失时仅 gzip 可用
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+COMPRESSION_SUFFIX = {
+    None: '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024      # 1MB 写缓冲
+DEFAULT_FLUSH_INTERVAL = 1.0           # 最长 1 秒落盘一次
+DEFAULT_FLUSH_BYTES = 256 * 1024       # 或累计 256KB 即刷新
+
+
+def parse_size(value) -> int:
+    """解析大小参数：支持 K/M/G 后缀（如 100M），0/空表示不限制"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, int):
+        return max(0, value)
+    text = str(value).strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    try:
+        if text and text[-1] in units:
+            return max(0, int(float(text[:-1]) * units[text[-1]]))
+        return max(0, int(text))
+    except ValueError:
+        raise ValueError(f"无效的大小: {value}")
+
+
+def parse_duration(value) -> float:
+    """解析时长参数：支持 s/m/h/d 后缀（如 30m），0/空表示不限制"""
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, (int, float)):
+        return max(0.0, float(value))
+    text = str(value).strip().lower()
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    try:
+        if text and text[-1] in units:
+            return max(0.0, float(text[:-1]) * units[text[-1]])
+        return max(0.0, float(text))
+    except ValueError:
+        raise ValueError(f"无效的时长: {value}")
+
+
+class OutputSink:
+    """
+    带缓冲的输出文件
+
+    - 写入只进入内存缓冲，由大小阈值或后台定时器触发 flush
+    - 达到 rotate_bytes（按未压缩字节计）或 rotate_seconds 时轮转：
+      当前文件重命名为 <name>.<YYYYmmdd_HHMMSS><ext>，再打开新文件
+    - compression 为 'gzip' / 'zstd' 时流式压缩，文件名自动追加 .gz / .zst
+    - binary=True 时 write() 接收 bytes（用于长度前缀的二进制事件流）
+    """
+
+    def __init__(self, path: str, append_mode: bool = False,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 rotate_bytes: int = 0, rotate_seconds: float = 0.0,
+                 compression: Optional[str] = None, binary: bool = False):
+        if compression not in COMPRESSION_SUFFIX:
+            raise ValueError(f"不支持的压缩格式: {compression}")
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            raise ValueError("zstd 压缩需要安装 zstandard: pip install zstandard")
+
+        suffix = COMPRESSION_SUFFIX[compression]
+        path = os.path.abspath(path)
+        self.path = path if not suffix or path.endswith(suffix) else path + suffix
+        self.append_mode = append_mode
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compression = compression
+        self.binary = binary
+
+        self._lock = threading.RLock()
+        self._raw = None
+        self._stream = None
+        self._pending = 0
+        self._file_bytes = 0
+        self._opened_at = 0.0
+        self._ts_second = None
+        self._ts_prefix = ''
+        self._closed = False
+        self.rotations = 0
+        self.lines = 0
+
+        output_dir = os.path.dirname(self.path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        self._open(append_mode)
+
+        self._stop_event = threading.Event()
+        self._flusher = None
+        if flush_interval and flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='fridac-output-flush', daemon=True)
+            self._flusher.start()
+
+    # ===== 文件管理 =====
+
+    def _open(self, append_mode: bool):
+        mode = 'ab' if append_mode else 'wb'
+        self._raw = open(self.path, mode, buffering=self.buffer_size)
+        if self.compression == 'gzip':
+            layer = gzip.GzipFile(fileobj=self._raw, mode=mode)
+        elif self.compression == 'zstd':
+            layer = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            layer = self._raw
+        if self.binary:
+            self._stream = layer
+        else:
+            self._stream = io.TextIOWrapper(layer, encoding='utf-8', write_through=False)
+        self._file_bytes = os.path.getsize(self.path) if append_mode and not self.compression else 0
+        self._opened_at = time.time()
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.flush()
+            # 先结束压缩流再关闭底层文件
+            self._stream.close()
+            if self._raw is not self._stream:
+                self._raw.close()
+        finally:
+            self._stream = None
+            self._raw = None
+
+    def _rotated_path(self) -> str:
+        suffix = COMPRESSION_SUFFIX[self.compression]
+        base = self.path[:-len(suffix)] if suffix else self.path
+        stem, ext = os.path.splitext(base)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        candidate = f"{stem}.{stamp}{ext}{suffix}"
+        index = 1
+        while os.path.exists(candidate):
+            candidate = f"{stem}.{stamp}_{index}{ext}{suffix}"
+            index += 1
+        return candidate
+
+    def _maybe_rotate(self):
+        now = time.time()
+        due = (self.rotate_bytes and self._file_bytes >= self.rotate_bytes) or \
+              (self.rotate_seconds and now - self._opened_at >= self.rotate_seconds)
+        if not due:
+            return
+        self._close_stream()
+        rotated = self._rotated_path()
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        self._open(False)
+        log_info(f"📁 输出文件已轮转: {rotated}")
+
+    # ===== 写入 =====
+
+    def _timestamp(self) -> str:
+        """毫秒时间戳；秒级部分按秒缓存，避免逐行 strftime"""
+        now = time.time()
+        second = int(now)
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_prefix = time.strftime('%H:%M:%S', time.localtime(second))
+        return f"{self._ts_prefix}.{int((now - second) * 1000):03d}"
+
+    def write(self, text):
+        """写入原始文本（binary 模式下为 bytes，不加时间戳）"""
+        with self._lock:
+            if self._stream is None:
+                return
+            self._stream.write(text)
+            # 轮转与刷新阈值按 UTF-8 字节计（中文字符占 3 字节）
+            size = len(text) if self.binary else len(text.encode('utf-8'))
+            self._pending += size
+            self._file_bytes += size
+            if self.flush_bytes and self._pending >= self.flush_bytes:
+                self._flush_locked()
+            self._maybe_rotate()
+
+    def write_line(self, content: str):
+        """写入一行日志：[HH:MM:SS.mmm] content"""
+        with self._lock:
+            self.lines += 1
+            self.write(f"[{self._timestamp()}] {content}\n")
+
+    def _flush_locked(self):
+        if self._stream is None:
+            return
+        # flush 会级联到压缩层（gzip 同步刷新 / zstd 结束当前块）
+        self._stream.flush()
+        if self._raw is not self._stream:
+            self._raw.flush()
+        self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                with self._lock:
+                    if self._pending:
+                        self._flush_locked()
+                    if self.rotate_seconds:
+                        self._maybe_rotate()
+            except Exception as e:
+                log_error(f"输出文件刷新失败: {e}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        with self._lock:
+            self._close_stream()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
@@ -0,0 +1,133 @@
+"""
+fridac 自定义脚本解析缓存模块
+将 CustomScriptManager 解析出的函数元数据与注入用源码持久化到 ~/.fridac/cache/scripts-parse.json，
+以 (路径, 大小, mtime) 判断文件未变化时直接复用，mtime 变化但内容哈希相同（如 touch、
+checkout）时同样复用，只有内容真正变化的脚本才重新解析
+
+解析器（esprima / 正则）不同时结果不同，缓存按解析器区分
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .bundle_cache import cache_enabled, get_cache_dir
+from .logger import log_debug
+
+# 解析逻辑或缓存格式变化时递增，使旧缓存失效
+PARSE_CACHE_VERSION = 2
+
+PARSE_CACHE_FILE = 'scripts-parse.json'
+
+
+def content_digest(content: str) -> str:
+    """脚本内容哈希"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class ScriptParseCache:
+    """脚本函数元数据的磁盘缓存（首次查询时读取，save() 时原子写回）"""
+
+    def __init__(self, parser: str, path: Optional[str] = None):
+        """
+        Args:
+            parser: 解析器标识（esprima / regex），不一致的缓存整体作废
+            path: 缓存文件路径（默认位于 get_cache_dir()）
+        """
+        self.parser = parser
+        self.path = path or os.path.join(get_cache_dir(), PARSE_CACHE_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._entries = None  # type: Optional[Dict[str, Dict[str, Any]]]
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if (data.get('version') == PARSE_CACHE_VERSION and data.get('parser') == self.parser
+                        and isinstance(data.get('entries'), dict)):
+                    entries = data['entries']
+            except (OSError, ValueError, AttributeError):
+                pass
+            self._entries = entries
+        return self._entries
+
+    def lookup(self, file_path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        """按 (路径, 大小, mtime) 查找，命中时无需读取文件"""
+        with self._lock:
+            entry = self._load().get(os.path.abspath(file_path))
+            if entry and entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns:
+                self.hits += 1
+                return entry
+        return None
+
+    def lookup_content(self, file_path: str, st: os.stat_result, digest: str) -> Optional[Dict[str, Any]]:
+        """mtime 变化时按内容哈希查找，命中则刷新记录的 mtime，否则计为未命中"""
+        with self._lock:
+            entry = self._load().get(os.path.abspath(file_path))
+            if entry and entry.get('sha256') == digest:
+                entry['size'] = st.st_size
+                entry['mtime_ns'] = st.st_mtime_ns
+                self._dirty = True
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return None
+
+    def store(self, file_path: str, st: os.stat_result, digest: str, functions: List[Dict[str, Any]],
+              import_code: str):
+        """
+        记录一个脚本的解析结果
+
+        Args:
+            functions: CustomFunction 字段字典列表（可为空）
+            import_code: 去除 JSDoc 后的脚本源码
+        """
+        with self._lock:
+            self._load()[os.path.abspath(file_path)] = {
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'sha256': digest,
+                'functions': functions,
+                'import_code': import_code,
+            }
+            self._dirty = True
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def save(self):
+        """写回缓存（丢弃已不存在的脚本；无变化或写入失败时静默跳过）"""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            entries = {path: entry for path, entry in self._entries.items() if os.path.exists(path)}
+            data = {'version': PARSE_CACHE_VERSION, 'parser': self.parser, 'entries': entries}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._entries = entries
+                self._dirty = False
+            except OSError as e:
+                log_debug(f"写入脚本解析缓存失败: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+def open_parse_cache(parser: str) -> Optional[ScriptParseCache]:
+    """创建解析缓存（FRIDAC_NO_CACHE=1 时返回 None）"""
+    if not cache_enabled():
+        return None
+    return ScriptParseCache(parser)
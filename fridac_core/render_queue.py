@@ -0,0 +1,318 @@
+"""
+fridac 渲染队列模块
+在 Frida 消息线程与控制台渲染之间加入有界队列，由独立线程消费，
+避免终端渲染变慢时反压到 Agent 的 send 队列并卡住被 Hook 的应用线程
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from .logger import log_info, log_error, render_text_message
+from .coalesce import Coalescer, MODE_OFF, MODES as COALESCE_MODES, DEFAULT_FLUSH_INTERVAL as DEFAULT_COALESCE_INTERVAL
+
+# 溢出策略
+POLICY_BLOCK = 'block'              # 队列满时阻塞消息线程（最多 block_timeout 秒，超时丢弃新事件）
+POLICY_DROP_OLDEST = 'drop-oldest'  # 丢弃最旧事件，保证看到最新输出
+POLICY_DROP_NEWEST = 'drop-newest'  # 丢弃新到达事件，保证输出连续
+POLICY_SAMPLE = 'sample'            # 溢出期间每 N 条保留 1 条（替换最旧事件）
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_SAMPLE)
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_POLICY = POLICY_DROP_OLDEST
+DEFAULT_SAMPLE_RATE = 10
+DEFAULT_BLOCK_TIMEOUT = 1.0
+
+
+class RenderQueue:
+    """
+    有界渲染队列
+
+    submit() 在消息线程调用，只做入队；渲染函数在后台消费线程中执行。
+    max_size 为 0 时退化为同步渲染（与旧行为一致）。
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, policy: str = DEFAULT_POLICY,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE, block_timeout: float = DEFAULT_BLOCK_TIMEOUT,
+                 coalesce: str = MODE_OFF, coalesce_interval: float = DEFAULT_COALESCE_INTERVAL):
+        self.max_size = max(0, int(max_size))
+        self.policy = policy if policy in POLICIES else DEFAULT_POLICY
+        self.sample_rate = max(1, int(sample_rate))
+        self.block_timeout = block_timeout
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._stopping = False
+        self._inflight = 0
+        self._overflow_seq = 0
+        self._reset_counters()
+
+        # headless 模式：不渲染，只按渲染函数计数
+        self.headless = False
+        self._suppressed = {}  # type: Dict[str, int]
+
+        # 连续重复消息合并（在入队前完成，重复消息不占用队列容量）
+        self.coalescer = Coalescer(self._enqueue, render_text_message, coalesce, coalesce_interval)
+
+    def _reset_counters(self):
+        self.submitted = 0
+        self.rendered = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.dropped_sampled = 0
+        self.block_timeouts = 0
+        self.errors = 0
+        self.high_watermark = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_oldest + self.dropped_newest + self.dropped_sampled
+
+    def configure(self, policy: Optional[str] = None, max_size: Optional[int] = None,
+                  sample_rate: Optional[int] = None) -> bool:
+        """运行时调整策略/容量"""
+        if policy is not None and policy not in POLICIES:
+            return False
+        with self._cond:
+            if policy is not None:
+                self.policy = policy
+            if max_size is not None:
+                self.max_size = max(0, int(max_size))
+            if sample_rate is not None:
+                self.sample_rate = max(1, int(sample_rate))
+            self._cond.notify_all()
+        return True
+
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        """
+        提交一个渲染任务
+
+        Returns:
+            True 表示已入队（或已同步渲染/已合并/headless 计数），False 表示被策略丢弃
+        """
+        if self.headless:
+            name = getattr(func, '__name__', 'other')
+            # 只有消息线程写入，无需加锁
+            self._suppressed[name] = self._suppressed.get(name, 0) + 1
+            return True
+        if self.coalescer.enabled and self.coalescer.offer(func, args, kwargs):
+            return True
+        return self._enqueue(func, *args, **kwargs)
+
+    def _enqueue(self, func: Callable, *args, **kwargs) -> bool:
+        if self.max_size <= 0:
+            with self._cond:
+                self.submitted += 1
+            self._invoke(func, args, kwargs)
+            return True
+
+        with self._cond:
+            self.submitted += 1
+            if len(self._queue) >= self.max_size:
+                if not self._make_room():
+                    return False
+            else:
+                self._overflow_seq = 0
+            self._queue.append((func, args, kwargs))
+            if len(self._queue) > self.high_watermark:
+                self.high_watermark = len(self._queue)
+            self._cond.notify_all()
+
+        self._ensure_thread()
+        return True
+
+    def _make_room(self) -> bool:
+        """队列已满时按策略腾出位置（调用方持有锁）；返回 False 表示丢弃当前事件"""
+        if self.policy == POLICY_BLOCK:
+            self._ensure_thread()
+            if self._cond.wait_for(lambda: len(self._queue) < self.max_size or self._stopping,
+                                   timeout=self.block_timeout):
+                return not self._stopping
+            self.block_timeouts += 1
+            self.dropped_newest += 1
+            return False
+        if self.policy == POLICY_DROP_NEWEST:
+            self.dropped_newest += 1
+            return False
+        if self.policy == POLICY_SAMPLE:
+            self._overflow_seq += 1
+            if self._overflow_seq % self.sample_rate != 0:
+                self.dropped_sampled += 1
+                return False
+        # drop-oldest，以及 sample 命中的那一条
+        self._queue.popleft()
+        self.dropped_oldest += 1
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='fridac-render', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                func, args, kwargs = self._queue.popleft()
+                self._inflight += 1
+                # 唤醒 block 策略下等待空位的消息线程
+                self._cond.notify_all()
+            try:
+                self._invoke(func, args, kwargs)
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+                    self._cond.notify_all()
+
+    def _invoke(self, func, args, kwargs):
+        """执行渲染（不持有锁），计数在锁内更新以免与 stats() / reset_stats() 竞争"""
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            with self._cond:
+                self.errors += 1
+        else:
+            with self._cond:
+                self.rendered += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已入队事件全部渲染完成（先输出尚未显示的重复计数）"""
+        self.coalescer.flush()
+        if self._thread is None:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and self._inflight == 0, timeout=timeout)
+
+    def stop(self, timeout: float = 2.0):
+        """排空队列并停止消费线程（超时后剩余事件直接丢弃）"""
+        self.coalescer.stop()
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        with self._cond:
+            if self._queue:
+                self.dropped_oldest += len(self._queue)
+                self._queue.clear()
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """获取渲染计数"""
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            'policy': self.policy,
+            'max_size': self.max_size,
+            'sample_rate': self.sample_rate,
+            'queued': queued,
+            'high_watermark': self.high_watermark,
+            'submitted': self.submitted,
+            'rendered': self.rendered,
+            'dropped': self.dropped,
+            'dropped_oldest': self.dropped_oldest,
+            'dropped_newest': self.dropped_newest,
+            'dropped_sampled': self.dropped_sampled,
+            'block_timeouts': self.block_timeouts,
+            'errors': self.errors,
+            'coalesce': self.coalescer.mode,
+            'coalesced': self.coalescer.coalesced,
+        }
+
+    def reset_stats(self):
+        """清零计数（不影响队列中的事件）"""
+        with self._cond:
+            self._reset_counters()
+        self.coalescer.coalesced = 0
+
+    def set_headless(self, enabled: bool = True):
+        """开启/关闭 headless 模式（开启前先排空已入队的渲染）"""
+        if enabled:
+            self.flush(timeout=self.block_timeout)
+        self.headless = enabled
+
+    def suppressed_counts(self) -> Dict[str, int]:
+        """headless 模式下各渲染函数被跳过的次数"""
+        return dict(self._suppressed)
+
+    def show_stats(self):
+        """显示渲染队列统计"""
+        stats = self.stats()
+        mode = '同步渲染' if stats['max_size'] <= 0 else f"{stats['policy']} (容量 {stats['max_size']})"
+        log_info("\n🖥️  渲染队列统计")
+        log_info("=" * 40)
+        log_info(f"策略: {mode}")
+        if stats['policy'] == POLICY_SAMPLE:
+            log_info(f"采样率: 1/{stats['sample_rate']}")
+        log_info(f"当前排队: {stats['queued']} (峰值 {stats['high_watermark']})")
+        log_info(f"已提交: {stats['submitted']}")
+        log_info(f"已渲染: {stats['rendered']}")
+        log_info(f"已丢弃: {stats['dropped']} "
+                 f"(旧 {stats['dropped_oldest']} / 新 {stats['dropped_newest']} / 采样 {stats['dropped_sampled']})")
+        if stats['block_timeouts']:
+            log_info(f"阻塞超时: {stats['block_timeouts']}")
+        if stats['errors']:
+            log_info(f"渲染异常: {stats['errors']}")
+        log_info(f"重复合并: {stats['coalesce']} (已合并 {stats['coalesced']})")
+
+
+def _read_env(name: str, default, cast=int):
+    value = os.environ.get(name, '')
+    if value == '':
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        return default
+
+
+_render_queue = None  # type: Optional[RenderQueue]
+_render_queue_lock = threading.Lock()
+
+
+def get_render_queue() -> RenderQueue:
+    """
+    获取全局渲染队列
+
+    环境变量：
+        FRIDAC_RENDER_QUEUE: 队列容量，0 表示同步渲染
+        FRIDAC_RENDER_POLICY: block / drop-oldest / drop-newest / sample
+        FRIDAC_RENDER_SAMPLE: sample 策略的采样间隔 N
+        FRIDAC_COALESCE: 重复消息合并 off / exact / template
+        FRIDAC_COALESCE_MS: 重复计数刷新间隔（毫秒）
+        FRIDAC_HEADLESS: 为 1 时不做任何控制台渲染
+    """
+    global _render_queue
+    if _render_queue is None:
+        with _render_queue_lock:
+            if _render_queue is None:
+                policy = os.environ.get('FRIDAC_RENDER_POLICY', DEFAULT_POLICY)
+                if policy not in POLICIES:
+                    log_error(f"未知的渲染策略: {policy}，使用 {DEFAULT_POLICY}")
+                    policy = DEFAULT_POLICY
+                coalesce = os.environ.get('FRIDAC_COALESCE', '') or MODE_OFF
+                if coalesce not in COALESCE_MODES:
+                    log_error(f"未知的合并模式: {coalesce}，已关闭合并")
+                    coalesce = MODE_OFF
+                _render_queue = RenderQueue(
+                    max_size=_read_env('FRIDAC_RENDER_QUEUE', DEFAULT_MAX_SIZE),
+                    policy=policy,
+                    sample_rate=_read_env('FRIDAC_RENDER_SAMPLE', DEFAULT_SAMPLE_RATE),
+                    coalesce=coalesce,
+                    coalesce_interval=_read_env('FRIDAC_COALESCE_MS', DEFAULT_COALESCE_INTERVAL * 1000) / 1000.0,
+                )
+                if os.environ.get('FRIDAC_HEADLESS') == '1':
+                    _render_queue.headless = True
+    return _render_queue
@@ -0,0 +1,189 @@
+"""
+fridac 事件回放模块
+将 --events 记录的事件日志重新送入宿主端渲染流程，无需重新连接设备
+
+用法:
+    fridac replay events.jsonl                 # 按原始节奏回放
+    fridac replay events.jsonl --speed 10x     # 10 倍速
+    fridac replay events.jsonl --speed max     # 不等待，尽快渲染（用于渲染性能基准）
+    fridac replay events.jsonl --type net_send,net_recv --task 3
+"""
+
+import argparse
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from .logger import (log_info, log_success, log_error, render_structured_event,
+                     render_binary_event, render_text_message)
+from .hexdump import BinaryPayload
+from .event_log import read_events, record_bytes, FORMATS
+from .render_queue import get_render_queue, POLICIES, POLICY_BLOCK
+
+
+def parse_speed(value: str) -> float:
+    """解析回放速度：1 / 2x / 0.5x 为倍速，max / 0 为不等待"""
+    text = str(value).strip().lower()
+    if text in ('max', 'fast', '0', '0x'):
+        return 0.0
+    if text.endswith('x'):
+        text = text[:-1]
+    speed = float(text)
+    if speed < 0:
+        raise ValueError(f"无效的回放速度: {value}")
+    return speed
+
+
+def _parse_set(value: Optional[str], cast=str) -> Optional[Set[Any]]:
+    if not value:
+        return None
+    return {cast(v.strip()) for v in value.split(',') if v.strip()}
+
+
+def _matches(record: Dict[str, Any], types, task_ids, pids) -> bool:
+    if types is not None and record.get('type') not in types:
+        return False
+    if task_ids is not None and record.get('task_id') not in task_ids:
+        return False
+    if pids is not None and record.get('pid') not in pids:
+        return False
+    return True
+
+
+def _render_record(record: Dict[str, Any]):
+    """按实时会话相同的渲染器展示一条记录"""
+    payload = record.get('payload')
+    task_id = record.get('task_id')
+    data = record_bytes(record)
+    if isinstance(payload, dict):
+        if data is not None:
+            render_binary_event(payload, BinaryPayload(payload, data), task_id=task_id)
+        else:
+            render_structured_event(payload, task_id=task_id)
+    else:
+        render_text_message('' if payload is None else str(payload), task_id=task_id)
+
+
+def replay_events(records: Iterable[Dict[str, Any]], speed: float = 1.0,
+                  types: Optional[Set[str]] = None, task_ids: Optional[Set[int]] = None,
+                  pids: Optional[Set[int]] = None, max_gap: float = 0.0,
+                  limit: int = 0, render: bool = True) -> Dict[str, Any]:
+    """
+    回放事件
+
+    Args:
+        records: 事件记录迭代器（见 event_log.read_events）
+        speed: 倍速，0 表示不等待
+        types / task_ids / pids: 过滤条件（None 表示不过滤）
+        max_gap: 相邻事件最长等待（秒，0 表示不限制）
+        limit: 最多回放条数（0 表示全部）
+        render: False 时只解析不渲染
+
+    Returns:
+        回放统计
+    """
+    render_queue = get_render_queue()
+    matched = 0
+    skipped = 0
+    first_ts = None
+    start = time.time()
+
+    for record in records:
+        if not _matches(record, types, task_ids, pids):
+            skipped += 1
+            continue
+
+        ts = record.get('ts')
+        if speed > 0 and isinstance(ts, (int, float)):
+            if first_ts is None:
+                first_ts = ts
+                start = time.time()
+            # 按事件时间轴计算目标时刻，避免逐条 sleep 累积误差
+            target = (ts - first_ts) / 1000.0 / speed
+            delay = target - (time.time() - start)
+            if max_gap and delay > max_gap:
+                start -= delay - max_gap
+                delay = max_gap
+            if delay > 0:
+                time.sleep(delay)
+
+        if render:
+            render_queue.submit(_render_record, record)
+        matched += 1
+        if limit and matched >= limit:
+            break
+
+    render_queue.flush()
+    elapsed = time.time() - start
+    return {
+        'replayed': matched,
+        'skipped': skipped,
+        'elapsed': elapsed,
+        'rate': matched / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    """fridac replay 入口"""
+    parser = argparse.ArgumentParser(
+        prog='fridac replay',
+        description='回放 --events 记录的结构化事件日志',
+    )
+    parser.add_argument('file', help='事件日志文件 (支持 .gz / .zst)')
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help='日志格式 (默认按扩展名推断)')
+    parser.add_argument('--speed', default='1',
+                        help='回放速度: 1 (实时) / 10x / max (不等待)')
+    parser.add_argument('--max-gap', type=float, default=0.0,
+                        help='相邻事件最长等待秒数 (0 为不限制)')
+    parser.add_argument('--type', dest='types', default=None,
+                        help='只回放指定事件类型 (逗号分隔，文本日志类型为 log)')
+    parser.add_argument('--task', dest='tasks', default=None,
+                        help='只回放指定任务ID (逗号分隔)')
+    parser.add_argument('--pid', dest='pids', default=None,
+                        help='只回放指定进程ID (逗号分隔)')
+    parser.add_argument('--limit', type=int, default=0,
+                        help='最多回放条数')
+    parser.add_argument('--render-policy', choices=POLICIES, default=POLICY_BLOCK,
+                        help='渲染队列策略 (默认 block，保证不丢事件)')
+    parser.add_argument('--no-render', action='store_true',
+                        help='只解析不渲染 (测量读取开销)')
+    args = parser.parse_args(argv)
+
+    try:
+        speed = parse_speed(args.speed)
+        task_ids = _parse_set(args.tasks, int)
+        pids = _parse_set(args.pids, int)
+    except ValueError as e:
+        log_error(f"❌ 参数错误: {e}")
+        return 2
+
+    render_queue = get_render_queue()
+    render_queue.configure(policy=args.render_policy)
+
+    try:
+        stats = replay_events(
+            read_events(args.file, args.format),
+            speed=speed,
+            types=_parse_set(args.types),
+            task_ids=task_ids,
+            pids=pids,
+            max_gap=args.max_gap,
+            limit=args.limit,
+            render=not args.no_render,
+        )
+    except FileNotFoundError:
+        log_error(f"❌ 文件不存在: {args.file}")
+        return 1
+    except KeyboardInterrupt:
+        log_info("回放被用户中断")
+        return 130
+    except Exception as e:
+        log_error(f"❌ 回放失败: {e}")
+        return 1
+    finally:
+        render_queue.stop()
+
+    log_success(f"✅ 回放完成: {stats['replayed']} 条 (过滤 {stats['skipped']} 条), "
+                f"耗时 {stats['elapsed']:.2f}s, {stats['rate']:.0f} 条/秒")
+    render_queue.show_stats()
+    return 0
@@ -3,10 +3,69 @@ fridac Frida脚本管理器模块
 负责JavaScript脚本的加载、创建和管理
 """
 
+import bisect
+import fnmatch
+import json
 import os
+import re
 
 from .logger import log_error, log_debug, log_warning, log_info, log_success
-from .custom_scripts import CustomScriptManager
+from .custom_scripts import CustomScriptManager, get_scripts_dirs
+from .transport import build_batch_prelude
+from . import bundle_cache
+from . import js_tokens
+from .startup_profile import profiled_phase, get_startup_profiler
+
+# 模块化 Native Hook 文件（按加载顺序）
+NATIVE_MODULE_FILES = [
+    'frida_native_core.js',
+    'frida_native_linker.js',
+    'frida_native_jni.js',
+    'frida_native_anti_debug.js',
+    'frida_native_crypto.js',
+    'frida_native_network.js',
+    'frida_native_file_proc.js',
+    'frida_native_stalker.js',
+    'frida_native_analysis.js',
+    'frida_native_suite.js'
+]
+
+# 主脚本包命中缓存时，自定义脚本管理器延迟到首次使用时再扫描
+_custom_manager_pending = False
+
+# 按需加载模块：主脚本只含桩函数，首次调用时 Agent 发送请求，宿主回传模块源码
+LAZY_MODULE_REQUEST = 'fridac_module_request'
+LAZY_MODULE_REPLY = 'fridac_module'
+LAZY_CORE_MODULE = 'frida_native_core'
+
+# 精简构建的功能清单：功能 -> 所属顶层函数（fnmatch 模式）
+# 未归入任何功能的函数视为核心，始终保留；native / location 控制按需加载模块的桩函数
+FEATURE_MANIFEST = {
+    'java': [],
+    'objects': [
+        '__getHandle', '__getObjectByHandle', '__objectToStr', '__registerObject', '__formatTypeName',
+        '__safeToString', '__formatFieldValue', '__getAllFields', 'classsearch', 'classdump', 'object*',
+    ],
+    'fetch': [
+        'fetch', '__useClass', '__parseCharsetFromHeaders', '__bytesToString', '__genRequestsCode',
+        '__handleOkHttpCall', '__handleHttpUrlConnection', '__installOkHttpHooks', '__installOkHttp2Hooks',
+        '__installHttpURLConnectionHooks', '__installWebViewHooks', '__installVolleyHooks',
+        '__installApacheHttpClientHooks',
+    ],
+    'okhttp': ['okhttp*', '__okhttp_*', '__installOkHttpLoggerHooks'],
+    'hierarchy': ['findImplementations', 'findDirectImplementations', 'findSubclasses', 'analyzeClassHierarchy'],
+    'help': ['help'],
+    'native': [],
+    'location': [],
+}
+
+_WEAK_GLOBAL_EXPORT_RE = re.compile(r'global\.([A-Za-z_$][\w$]*)\s*=\s*\1\b')
+_WEAK_TYPEOF_RE = re.compile(r'\btypeof\s+\(?\s*([A-Za-z_$][\w$]*)')
+_WEAK_OBJECT_ENTRY_RE = re.compile(r'^\s*[\w$]+\s*:\s*([A-Za-z_$][\w$]*)\s*,?\s*$', re.MULTILINE)
+_IDENTIFIER_RE = re.compile(r'(?<![\w$.])[A-Za-z_$][\w$]*')
+
+_TOP_LEVEL_FUNCTION_RE = re.compile(
+    r'^(?:function\s+([A-Za-z_$][\w$]*)\s*\(|var\s+([A-Za-z_$][\w$]*)\s*=\s*function\b)', re.MULTILINE)
 
 
 def _get_data_path():
@@ -45,8 +104,75 @@ def _get_possible_paths(filename, subdir=None):
     return paths
 
 
+def _native_dirs():
+    """模块化 Native Hook 目录候选（按优先级）"""
+    data_path = _get_data_path()
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return [
+        os.path.join(data_path, 'frida_native'),
+        os.path.join(base_dir, 'frida_native'),
+        os.path.join('.', 'frida_native')
+    ]
+
+
+def _bundle_cache_key():
+    """
+    主脚本包的缓存键：所有候选输入文件的路径/mtime/大小 + 影响拼装的选项
+    
+    Returns:
+        缓存键，需交互式选择脚本时返回 None（不使用缓存）
+    """
+    if os.environ.get('FRIDAC_SELECT_SCRIPTS'):
+        return None
+    
+    paths = list(_get_possible_paths('frida_common_new.js'))
+    for native_dir in _native_dirs():
+        paths.extend(os.path.join(native_dir, fname) for fname in NATIVE_MODULE_FILES)
+    paths.extend(_get_possible_paths('frida_native_common.js'))
+    paths.extend(_get_possible_paths('frida_location_hooks_new.js'))
+    
+    no_custom = bool(os.environ.get('FRIDAC_NO_CUSTOM_SCRIPTS'))
+    if not no_custom:
+        for scripts_dir in get_scripts_dirs(_get_data_path()):
+            paths.append(scripts_dir)
+            paths.extend(bundle_cache.iter_js_files(scripts_dir))
+    
+    # 拼装代码本身变化（升级 fridac）同样使缓存失效
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    paths.extend(os.path.join(module_dir, name) for name in ('script_manager.py', 'custom_scripts.py', 'js_tokens.py'))
+    
+    options = {
+        'no_custom_scripts': no_custom,
+        'scripts_filter': os.environ.get('FRIDAC_SCRIPTS_FILTER', ''),
+        'lazy_modules': lazy_modules_enabled(),
+        'features': os.environ.get('FRIDAC_FEATURES', ''),
+        'minify': os.environ.get('FRIDAC_MINIFY', ''),
+        'prelude': build_batch_prelude(),
+    }
+    return bundle_cache.compute_key(paths, options)
+
+
+@profiled_phase('create_frida_script')
 def create_frida_script():
-    """创建包含全部工具函数的 Frida 脚本"""
+    """创建包含全部工具函数的 Frida 脚本（命中缓存时跳过拼装）"""
+    global _custom_manager_pending
+    
+    cache_key = _bundle_cache_key() if bundle_cache.cache_enabled() else None
+    if cache_key:
+        cached = bundle_cache.load_bundle(cache_key)
+        if cached is not None:
+            log_debug(f"使用缓存的脚本包: {cache_key[:12]}")
+            _custom_manager_pending = not os.environ.get('FRIDAC_NO_CUSTOM_SCRIPTS')
+            return cached
+    
+    js_content = _assemble_frida_script()
+    if js_content is not None and cache_key:
+        bundle_cache.store_bundle(cache_key, js_content)
+    return js_content
+
+
+def _assemble_frida_script():
+    """读取并拼装主脚本"""
     # 使用统一的路径查找函数
     possible_paths = _get_possible_paths('frida_common_new.js')
     
@@ -65,9 +191,14 @@ def create_frida_script():
     with open(script_path, 'r', encoding='utf-8') as f:
         js_content = f.read()
     
-    # 加载附加的脚本模块
-    js_content += _load_native_hooks()
-    js_content += _load_location_hooks()
+    # 加载附加的脚本模块（默认只注入桩函数，首次调用时再加载真实模块）
+    if lazy_modules_enabled():
+        js_content += _build_lazy_stubs(js_content)
+    else:
+        if _feature_enabled('native'):
+            js_content += _load_native_hooks()
+        if _feature_enabled('location'):
+            js_content += _load_location_hooks()
     # 注: frida_okhttp_logger.js 和 frida_advanced_tracer.js 已整合到 frida_common_new.js
     
     # 加载自定义脚本
@@ -77,38 +208,176 @@ def create_frida_script():
     # 添加交互式 Shell 初始化与 Java.perform 包装
     js_content = _wrap_with_java_perform(js_content)
     
+    # 注入批量传输配置（需位于脚本最前面）
+    js_content = build_batch_prelude() + js_content
+    
     # 替换自定义函数导出占位符
     custom_manager = get_custom_script_manager()
     if custom_manager:
         custom_exports = custom_manager.generate_rpc_exports()
         js_content = js_content.replace('/* CUSTOM_EXPORTS_WILL_BE_INSERTED_HERE */', custom_exports)
     
+    # 精简构建：按功能清单裁剪未引用的顶层函数，去除注释与空白
+    features, minify = get_build_options()
+    if features is not None or minify:
+        js_content = _build_bundle(js_content, features, minify)
+    
     return js_content
 
+
+# 已提示过的未知功能名（避免重复告警）
+_warned_features = set()
+
+
+def get_build_options():
+    """
+    精简构建选项
+    
+    Returns:
+        (features, minify)：features 为启用的功能集合（None 表示全部），
+        指定 FRIDAC_FEATURES 时隐含 minify
+    """
+    raw = os.environ.get('FRIDAC_FEATURES', '').strip()
+    features = None
+    if raw:
+        features = {name.strip().lower() for name in raw.split(',') if name.strip()}
+        unknown = features - set(FEATURE_MANIFEST) - _warned_features
+        if unknown:
+            _warned_features.update(unknown)
+            log_warning("⚠️ 未知功能: {}（可用: {}）".format(', '.join(sorted(unknown)), ', '.join(FEATURE_MANIFEST)))
+        features &= set(FEATURE_MANIFEST)
+        features.add('java')
+    minify = features is not None or os.environ.get('FRIDAC_MINIFY', '') == '1'
+    return features, minify
+
+
+def _feature_enabled(feature):
+    features, _ = get_build_options()
+    return features is None or feature in features
+
+
+def _feature_of(name):
+    for feature, patterns in FEATURE_MANIFEST.items():
+        for pattern in patterns:
+            if fnmatch.fnmatchcase(name, pattern):
+                return feature
+    return None
+
+
+def _collect_references(code, top_level):
+    """
+    提取代码中的标识符引用
+    
+    Returns:
+        (strong, weak)：weak 为不会在加载/调用时求值的引用（typeof、导出到 global / rpc.exports）
+    """
+    weak = set()
+    
+    def _weak(match):
+        weak.add(match.group(1))
+        return ' '
+    
+    code = _WEAK_TYPEOF_RE.sub(_weak, code)
+    if top_level:
+        code = _WEAK_GLOBAL_EXPORT_RE.sub(_weak, code)
+        code = _WEAK_OBJECT_ENTRY_RE.sub(_weak, code)
+    return set(_IDENTIFIER_RE.findall(code)), weak
+
+
+def _prune_bundle(js_content, features):
+    """
+    裁剪未启用功能中不被保留代码直接调用的顶层函数
+    
+    仍被导出（global.X = X / rpc.exports）引用的函数替换为提示桩，其余直接删除；
+    被保留函数调用到的函数连同其依赖一并保留
+    
+    Returns:
+        (裁剪后的代码, 删除数, 替换为桩的数量)
+    """
+    tokens = list(js_tokens.iter_tokens(js_content))
+    functions = list(js_tokens.iter_top_level_functions(js_content, tokens))
+    candidates = {}
+    for name, _, _ in functions:
+        feature = _feature_of(name)
+        if feature is not None and feature not in features:
+            candidates[name] = feature
+    if not candidates:
+        return js_content, 0, 0
+    
+    # 按归属（顶层代码为 None）汇总代码片段中的引用
+    strong_refs = {}
+    top_level_weak = set()
+    spans = sorted((start, end, name) for name, start, end in functions)
+    span_index = 0
+    for kind, start, end in tokens:
+        if kind != js_tokens.CODE:
+            continue
+        pos = start
+        while pos < end:
+            while span_index < len(spans) and spans[span_index][1] <= pos:
+                span_index += 1
+            if span_index < len(spans) and spans[span_index][0] <= pos:
+                owner, piece_end = spans[span_index][2], min(end, spans[span_index][1])
+            else:
+                owner = None
+                piece_end = min(end, spans[span_index][0]) if span_index < len(spans) else end
+            strong, weak = _collect_references(js_content[pos:piece_end], owner is None)
+            strong_refs.setdefault(owner, set()).update(strong)
+            if owner is None:
+                top_level_weak |= weak
+            pos = piece_end
+    
+    # 从保留代码出发标记被调用到的候选函数
+    needed = set()
+    pending = [refs for owner, refs in strong_refs.items() if owner not in candidates]
+    while pending:
+        for name in pending.pop():
+            if name in candidates and name not in needed:
+                needed.add(name)
+                pending.append(strong_refs.get(name, set()))
+    
+    pruned = set(candidates) - needed
+    stubbed = pruned & top_level_weak
+    pieces = []
+    last = 0
+    emitted = set()
+    for start, end, name in spans:
+        if name not in pruned:
+            continue
+        pieces.append(js_content[last:start])
+        if name in stubbed and name not in emitted:
+            emitted.add(name)
+            pieces.append("function {0}() {{ LOG('⚠️ {0} 未包含在当前精简构建中 (--features 加上 {1})'); return false; }}".format(
+                name, candidates[name]))
+        last = end
+    pieces.append(js_content[last:])
+    return ''.join(pieces), len(pruned - stubbed), len(stubbed)
+
+
+def _build_bundle(js_content, features, minify):
+    """精简构建：裁剪 + 去注释空白，并报告体积变化"""
+    before = len(js_content.encode('utf-8'))
+    removed = stubbed = 0
+    if features is not None:
+        js_content, removed, stubbed = _prune_bundle(js_content, features)
+    if minify:
+        js_content = js_tokens.minify(js_content)
+    after = len(js_content.encode('utf-8'))
+    
+    feature_msg = ', '.join(sorted(features)) if features is not None else '全部'
+    log_info("📦 精简构建 [{}]: {:.0f} KB → {:.0f} KB (-{:.0f}%)，裁剪 {} 个函数，{} 个替换为提示桩".format(
+        feature_msg, before / 1024, after / 1024, (1 - after / max(before, 1)) * 100, removed, stubbed))
+    profiler = get_startup_profiler()
+    profiler.annotate('bundle_bytes_before', before)
+    profiler.annotate('bundle_bytes', after)
+    return js_content
+
+
 def _load_native_hooks():
     """加载 Native Hook 工具"""
-    data_path = _get_data_path()
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
     # 优先加载模块化目录
-    modular_dirs = [
-        os.path.join(data_path, 'frida_native'),
-        os.path.join(base_dir, 'frida_native'),
-        os.path.join('.', 'frida_native')
-    ]
-    
-    modular_files_order = [
-        'frida_native_core.js',
-        'frida_native_linker.js',
-        'frida_native_jni.js',
-        'frida_native_anti_debug.js',
-        'frida_native_crypto.js',
-        'frida_native_network.js',
-        'frida_native_file_proc.js',
-        'frida_native_stalker.js',
-        'frida_native_analysis.js',
-        'frida_native_suite.js'
-    ]
+    modular_dirs = _native_dirs()
+    modular_files_order = NATIVE_MODULE_FILES
 
     for modular_dir in modular_dirs:
         if os.path.isdir(modular_dir):
@@ -162,6 +431,323 @@ def _load_location_hooks():
     log_debug("未找到 frida_location_hooks_new.js，定位工具不可用")
     return ""
 
+def lazy_modules_enabled():
+    """Native / 定位工具是否按需加载（FRIDAC_EAGER_MODULES=1 时全部预先注入）"""
+    return os.environ.get('FRIDAC_EAGER_MODULES', '') != '1'
+
+
+def _lazy_module_paths():
+    """
+    按需加载的模块及其文件路径（与预先注入时的查找顺序一致）
+    
+    Returns:
+        [(模块名, 路径)]，按加载顺序
+    """
+    modules = []
+    if not _feature_enabled('native'):
+        return _lazy_location_module()
+    for modular_dir in _native_dirs():
+        if not os.path.isdir(modular_dir):
+            continue
+        for fname in NATIVE_MODULE_FILES:
+            fpath = os.path.join(modular_dir, fname)
+            if os.path.exists(fpath):
+                modules.append((fname[:-len('.js')], fpath))
+        if modules:
+            break
+    if not modules:
+        for path in _get_possible_paths('frida_native_common.js'):
+            if os.path.exists(path):
+                modules.append(('frida_native_common', path))
+                break
+    return modules + _lazy_location_module()
+
+
+def _lazy_location_module():
+    if not _feature_enabled('location'):
+        return []
+    for path in _get_possible_paths('frida_location_hooks_new.js'):
+        if os.path.exists(path):
+            return [('frida_location_hooks_new', path)]
+    return []
+
+
+def _read_module(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _top_level_functions(js_source):
+    """提取顶层函数名（function f(...) / var f = function）"""
+    names = []
+    for match in _TOP_LEVEL_FUNCTION_RE.finditer(js_source):
+        name = match.group(1) or match.group(2)
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def get_lazy_functions():
+    """
+    按需加载模块提供的公开函数（供补全与帮助使用）
+    
+    Returns:
+        {函数名: 模块名}
+    """
+    functions = {}
+    if not lazy_modules_enabled():
+        return functions
+    for module, path in _lazy_module_paths():
+        try:
+            for name in _top_level_functions(_read_module(path)):
+                if not name.startswith('_'):
+                    functions.setdefault(name, module)
+        except Exception:
+            continue
+    return functions
+
+
+def load_lazy_module(module):
+    """
+    读取按需加载模块的源码（响应 Agent 的模块请求）
+    
+    Returns:
+        模块源码，模块不存在时返回 None
+    """
+    for name, path in _lazy_module_paths():
+        if name == module:
+            source = _read_module(path)
+            return js_tokens.minify(source) if get_build_options()[1] else source
+    return None
+
+
+# 公共函数索引（热重载脚本按引用提取）：{函数名: (位置, 源码, 引用的标识符)}
+_common_functions = None
+
+
+def _code_identifiers(source, tokens, start=0, end=None, token_starts=None):
+    """提取 [start, end) 范围内代码片段（不含字符串/注释）引用的标识符"""
+    end = len(source) if end is None else end
+    index = 0
+    if start:
+        token_starts = token_starts or [t[1] for t in tokens]
+        index = max(0, bisect.bisect_right(token_starts, start) - 1)
+    names = set()
+    for kind, token_start, token_end in tokens[index:]:
+        if token_start >= end:
+            break
+        if kind == js_tokens.CODE:
+            names.update(_IDENTIFIER_RE.findall(source, max(start, token_start), min(end, token_end)))
+    return names
+
+
+def _common_function_index():
+    global _common_functions
+    if _common_functions is None:
+        index = {}
+        for path in _get_possible_paths('frida_common_new.js'):
+            if not os.path.exists(path):
+                continue
+            source = _read_module(path)
+            tokens = list(js_tokens.iter_tokens(source))
+            token_starts = [t[1] for t in tokens]
+            for name, start, end in js_tokens.iter_top_level_functions(source, tokens):
+                index[name] = (start, source[start:end], _code_identifiers(source, tokens, start, end, token_starts))
+            break
+        _common_functions = index
+    return _common_functions
+
+
+def build_hot_reload_script(script_source, base_functions, label):
+    """
+    生成热重载用的独立脚本：任务基础函数 + 脚本引用到的公共函数 + 按需加载桩函数（引用了
+    Native / 定位工具时）+ 脚本本身 + eval 导出
+    
+    每个自定义脚本文件单独成为一个 Frida 脚本，重载时卸载旧脚本即可撤销其安装的 Hook
+    
+    Args:
+        script_source: 自定义脚本源码
+        base_functions: 任务基础函数（LOG / Color / 任务通信等）
+        label: 脚本标识（注释用）
+    """
+    index = _common_function_index()
+    skip = {name for name, _, _ in js_tokens.iter_top_level_functions(script_source)}
+    skip.update(name for name, _, _ in js_tokens.iter_top_level_functions(base_functions))
+    
+    needed = set()
+    referenced = _code_identifiers(script_source, list(js_tokens.iter_tokens(script_source)))
+    pending = list(referenced)
+    while pending:
+        name = pending.pop()
+        if name in index and name not in needed and name not in skip:
+            needed.add(name)
+            referenced |= index[name][2]
+            pending.extend(index[name][2])
+    helpers = '\n\n'.join(index[name][1] for name in sorted(needed, key=lambda n: index[n][0]))
+    # 热重载脚本独立于主脚本，Native / 定位工具同样通过桩函数向宿主按需拉取
+    lazy_stubs = _build_lazy_stubs('\n'.join((base_functions, helpers, script_source)), referenced)
+    
+    return f'''// ===== 热重载脚本: {label} =====
+var TASK_ID = 0;
+
+{base_functions}
+
+// ===== 引用的公共函数 =====
+{helpers}
+{lazy_stubs}
+
+// ===== {label} =====
+{script_source}
+
+rpc.exports.eval = function(code) {{
+    try {{
+        var value = eval(code);
+        return (value === undefined || value === null) ? true : value;
+    }} catch (e1) {{
+        var __ret = undefined;
+        Java.perform(function() {{ __ret = eval(code); }});
+        return (__ret === undefined || __ret === null) ? true : __ret;
+    }}
+}};
+'''
+
+
+def _build_lazy_stubs(common_content, referenced=None):
+    """
+    生成按需加载桩代码：每个公开函数一个同名桩（函数声明，可被提升），
+    首次调用时先同步拉取所属模块（Native 模块先拉取 core），模块在当前脚本全局作用域执行后替换桩函数
+    
+    Args:
+        common_content: 已定义函数的源码（同名函数不生成桩）
+        referenced: 代码引用的标识符（可选）；给出时未引用任何按需函数则不生成
+    """
+    defined = set(_top_level_functions(common_content))
+    table = {}
+    stubs = []
+    modules = _lazy_module_paths()
+    module_names = [name for name, _ in modules]
+    for module, path in modules:
+        try:
+            functions = [name for name in _top_level_functions(_read_module(path))
+                         if not name.startswith('_') and name not in defined]
+        except Exception as e:
+            log_warning("读取按需加载模块失败 {}: {}".format(path, e))
+            continue
+        deps = [LAZY_CORE_MODULE] if (module.startswith('frida_native_') and module != LAZY_CORE_MODULE
+                                      and LAZY_CORE_MODULE in module_names) else []
+        table[module] = {'deps': deps, 'functions': functions}
+        for name in functions:
+            defined.add(name)
+            stubs.append("function {0}() {{ return __fridacLazyCall({1}, {2}, this, arguments); }}".format(
+                name, json.dumps(module), json.dumps(name)))
+    
+    if not table:
+        log_debug("未找到 Native / 定位 Hook 工具，仅加载 Java Hook 工具")
+        return ""
+    if referenced is not None and not any(name in referenced for mod in table.values() for name in mod['functions']):
+        return ""
+    log_debug("按需加载模块: {}（{} 个桩函数）".format(', '.join(table), len(stubs)))
+    
+    loader = '''
+
+// ===== 按需加载模块（Native / 定位 Hook 工具） =====
+// 主脚本只包含桩函数；首次调用时向宿主请求模块源码，在当前脚本全局作用域执行后替换桩函数
+function __fridacLazyModules() {
+    return %(table)s;
+}
+
+var __FRIDAC_KEEP_GLOBALS = ['LOG', 'Color'];
+
+function __fridacLazyState() {
+    if (!global.__fridacLazyStateObj) { global.__fridacLazyStateObj = { loaded: {}, callbacks: {} }; }
+    return global.__fridacLazyStateObj;
+}
+
+function __fridacLoadModule(name) {
+    var state = __fridacLazyState();
+    var mod = __fridacLazyModules()[name];
+    if (!mod) { throw new Error('未知模块: ' + name); }
+    if (state.loaded[name]) { return true; }
+    for (var i = 0; i < mod.deps.length; i++) { __fridacLoadModule(mod.deps[i]); }
+    state.loaded[name] = true;
+    var reply = null;
+    try { __fridacTransport.flush(); } catch (_) {}
+    send({ type: '%(request)s', module: name });
+    recv('%(reply)s', function (message) { reply = message; }).wait();
+    if (!reply || typeof reply.source !== 'string') {
+        state.loaded[name] = false;
+        throw new Error('加载模块 ' + name + ' 失败: ' + ((reply && reply.error) || '宿主无响应'));
+    }
+    // 模块自带的 LOG / Color 不得替换主脚本的实现（否则首次按需加载后输出格式中途改变）
+    var kept = {};
+    for (var k = 0; k < __FRIDAC_KEEP_GLOBALS.length; k++) {
+        if (typeof global[__FRIDAC_KEEP_GLOBALS[k]] !== 'undefined') { kept[__FRIDAC_KEEP_GLOBALS[k]] = global[__FRIDAC_KEEP_GLOBALS[k]]; }
+    }
+    try {
+        (0, eval)(reply.source);
+    } finally {
+        for (var key in kept) { global[key] = kept[key]; }
+    }
+    var callbacks = state.callbacks[name] || [];
+    delete state.callbacks[name];
+    for (var j = 0; j < callbacks.length; j++) {
+        try { callbacks[j](); } catch (e) { LOG('⚠️ 模块 ' + name + ' 加载回调失败: ' + e.message); }
+    }
+    return true;
+}
+
+function __fridacLazyCall(moduleName, fnName, self, args) {
+    __fridacLoadModule(moduleName);
+    var real = global[fnName];
+    if (typeof real !== 'function' || String(real).indexOf('__fridacLazyCall(') !== -1) {
+        throw new Error('模块 ' + moduleName + ' 未提供函数 ' + fnName);
+    }
+    return real.apply(self, args);
+}
+
+// 返回函数所属的未加载模块（已加载或非按需函数返回 null）
+function __fridacLazyModuleOf(fnName) {
+    var modules = __fridacLazyModules();
+    var state = __fridacLazyState();
+    for (var name in modules) {
+        if (!state.loaded[name] && modules[name].functions.indexOf(fnName) !== -1) { return name; }
+    }
+    return null;
+}
+
+// 模块加载后执行回调（已加载则立即执行）
+function __fridacWhenModuleLoaded(name, callback) {
+    var state = __fridacLazyState();
+    if (state.loaded[name]) { callback(); return; }
+    (state.callbacks[name] = state.callbacks[name] || []).push(callback);
+}
+
+/**
+ * 列出按需加载模块及其状态
+ * @example fridacModules()
+ * @example fridacModules('frida_native_network')  // 立即加载指定模块
+ */
+function fridacModules(loadName) {
+    if (loadName) { return __fridacLoadModule(loadName); }
+    var modules = __fridacLazyModules();
+    var state = __fridacLazyState();
+    LOG('📦 按需加载模块 (首次调用其中函数时自动加载):', { c: Color.Cyan });
+    for (var name in modules) {
+        LOG('  ' + (state.loaded[name] ? '🟢 ' : '💤 ') + name + ' (' + modules[name].functions.length + ' 个函数)', { c: Color.White });
+    }
+    return true;
+}
+
+%(stubs)s
+''' % {
+        'table': json.dumps(table, ensure_ascii=False),
+        'request': LAZY_MODULE_REQUEST,
+        'reply': LAZY_MODULE_REPLY,
+        'stubs': '\n'.join(stubs),
+    }
+    return loader
+
+
 def _load_custom_scripts(script_path):
     """加载用户自定义脚本"""
     data_path = _get_data_path()
@@ -254,7 +840,16 @@ var CUSTOM_EXPORTS_CODE = `{custom_exports}`;
         return ""
 
 def get_custom_script_manager():
-    """获取自定义脚本管理器实例"""
+    """获取自定义脚本管理器实例（主脚本来自缓存时在此按需扫描）"""
+    global _custom_manager_pending
+    if _custom_manager_pending and globals().get('_custom_script_manager') is None:
+        _custom_manager_pending = False
+        try:
+            custom_manager = CustomScriptManager(_get_data_path())
+            custom_manager.scan_scripts()
+            globals()['_custom_script_manager'] = custom_manager
+        except Exception as e:
+            log_error(f"加载自定义脚本失败: {e}")
     return globals().get('_custom_script_manager', None)
 
     
@@ -316,8 +911,13 @@ try {
             };
         }
         if (typeof nativeRegisterRehook === 'function') {
-            try { nativeRegisterRehook('rehook_tls', function(name){ var n=(name||'').toLowerCase(); return n.indexOf('ssl')!==-1 || n.indexOf('boringssl')!==-1; }, function(){ try { if (typeof nativeHookTLSFunctions==='function') nativeHookTLSFunctions(1); } catch(_){} }); } catch(_){ }
-            try { nativeRegisterRehook('rehook_conscrypt', function(name){ var n=(name||'').toLowerCase(); return n.indexOf('conscrypt')!==-1; }, function(){ try { if (typeof nativeHookConscryptTLS==='function') nativeHookConscryptTLS(1); } catch(_){} }); } catch(_){ }
+            var registerRehooks = function() {
+                try { nativeRegisterRehook('rehook_tls', function(name){ var n=(name||'').toLowerCase(); return n.indexOf('ssl')!==-1 || n.indexOf('boringssl')!==-1; }, function(){ try { if (typeof nativeHookTLSFunctions==='function') nativeHookTLSFunctions(1); } catch(_){} }); } catch(_){ }
+                try { nativeRegisterRehook('rehook_conscrypt', function(name){ var n=(name||'').toLowerCase(); return n.indexOf('conscrypt')!==-1; }, function(){ try { if (typeof nativeHookConscryptTLS==='function') nativeHookConscryptTLS(1); } catch(_){} }); } catch(_){ }
+            };
+            // 按需加载时延后到 linker 模块加载后再注册，避免启动时拉取模块
+            var rehookModule = (typeof __fridacLazyModuleOf === 'function') ? __fridacLazyModuleOf('nativeRegisterRehook') : null;
+            if (rehookModule) { __fridacWhenModuleLoaded(rehookModule, registerRehooks); } else { registerRehooks(); }
         }
     } catch (_){ }
 })();
@@ -451,6 +1051,9 @@ function help() {
         LOG("\\n🔧 Native Hook 工具: 未加载", { c: Color.Yellow });
         LOG("  运行 loadNativeSupport() 尝试加载", { c: Color.Gray });
     }
+    if (typeof fridacModules === 'function') {
+        LOG("\\n📦 按需加载: Native / 定位工具在首次调用时自动加载，fridacModules() 查看状态", { c: Color.Gray });
+    }
     
     LOG("\\n🎯 智能工具:", { c: Color.Green });
     LOG("  intelligentHookDispatcher(targetIdentifier, hookOptions) - 智能识别并Hook目标", { c: Color.White });
@@ -665,6 +1268,12 @@ rpc.exports = {
     bytesToString: (typeof bytesToString !== 'undefined') ? bytesToString : function(arr) { try { if (typeof __bytesToString !== 'undefined') return __bytesToString(arr, null); } catch(_) {} try { return String(arr); } catch(__) { return ''; } },
     LOG: LOG,
     Color: Color,
+    fridacBatchConfig: (typeof fridacBatchConfig !== 'undefined') ? fridacBatchConfig : function() { return null; },
+
+    // 脚本卸载前刷新批量消息队列
+    dispose: function() {
+        try { if (typeof __fridacTransport !== 'undefined') __fridacTransport.flush(); } catch (_) {}
+    },
     
     // ===== 自定义函数导出 =====
     /* CUSTOM_EXPORTS_WILL_BE_INSERTED_HERE */
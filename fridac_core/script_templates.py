@@ -4,9 +4,11 @@ fridacli 脚本模板系统
 保持所有核心逻辑不变，只是封装为独立Script
 """
 
+import json
 import os
 from typing import Dict, Any, Optional
 from .task_manager import TaskType
+from .transport import build_batch_prelude
 
 class ScriptTemplateEngine:
     """
@@ -41,7 +43,8 @@ class ScriptTemplateEngine:
                 'frida_common_new.js',  # 包含LOG, Color等基础函数 (新版本)
             ]
             
-            base_code = ""
+            # 批量传输配置需先于传输层定义
+            base_code = build_batch_prelude()
             for filename in base_files:
                 filepath = os.path.join(self.base_script_dir, filename)
                 if os.path.exists(filepath):
@@ -72,6 +75,15 @@ class ScriptTemplateEngine:
         # 提取关键的工具函数
         utility_functions = []
         
+        # 批量传输层（LOG 依赖 __fridacSend，需最先提取）
+        begin_marker = '// ===== FRIDAC_TRANSPORT_BEGIN ====='
+        end_marker = '// ===== FRIDAC_TRANSPORT_END ====='
+        start = script_content.find(begin_marker)
+        if start != -1:
+            end = script_content.find(end_marker, start)
+            if end != -1:
+                utility_functions.append(script_content[start:end + len(end_marker)])
+        
         # 查找LOG函数定义
         if 'function LOG(' in script_content:
             start = script_content.find('function LOG(')
@@ -222,15 +234,114 @@ var emitEvent = (typeof emitEvent === 'function') ? emitEvent : function(eventTy
         evt.ts = Date.now();
         try { evt.pid = Process.id; } catch(_){ }
         try { evt.tid = Process.getCurrentThreadId(); } catch(_){ }
-        send(evt);
+        if (typeof __fridacSend === 'function') { __fridacSend(evt); } else { send(evt); }
     } catch (e) {
         try { send({ type: 'event', error: e.message }); } catch(_){ }
     }
 };
 try { if (typeof global !== 'undefined') global.emitEvent = emitEvent; } catch(_){ }
 
+// 命中计数：Agent 端只做整数累加，宿主端定时通过 rpc 批量拉取
+var __fridacHitCounters = {};
+var __fridacHitEvents = true;
+function __fridacCounter(id) {
+    var c = __fridacHitCounters[id];
+    if (!c) { c = __fridacHitCounters[id] = { count: 0, last: 0 }; }
+    return c;
+}
+function __fridacCountHit(id) {
+    var c = __fridacCounter(id);
+    c.count++;
+    c.last = Date.now();
+}
+
+// 高精度时钟（毫秒，浮点）：performance.now > clock_gettime(CLOCK_MONOTONIC) > Date.now
+var __fridacNow = (function() {
+    try {
+        if (typeof performance !== 'undefined' && typeof performance.now === 'function') {
+            return function() { return performance.now(); };
+        }
+    } catch (_) {}
+    try {
+        var addr = Module.findExportByName(null, 'clock_gettime');
+        if (addr) {
+            // exclusive：调用期间不释放 JS 锁，多线程同时进入 Hook 时不会交错读写共享的 timespec
+            var clockGettime = new NativeFunction(addr, 'int', ['int', 'pointer'], { scheduling: 'exclusive' });
+            var clockId = Process.platform === 'darwin' ? 6 : 1;
+            var ts = Memory.alloc(16);
+            var wide = Process.pointerSize === 8;
+            return function() {
+                clockGettime(clockId, ts);
+                return wide
+                    ? ts.readS64().toNumber() * 1000 + ts.add(8).readS64().toNumber() / 1e6
+                    : ts.readS32() * 1000 + ts.add(4).readS32() / 1e6;
+            };
+        }
+    } catch (_) {}
+    return function() { return Date.now(); };
+})();
+
+// 任务级开销统计：total 为 Hook 内总耗时，original 为其中原方法耗时，差值即插桩附加延迟
+function __fridacMakeProfiler(id) {
+    var p = __fridacCounter(id).prof = { calls: 0, total: 0, original: 0, since: Date.now() };
+    return {
+        call: function(self, fn, args) {
+            var t = __fridacNow();
+            try { return fn.apply(self, args); } finally { p.original += __fridacNow() - t; }
+        },
+        end: function(t0, countCall) {
+            p.total += __fridacNow() - t0;
+            if (countCall !== false) p.calls++;
+        }
+    };
+}
+
+// 任务级节流闸门：在参数格式化/栈采集之前调用，返回 false 时只执行原方法
+// cfg: { maxPerSec: 每秒最多输出次数, sample: 每 N 次输出 1 次, autoPauseAfter: 输出 N 次后暂停 }
+function __fridacMakeGate(id, cfg) {
+    var c = __fridacCounter(id);
+    c.calls = 0;
+    c.suppressed = 0;
+    c.throttled = false;
+    c.paused = false;
+    var maxPerSec = cfg.maxPerSec || 0;
+    var sample = cfg.sample || 0;
+    var pauseAfter = cfg.autoPauseAfter || 0;
+    var windowStart = 0;
+    var windowCount = 0;
+    var passed = 0;
+    return function() {
+        c.calls++;
+        if (c.paused) { c.suppressed++; return false; }
+        if (sample > 1 && (c.calls - 1) % sample !== 0) { c.suppressed++; return false; }
+        if (maxPerSec > 0) {
+            var now = Date.now();
+            if (now - windowStart >= 1000) {
+                windowStart = now;
+                windowCount = 0;
+                c.throttled = false;
+            }
+            if (windowCount >= maxPerSec) {
+                c.throttled = true;
+                c.suppressed++;
+                return false;
+            }
+            windowCount++;
+        }
+        passed++;
+        if (pauseAfter > 0 && passed >= pauseAfter) c.paused = true;
+        return true;
+    };
+}
+try {
+    rpc.exports.taskHitCounters = function() { return __fridacHitCounters; };
+    rpc.exports.setHitEvents = function(enabled) { __fridacHitEvents = !!enabled; return __fridacHitEvents; };
+} catch (_) {}
+
 function notifyTaskHit(details) {
     if (typeof TASK_ID !== 'undefined') {
+        __fridacCountHit(TASK_ID);
+        if (!__fridacHitEvents) return;
         emitEvent('task_hit', {
             task_id: TASK_ID,
             items: details || {}
@@ -248,7 +359,290 @@ function notifyTaskError(error) {
 }
 '''
     
-    def generate_method_hook_script(self, class_name: str, method_name: str, 
+    def _get_task_gate_config(self, options: Dict[str, Any]) -> Dict[str, int]:
+        """提取节流选项（max_per_sec / sample / auto_pause_after），未设置返回空字典"""
+        cfg = {}
+        if options.get('max_per_sec'):
+            cfg['maxPerSec'] = int(options['max_per_sec'])
+        if options.get('sample') and int(options['sample']) > 1:
+            cfg['sample'] = int(options['sample'])
+        if options.get('auto_pause_after'):
+            cfg['autoPauseAfter'] = int(options['auto_pause_after'])
+        return cfg
+
+    def _get_task_gate_setup(self, options: Dict[str, Any]) -> str:
+        """节流闸门声明（无节流选项时为空，不增加开销）"""
+        cfg = self._get_task_gate_config(options)
+        if not cfg:
+            return ''
+        return f"var __taskGate = __fridacMakeGate(TASK_ID, {json.dumps(cfg)});"
+
+    def _get_task_gate_check(self, options: Dict[str, Any], passthrough: str) -> str:
+        """
+        Hook 入口处的节流判断
+
+        Args:
+            passthrough: 被节流时执行的语句（调用原方法并返回）
+        """
+        if not self._get_task_gate_config(options):
+            return ''
+        return f"if (!__taskGate()) {{ {passthrough} }}"
+
+    def _get_task_profile_code(self) -> Dict[str, Any]:
+        """
+        Hook 开销统计代码片段（默认关闭，原方法直接调用；FRIDAC_TASK_PROFILE=1 时
+        每次命中多 4 次时钟调用与一次包装调用）
+
+        Returns:
+            {'setup', 'start', 'end', 'call': fn(callee) -> 调用表达式}
+        """
+        if os.environ.get('FRIDAC_TASK_PROFILE', '') != '1':
+            return {
+                'setup': '', 'start': '', 'end': '',
+                'call': lambda callee: f"{callee}.apply(this, arguments)",
+            }
+        return {
+            'setup': "var __taskProf = __fridacMakeProfiler(TASK_ID);",
+            'start': "var __pt0 = __fridacNow();",
+            'end': "__taskProf.end(__pt0);",
+            'call': lambda callee: f"__taskProf.call(this, {callee}, arguments)",
+        }
+
+    def generate_task_runtime_script(self) -> str:
+        """
+        生成共享任务运行时脚本（每个会话加载一次）
+
+        基础函数只编译一次；各任务通过 rpc addTask 只提交 Hook 主体，
+        运行时记录每个任务安装的 Hook，removeTask 精确撤销
+
+        Returns:
+            完整的脚本代码
+        """
+        return f'''
+// 共享运行时本身不属于任何任务
+var TASK_ID = 0;
+
+{self.base_functions}
+
+{self._get_task_runtime_functions()}
+'''
+
+    def extract_task_body(self, script_source: str) -> Optional[str]:
+        """
+        从完整任务脚本中取出 Hook 主体（去掉 TASK_ID 声明与基础函数）
+
+        Returns:
+            Hook 主体；脚本不是由本引擎生成或依赖独立脚本能力时返回 None
+        """
+        pos = script_source.find(self.base_functions)
+        if pos == -1:
+            return None
+        body = script_source[pos + len(self.base_functions):]
+        # 需要独立 rpc/recv 通道的脚本无法共享运行时
+        if 'rpc.exports' in body or 'recv(' in body:
+            return None
+        return body
+
+    def _get_task_runtime_functions(self) -> str:
+        """
+        获取共享任务运行时代码
+
+        Returns:
+            运行时 JavaScript 代码
+        """
+        return '''
+// ===== 共享任务运行时 =====
+// 任务主体以 new Function 编译，TASK_ID / notifyTask* 作为参数按任务绑定；
+// Interceptor / Java implementation / 定时器经包装后记录归属，回调执行期间标记当前任务
+var __fridacTaskRuntime = (function() {
+    var tasks = {};
+    var javaOwners = new Map();
+    var current = 0;
+    var rawPerform = null;
+
+    function bind(id, fn) {
+        if (!id || typeof fn !== 'function') return fn;
+        return function() {
+            var prev = current;
+            current = id;
+            try { return fn.apply(this, arguments); } finally { current = prev; }
+        };
+    }
+
+    function record(kind, item) {
+        var t = current ? tasks[current] : null;
+        if (t) t[kind].push(item);
+    }
+
+    // 任务输出加信封，宿主端据此还原任务归属
+    var rawSend = __fridacSend;
+    __fridacSend = function(payload) {
+        rawSend(current ? { type: '__fridac_task', task_id: current, payload: payload } : payload);
+    };
+    emitBinaryEvent = function(eventType, fields, bytes, limit) {
+        try {
+            var evt = fields || {};
+            evt.type = eventType || evt.type || 'binary';
+            evt.ts = Date.now();
+            try { evt.pid = Process.id; } catch(_){ }
+            try { evt.tid = Process.getCurrentThreadId(); } catch(_){ }
+            var data = __fridacToArrayBuffer(bytes, limit);
+            evt.size = data ? data.byteLength : 0;
+            __fridacTransport.flush();
+            send(current ? { type: '__fridac_task', task_id: current, payload: evt } : evt, data);
+        } catch (e) {
+            try { send({ type: 'event', error: e.message }); } catch(_){ }
+        }
+    };
+
+    try {
+        var rawAttach = Interceptor.attach;
+        Interceptor.attach = function(target, callbacks, data) {
+            var cb = callbacks;
+            if (current && typeof callbacks === 'function') {
+                cb = bind(current, callbacks);
+            } else if (current && callbacks && typeof callbacks === 'object') {
+                cb = {};
+                for (var k in callbacks) { cb[k] = callbacks[k]; }
+                if (typeof cb.onEnter === 'function') cb.onEnter = bind(current, cb.onEnter);
+                if (typeof cb.onLeave === 'function') cb.onLeave = bind(current, cb.onLeave);
+            }
+            var listener = arguments.length > 2
+                ? rawAttach.call(Interceptor, target, cb, data)
+                : rawAttach.call(Interceptor, target, cb);
+            record('listeners', listener);
+            return listener;
+        };
+        var rawReplace = Interceptor.replace;
+        Interceptor.replace = function(target) {
+            var result = rawReplace.apply(Interceptor, arguments);
+            record('replaced', target);
+            return result;
+        };
+    } catch (e) {}
+
+    try {
+        var rawSetTimeout = setTimeout;
+        var rawSetInterval = setInterval;
+        setTimeout = function(fn) {
+            var args = Array.prototype.slice.call(arguments);
+            args[0] = bind(current, fn);
+            return rawSetTimeout.apply(null, args);
+        };
+        setInterval = function(fn) {
+            var args = Array.prototype.slice.call(arguments);
+            args[0] = bind(current, fn);
+            var handle = rawSetInterval.apply(null, args);
+            record('intervals', handle);
+            return handle;
+        };
+    } catch (e) {}
+
+    function patchJavaImplementation() {
+        var method = Java.use('java.lang.Object').hashCode.overloads[0];
+        var proto = Object.getPrototypeOf(method);
+        while (proto && !Object.getOwnPropertyDescriptor(proto, 'implementation')) {
+            proto = Object.getPrototypeOf(proto);
+        }
+        if (!proto) return;
+        var desc = Object.getOwnPropertyDescriptor(proto, 'implementation');
+        Object.defineProperty(proto, 'implementation', {
+            configurable: true,
+            enumerable: desc.enumerable,
+            get: desc.get,
+            set: function(fn) {
+                var id = current;
+                if (id && typeof fn === 'function') {
+                    desc.set.call(this, bind(id, fn));
+                    javaOwners.set(this, id);
+                    record('javaMethods', this);
+                } else {
+                    desc.set.call(this, fn);
+                    if (fn === null) javaOwners.delete(this);
+                }
+            }
+        });
+    }
+
+    try {
+        if (typeof Java !== 'undefined' && Java.available) {
+            rawPerform = Java.perform;
+            var rawPerformNow = Java.performNow;
+            Java.perform = function(fn) { return rawPerform.call(Java, bind(current, fn)); };
+            if (typeof rawPerformNow === 'function') {
+                Java.performNow = function(fn) { return rawPerformNow.call(Java, bind(current, fn)); };
+            }
+            rawPerform.call(Java, function() {
+                try { patchJavaImplementation(); } catch (e) { LOG('⚠️ 任务运行时无法跟踪 Java Hook: ' + e.message, { c: Color.Yellow }); }
+            });
+        }
+    } catch (e) {}
+
+    function addTask(id, body) {
+        var fn = new Function('TASK_ID', 'notifyTaskHit', 'notifyTaskError', body);
+        tasks[id] = { listeners: [], replaced: [], javaMethods: [], intervals: [] };
+        var hit = function(details) {
+            __fridacCountHit(id);
+            if (__fridacHitEvents) emitEvent('task_hit', { task_id: id, items: details || {} });
+        };
+        var error = function(err) {
+            emitEvent('task_error', { task_id: id, items: { error: err && err.message ? err.message : String(err) } });
+        };
+        var prev = current;
+        current = id;
+        try {
+            fn(id, hit, error);
+        } catch (e) {
+            current = prev;
+            removeTask(id);
+            throw e;
+        } finally {
+            current = prev;
+        }
+        return true;
+    }
+
+    function removeTask(id) {
+        var t = tasks[id];
+        if (!t) return false;
+        delete tasks[id];
+        delete __fridacHitCounters[id];
+        t.listeners.forEach(function(l) { try { l.detach(); } catch (_) {} });
+        t.replaced.forEach(function(p) { try { Interceptor.revert(p); } catch (_) {} });
+        t.intervals.forEach(function(h) { try { clearInterval(h); } catch (_) {} });
+        try { Interceptor.flush(); } catch (_) {}
+        if (t.javaMethods.length && rawPerform) {
+            rawPerform.call(Java, function() {
+                t.javaMethods.forEach(function(m) {
+                    if (javaOwners.get(m) !== id) return;
+                    try { m.implementation = null; } catch (_) {}
+                    javaOwners.delete(m);
+                });
+            });
+        }
+        __fridacTransport.flush();
+        return true;
+    }
+
+    function stats() {
+        var out = {};
+        for (var id in tasks) {
+            var t = tasks[id];
+            out[id] = { listeners: t.listeners.length, replaced: t.replaced.length,
+                        java: t.javaMethods.length, intervals: t.intervals.length };
+        }
+        return out;
+    }
+
+    return { addTask: addTask, removeTask: removeTask, stats: stats };
+})();
+
+rpc.exports.addTask = function(id, body) { return __fridacTaskRuntime.addTask(id, body); };
+rpc.exports.removeTask = function(id) { return __fridacTaskRuntime.removeTask(id); };
+rpc.exports.taskRuntimeStats = function() { return __fridacTaskRuntime.stats(); };
+'''
+
+    def generate_method_hook_script(self, class_name: str, method_name: str,
                                   options: Dict[str, Any], task_id: int) -> str:
         """
         生成方法Hook脚本
@@ -268,12 +662,23 @@ function notifyTaskError(error) {
         # 在JS字符串内使用转义换行符，避免插入真实换行导致语法错误
         newline_char = '\\n'
         
+        # 节流闸门：被节流时直接走原方法（或自定义返回值），不做任何格式化
+        gate_setup = self._get_task_gate_setup(options)
+        prof = self._get_task_profile_code()
+        gate_over = self._get_task_gate_check(
+            options, f"return {custom_return};" if custom_return is not None else "return __over.apply(this, arguments);")
+        gate_fallback = self._get_task_gate_check(
+            options, f"var __r = this.{method_name}.apply(this, arguments); return {custom_return if custom_return is not None else '__r'};")
+        
         script = f'''
 // 任务ID (用于通信)
 var TASK_ID = {task_id};
 
 {self.base_functions}
 
+{gate_setup}
+{prof['setup']}
+
 // ===== 方法Hook核心逻辑 =====
 Java.perform(function() {{
     try {{
@@ -354,6 +759,8 @@ Java.perform(function() {{
                 try {{
                     (function(__over) {{
                         __over.implementation = function() {{
+                            {gate_over}
+                            {prof['start']}
                             LOG("\\n*** 进入 " + fullMethodName, {{ c: Color.Green }});
 
                             // 显示调用栈
@@ -369,7 +776,7 @@ Java.perform(function() {{
                             }}
 
                             var retval;
-                            { ("retval = " + str(custom_return) + ";") if custom_return is not None else "retval = __over.apply(this, arguments);" }
+                            { ("retval = " + str(custom_return) + ";") if custom_return is not None else "retval = " + prof['call']('__over') + ";" }
 
                             LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
                             LOG("🏁 退出 " + fullMethodName + "{newline_char}", {{ c: Color.Green }});
@@ -380,6 +787,7 @@ Java.perform(function() {{
                                 return_value: (retval !== undefined && retval !== null) ? retval.toString() : "null"
                             }});
 
+                            {prof['end']}
                             return retval;
                         }};
                     }})(__overloads[i]);
@@ -388,6 +796,8 @@ Java.perform(function() {{
         }} else {{
             // 无重载信息兜底
             __methodWrapper.implementation = function() {{
+                {gate_fallback}
+                {prof['start']}
                 LOG("\\n*** 进入 " + fullMethodName, {{ c: Color.Green }});
 
                 {f"printStack();" if show_stack else ""}
@@ -400,7 +810,7 @@ Java.perform(function() {{
                     }}
                 }}
 
-                var retval = this.{method_name}.apply(this, arguments);
+                var retval = {prof['call'](f'this.{method_name}')};
                 {f"retval = {custom_return};" if custom_return is not None else ""}
 
                 LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
@@ -412,6 +822,7 @@ Java.perform(function() {{
                     return_value: (retval !== undefined && retval !== null) ? retval.toString() : "null"
                 }});
 
+                {prof['end']}
                 return retval;
             }};
         }}
@@ -444,12 +855,19 @@ Java.perform(function() {{
         # 在JS字符串内使用转义换行符，避免插入真实换行导致语法错误
         newline_char = '\\n'
         
+        gate_setup = self._get_task_gate_setup(options)
+        prof = self._get_task_profile_code()
+        gate_check = self._get_task_gate_check(options, "return originalImpl.apply(this, arguments);")
+        
         script = f'''
 // 任务ID (用于通信)
 var TASK_ID = {task_id};
 
 {self.base_functions}
 
+{gate_setup}
+{prof['setup']}
+
 // ===== 类Hook核心逻辑 =====
 Java.perform(function() {{
     try {{
@@ -505,6 +923,8 @@ Java.perform(function() {{
                 var originalImpl = targetClass[methodName];
                 if (originalImpl) {{
                     targetClass[methodName].implementation = function() {{
+                        {gate_check}
+                        {prof['start']}
                         var fullMethodName = "{class_name}." + methodName;
                         LOG("\\n*** 进入 " + fullMethodName, {{ c: Color.Green }});
                         
@@ -517,7 +937,7 @@ Java.perform(function() {{
                             }}
                         }}
                         
-                        var retval = originalImpl.apply(this, arguments);
+                        var retval = {prof['call']('originalImpl')};
                         
                         LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
                         LOG("🏁 退出 " + fullMethodName + "{newline_char}", {{ c: Color.Green }});
@@ -528,6 +948,7 @@ Java.perform(function() {{
                             return_value: retval ? retval.toString() : "null"
                         }});
                         
+                        {prof['end']}
                         return retval;
                     }};
                     
@@ -764,6 +1185,9 @@ Java.perform(function() {{
         # 在JS字符串内使用转义换行符，避免插入真实换行导致语法错误
         newline_char = '\\n'
         backslash_char = '\\'
+        # Native Hook 只统计 onEnter/onLeave 回调自身耗时（原函数耗时不可分离）
+        prof = self._get_task_profile_code()
+        prof_leave_end = prof['end'].replace('__pt0)', '__pt0, false)')
         stack_trace_code = f"console.log(Thread.backtrace(this.context, Backtracer.ACCURATE).map(DebugSymbol.fromAddress).join('{backslash_char}n'));" if show_stack else ""
         
         script = f'''
@@ -772,6 +1196,8 @@ var TASK_ID = {task_id};
 
 {self.base_functions}
 
+{prof['setup']}
+
 // ===== Native Hook核心逻辑 =====
 try {{
     LOG("🎯 正在设置Native Hook: {target}", {{ c: Color.Cyan }});
@@ -803,6 +1229,7 @@ try {{
         // Hook函数
         Interceptor.attach(targetAddr, {{
             onEnter: function(args) {{
+                {prof['start']}
                 LOG("{newline_char}*** 进入Native函数: {target}", {{ c: Color.Green }});
                 {stack_trace_code}
                 
@@ -816,9 +1243,11 @@ try {{
                     function: "{target}",
                     address: targetAddr.toString()
                 }});
+                {prof['end']}
             }},
             
             onLeave: function(retval) {{
+                {prof['start']}
                 LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
                 LOG("🏁 退出Native函数: {target}{newline_char}", {{ c: Color.Green }});
                 
@@ -827,6 +1256,7 @@ try {{
                     function: "{target}",
                     return_value: retval.toString()
                 }});
+                {prof_leave_end}
             }}
         }});
         
@@ -1271,12 +1701,19 @@ try {{
             else:
                 stack_code = "printStack();"
         
+        gate_setup = self._get_task_gate_setup(options)
+        prof = self._get_task_profile_code()
+        gate_check = self._get_task_gate_check(options, "return originalImpl.apply(this, arguments);")
+        
         script = f'''
 // 任务ID (用于通信)
 var TASK_ID = {task_id};
 
 {self.base_functions}
 
+{gate_setup}
+{prof['setup']}
+
 // ===== traceClass 脚本 =====
 Java.perform(function() {{
     try {{
@@ -1332,6 +1769,8 @@ Java.perform(function() {{
                 var originalImpl = targetClass[methodName];
                 if (originalImpl) {{
                     targetClass[methodName].implementation = function() {{
+                        {gate_check}
+                        {prof['start']}
                         var fullMethodName = className + "." + methodName;
                         LOG("\\n*** 进入 " + fullMethodName, {{ c: Color.Green }});
                         
@@ -1345,7 +1784,7 @@ Java.perform(function() {{
                             }}
                         }}
                         
-                        var retval = originalImpl.apply(this, arguments);
+                        var retval = {prof['call']('originalImpl')};
                         
                         LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
                         LOG("🏁 退出 " + fullMethodName + "\\n", {{ c: Color.Green }});
@@ -1356,6 +1795,7 @@ Java.perform(function() {{
                             args_count: arguments.length
                         }});
                         
+                        {prof['end']}
                         return retval;
                     }};
                     hookedCount++;
@@ -1402,12 +1842,22 @@ Java.perform(function() {{
         if custom_return is not None:
             return_code = f"retval = {custom_return};"
         
+        gate_setup = self._get_task_gate_setup(options)
+        prof = self._get_task_profile_code()
+        gate_over = self._get_task_gate_check(
+            options, f"var retval = over.apply(this, arguments); {return_code} return retval;")
+        gate_fallback = self._get_task_gate_check(
+            options, f"var retval = this[methodName].apply(this, arguments); {return_code} return retval;")
+        
         script = f'''
 // 任务ID (用于通信)
 var TASK_ID = {task_id};
 
 {self.base_functions}
 
+{gate_setup}
+{prof['setup']}
+
 // ===== traceMethod 脚本 =====
 Java.perform(function() {{
     try {{
@@ -1490,6 +1940,8 @@ Java.perform(function() {{
                 try {{
                     (function(over) {{
                         over.implementation = function() {{
+                            {gate_over}
+                            {prof['start']}
                             LOG("\\n*** 进入 " + fullyQualifiedMethodName, {{ c: Color.Green }});
                             
                             {stack_code}
@@ -1502,7 +1954,7 @@ Java.perform(function() {{
                                 }}
                             }}
                             
-                            var retval = over.apply(this, arguments);
+                            var retval = {prof['call']('over')};
                             {return_code}
                             
                             LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
@@ -1514,6 +1966,7 @@ Java.perform(function() {{
                                 return_value: (retval !== undefined && retval !== null) ? String(retval) : "null"
                             }});
                             
+                            {prof['end']}
                             return retval;
                         }};
                     }})(overloads[i]);
@@ -1522,6 +1975,8 @@ Java.perform(function() {{
         }} else {{
             // 兜底：无 overload 信息时直接设置
             wrapper.implementation = function() {{
+                {gate_fallback}
+                {prof['start']}
                 LOG("\\n*** 进入 " + fullyQualifiedMethodName, {{ c: Color.Green }});
                 
                 {stack_code}
@@ -1534,7 +1989,7 @@ Java.perform(function() {{
                     }}
                 }}
                 
-                var retval = this[methodName].apply(this, arguments);
+                var retval = {prof['call']('this[methodName]')};
                 {return_code}
                 
                 LOG("📤 返回值: " + retval, {{ c: Color.Blue }});
@@ -1546,6 +2001,7 @@ Java.perform(function() {{
                     return_value: (retval !== undefined && retval !== null) ? String(retval) : "null"
                 }});
                 
+                {prof['end']}
                 return retval;
             }};
         }}
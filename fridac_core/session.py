@@ -11,6 +11,8 @@ import atexit
 import os
 import time
 import re
+import json
+import shlex
 
 try:
     import rlcompleter
@@ -28,9 +30,17 @@ try:
 except ImportError:
     RICH_AVAILABLE = False
 
-from .logger import log_info, log_success, log_error, log_debug, log_warning, log_exception, get_console, render_structured_event
+from .logger import log_info, log_success, log_error, log_debug, log_warning, log_exception, get_console, render_structured_event, render_binary_event, render_text_message
+from .transport import iter_payloads
+from .hexdump import BinaryPayload, is_binary_message
+from .render_queue import get_render_queue
+from .output_sink import OutputSink, parse_size, parse_duration, DEFAULT_FLUSH_INTERVAL
+from .event_log import EventLog
+from .dispatch import create_default_dispatcher
 from .completer import FridacCompleter, get_prompt_toolkit_available
-from .script_manager import create_frida_script, get_custom_script_manager
+from .script_manager import create_frida_script, get_custom_script_manager, get_build_options, load_lazy_module, LAZY_MODULE_REQUEST, LAZY_MODULE_REPLY
+from .bundle_cache import create_script_cached, invalidate_bytecode, schedule_bytecode_compile
+from .startup_profile import get_startup_profiler, profiled_phase
 from .task_manager import FridaTaskManager, TaskType, TaskStatus
 from .script_templates import ScriptTemplateEngine
 from .smalltrace import get_smalltrace_manager, SmallTraceConfig, parse_offset, analyze_trace_file, QBDITraceAnalyzer
@@ -182,35 +192,56 @@ class FridacSession:
         self.task_manager = None
         self.script_engine = None
         
+        # 自定义脚本热重载（每个变化的文件一个独立脚本）
+        self.hot_reloader = None
+        
         # 输出重定向
         self.output_file = None
         self.output_handle = None
         self.append_mode = False
+        
+        # 结构化事件日志（JSONL / 长度前缀）
+        self.event_log = None
+        
+        # 事件类型分发器（fetch / SO 分析等专用处理器）
+        self.dispatcher = create_default_dispatcher()
+        self.dispatcher.register(LAZY_MODULE_REQUEST, self._on_module_request)
     
-    def setup_output_redirect(self, output_file, append_mode=False):
-        """设置输出重定向到文件"""
+    def setup_output_redirect(self, output_file, append_mode=False, rotate_size=None,
+                              rotate_time=None, compression=None, flush_interval=None):
+        """
+        设置输出重定向到文件
+
+        Args:
+            output_file: 输出文件路径
+            append_mode: 是否追加
+            rotate_size: 按大小轮转（如 100M，按未压缩字节计）
+            rotate_time: 按时间轮转（如 1h）
+            compression: None / 'gzip' / 'zstd'
+            flush_interval: 最长刷新间隔（秒）
+        """
         try:
-            self.output_file = os.path.abspath(output_file)
+            sink = OutputSink(
+                output_file,
+                append_mode=append_mode,
+                rotate_bytes=parse_size(rotate_size),
+                rotate_seconds=parse_duration(rotate_time),
+                compression=compression,
+                flush_interval=DEFAULT_FLUSH_INTERVAL if flush_interval is None else flush_interval,
+            )
+            self.output_file = sink.path
             self.append_mode = append_mode
-            
-            # 创建目录（如果不存在）
-            output_dir = os.path.dirname(self.output_file)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
-            
-            # 打开文件句柄
-            mode = 'a' if append_mode else 'w'
-            self.output_handle = open(self.output_file, mode, encoding='utf-8', buffering=1)  # 行缓冲
+            self.output_handle = sink
             
             # 写入文件头
             if not append_mode or os.path.getsize(self.output_file) == 0:
                 from datetime import datetime
                 timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                self.output_handle.write(f"# fridac Hook Output Log\n")
-                self.output_handle.write(f"# Started at: {timestamp}\n")
-                self.output_handle.write(f"# Mode: {'Append' if append_mode else 'Overwrite'}\n")
-                self.output_handle.write(f"{'='*60}\n\n")
-                self.output_handle.flush()
+                sink.write(f"# fridac Hook Output Log\n")
+                sink.write(f"# Started at: {timestamp}\n")
+                sink.write(f"# Mode: {'Append' if append_mode else 'Overwrite'}\n")
+                sink.write(f"{'='*60}\n\n")
+                sink.flush()
             
             log_success(f"✅ 输出重定向已设置: {self.output_file}")
             
@@ -219,14 +250,38 @@ class FridacSession:
             self.output_file = None
             self.output_handle = None
     
+    def setup_event_log(self, event_file, fmt='jsonl', append_mode=False, rotate_size=None,
+                        rotate_time=None, compression=None, flush_interval=None):
+        """
+        设置结构化事件日志（可与 -o 文本日志同时使用，也可单独使用）
+
+        Args:
+            event_file: 事件日志路径
+            fmt: 'jsonl' 或 'lp'（4 字节大端长度前缀 + JSON）
+            其余参数同 setup_output_redirect
+        """
+        try:
+            self.event_log = EventLog(
+                event_file,
+                fmt=fmt,
+                append_mode=append_mode,
+                rotate_bytes=parse_size(rotate_size),
+                rotate_seconds=parse_duration(rotate_time),
+                compression=compression,
+                flush_interval=DEFAULT_FLUSH_INTERVAL if flush_interval is None else flush_interval,
+            )
+            if self.task_manager:
+                self.task_manager.event_log = self.event_log
+            log_success(f"✅ 结构化事件日志: {self.event_log.path} ({fmt})")
+        except Exception as e:
+            log_error(f"❌ 设置结构化事件日志失败: {e}")
+            self.event_log = None
+    
     def _write_to_output_file(self, content):
-        """写入内容到输出文件"""
+        """写入内容到输出文件（缓冲写入，由 OutputSink 负责刷新与轮转）"""
         if self.output_handle:
             try:
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]  # 毫秒精度
-                self.output_handle.write(f"[{timestamp}] {content}\n")
-                self.output_handle.flush()
+                self.output_handle.write_line(content)
             except Exception as e:
                 log_error(f"写入输出文件失败: {e}")
     
@@ -239,141 +294,83 @@ class FridacSession:
         
     def on_message(self, message, data):
         """处理来自 Frida 脚本的消息并增强日志展示"""
-        console = get_console()
-        
         if message['type'] == 'send':
-            payload = message['payload']
-            # fetch 日志文件处理：识别结构化 fetch 事件
+            # Agent 端批量发送：逐条展开后按原有逻辑处理
+            for payload in iter_payloads(message.get('payload')):
+                self._handle_payload(payload, data)
+        elif message['type'] == 'error':
+            log_error("脚本错误: {}".format(message['description']))
+    
+    def _on_module_request(self, payload, data, task_id, script=None):
+        """
+        按需加载：回传 Agent 请求的模块源码（Agent 端同步等待回复）
+        
+        Args:
+            script: 发出请求的脚本（默认主脚本；热重载脚本需回复到自身，否则其桩函数一直等待）
+        """
+        module = payload.get('module')
+        reply = {'type': LAZY_MODULE_REPLY, 'module': module}
+        try:
+            source = load_lazy_module(module)
+            if source is None:
+                reply['error'] = f"模块不存在: {module}"
+            else:
+                reply['source'] = source
+        except Exception as e:
+            reply['error'] = str(e)
+        script = script or self.script
+        if script is not None:
+            script.post(reply)
+        if 'source' in reply:
+            log_info(f"📦 已按需加载模块: {module}")
+        else:
+            log_error(f"❌ 按需加载模块失败: {reply['error']}")
+        return True
+    
+    def _handle_payload(self, payload, data=None):
+        """处理单条 send() payload（文本日志或结构化事件）"""
+        # 结构化事件日志记录全部消息（含 fetch / SO 分析等专用事件）
+        if self.event_log:
             try:
-                if isinstance(payload, dict) and payload.get('type') in ('fetch_start', 'fetch_request'):
-                    # 初始化日志文件
-                    if not hasattr(self, '_fetch_log_path') or (payload.get('type') == 'fetch_start'):
-                        from datetime import datetime
-                        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        self._fetch_log_path = os.path.abspath(f"fetch_info_{ts}.log")
-                        try:
-                            with open(self._fetch_log_path, 'a', encoding='utf-8') as f:
-                                f.write(f"# fetch log started at {ts}\n")
-                                flt = None
-                                try:
-                                    flt = payload.get('items', {}).get('filter')
-                                except Exception:
-                                    flt = None
-                                if flt:
-                                    f.write(f"# filter: {flt}\n")
-                        except Exception as e:
-                            log_error(f"写入fetch日志文件失败: {e}")
-                        if payload.get('type') == 'fetch_start':
-                            # 不再继续统一渲染，直接返回
-                            return
-                    # 写入请求信息
-                    try:
-                        items = payload.get('items') or {}
-                        method = items.get('method') or 'GET'
-                        url = items.get('url') or ''
-                        headers = items.get('headers') or {}
-                        cookies = items.get('cookies')
-                        python_code = items.get('python') or ''
-                        stack = items.get('stack') or []
-                        from datetime import datetime
-                        tss = datetime.now().strftime('%H:%M:%S')
-                        with open(self._fetch_log_path, 'a', encoding='utf-8') as f:
-                            f.write(f"\n[{tss}] {method} {url}\n")
-                            f.write(f"headers: {headers}\n")
-                            if cookies:
-                                f.write(f"cookies: {cookies}\n")
-                            f.write(f"python: {python_code}\n")
-                            if stack:
-                                f.write("stack:\n")
-                                for frame in stack:
-                                    try:
-                                        f.write(f"  {frame}\n")
-                                    except Exception:
-                                        pass
-                    except Exception as e:
-                        log_error(f"写入fetch请求失败: {e}")
-                    # 同时在控制台结构化展示
-                    try:
-                        render_structured_event(payload)
-                    except Exception:
-                        pass
-                    return
-            except Exception:
-                pass
+                self.event_log.write(payload, data)
+            except Exception as e:
+                log_error(f"写入事件日志失败: {e}")
+        # 专用事件（fetch 抓包 / SO 分析报告等）按类型查表分发，由处理器持有文件句柄
+        if self.dispatcher.dispatch(payload, data):
+            return
 
-            # SO 分析输出文件处理
+        # 统一处理：若是结构化事件对象则走统一渲染，否则保持原有文本输出
+        # 文件输出在消息线程同步完成（不丢失），控制台渲染交给渲染队列
+        render_queue = get_render_queue()
+        try:
+            if is_binary_message(payload, data):
+                # 携带原始字节：hexdump 在宿主端按需生成，文件中记录紧凑十六进制
+                binary = BinaryPayload(payload, data)
+                if self.output_handle:
+                    self._write_to_output_file(f"BINARY_EVENT: {payload} data={binary.hex()}")
+                render_queue.submit(render_binary_event, payload, binary)
+            elif isinstance(payload, dict) and ('type' in payload or 'items' in payload or 'ts' in payload or 'timestamp' in payload):
+                # 同时写入文件（结构化数据转为字符串）
+                if self.output_handle:
+                    self._write_to_output_file(f"STRUCTURED_EVENT: {json.dumps(payload, ensure_ascii=False, default=str)}")
+                render_queue.submit(render_structured_event, payload)
+            else:
+                text = payload if isinstance(payload, str) else str(payload)
+                
+                # 写入输出文件
+                if self.output_handle:
+                    # 移除 ANSI 颜色代码以便文件阅读
+                    clean_text = self._clean_ansi_codes(text)
+                    self._write_to_output_file(clean_text)
+                
+                # 控制台显示
+                render_queue.submit(render_text_message, text)
+        except Exception:
             try:
-                if isinstance(payload, dict) and payload.get('type') == 'so_analysis_output':
-                    output_file = payload.get('outputFile')
-                    content = payload.get('content', '')
-                    so_name = payload.get('soName', 'unknown')
-                    stats = payload.get('stats', {})
-                    
-                    if output_file:
-                        try:
-                            # 确保目录存在
-                            output_dir = os.path.dirname(output_file)
-                            if output_dir and not os.path.exists(output_dir):
-                                os.makedirs(output_dir, exist_ok=True)
-                            
-                            with open(output_file, 'w', encoding='utf-8') as f:
-                                f.write(f"# SO Analysis Report: {so_name}\n")
-                                f.write(f"# Generated at: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                                f.write(f"# Stats: exports={stats.get('totalExports', 0)}, imports={stats.get('totalImports', 0)}, jni_static={stats.get('jniStaticFuncs', 0)}\n")
-                                f.write("\n")
-                                f.write(content)
-                            
-                            log_success(f"📄 SO 分析结果已写入: {output_file}")
-                        except Exception as e:
-                            log_error(f"写入 SO 分析文件失败: {e}")
-                    return
+                print(payload)
             except Exception:
                 pass
 
-            # 统一处理：若是结构化事件对象则走统一渲染，否则保持原有文本输出
-            try:
-                if isinstance(payload, dict) and ('type' in payload or 'items' in payload or 'ts' in payload or 'timestamp' in payload):
-                    render_structured_event(payload)
-                    # 同时写入文件（结构化数据转为字符串）
-                    if self.output_handle:
-                        self._write_to_output_file(f"STRUCTURED_EVENT: {payload}")
-                else:
-                    text = payload if isinstance(payload, str) else str(payload)
-                    
-                    # 写入输出文件
-                    if self.output_handle:
-                        # 移除 ANSI 颜色代码以便文件阅读
-                        clean_text = self._clean_ansi_codes(text)
-                        self._write_to_output_file(clean_text)
-                    
-                    # 控制台显示
-                    if RICH_AVAILABLE and console:
-                        try:
-                            from rich.text import Text
-                            style = None
-                            if text.startswith('✅') or text.startswith('🟢'):
-                                style = 'green'
-                            elif text.startswith('❌') or text.startswith('🔴'):
-                                style = 'red'
-                            elif text.startswith('⚠️') or text.startswith('🟡'):
-                                style = 'yellow'
-                            elif text.startswith('🔍') or text.startswith('📚') or text.startswith('🌐'):
-                                style = 'cyan'
-                            elif text.startswith('🔧') or text.startswith('🎯'):
-                                style = 'bright_white'
-                            console.print(Text(text, style=style or 'white'))
-                        except Exception:
-                            print(payload)
-                    else:
-                        print(payload)
-            except Exception:
-                try:
-                    print(payload)
-                except Exception:
-                    pass
-        elif message['type'] == 'error':
-            log_error("脚本错误: {}".format(message['description']))
-    
     def connect_to_app(self, app_name, spawn_mode=False):
         """连接到目标应用"""
         try:
@@ -382,6 +379,7 @@ class FridacSession:
             
             # 获取 USB 设备并显示进度
             console = get_console()
+            profiler = get_startup_profiler()
             
             if RICH_AVAILABLE and console:
                 with Progress(
@@ -390,14 +388,17 @@ class FridacSession:
                     console=console
                 ) as progress:
                     task = progress.add_task("正在连接设备...", total=None)
-                    self.device = frida.get_usb_device()
+                    with profiler.phase('frida.get_usb_device'):
+                        self.device = frida.get_usb_device()
                     progress.update(task, description="✅ 设备连接成功")
             else:
                 log_info("正在连接设备...")
-                self.device = frida.get_usb_device()
+                with profiler.phase('frida.get_usb_device'):
+                    self.device = frida.get_usb_device()
             
             log_success("连接到设备: {}".format(self.device))
             
+            attach_start = time.perf_counter()
             if spawn_mode:
                 # Spawn 模式 - 注意：先不 resume，等脚本加载完成后再 resume
                 log_info("启动应用: {}".format(app_name))
@@ -466,6 +467,7 @@ class FridacSession:
                 
                 # 将应用拉到前台
                 self._bring_app_to_foreground(app_name)
+            profiler.record('spawn' if spawn_mode else 'attach', attach_start, time.perf_counter())
             
             # 加载并创建脚本
             log_info("正在加载 Frida 脚本...")
@@ -473,7 +475,8 @@ class FridacSession:
             if not js_script:
                 return False
                 
-            self.script = self.target_process.create_script(js_script)
+            # 优先使用缓存的字节码，省去目标进程内的编译
+            self.script, bytecode_key = create_script_cached(self.target_process, js_script)
             self.script.on('message', self.on_message)
             
             # 添加超时保护（使用threading，因为macOS不支持SIGALRM）
@@ -488,8 +491,20 @@ class FridacSession:
             timer = threading.Timer(60.0, timeout_handler)
             timer.start()
             
+            load_start = time.perf_counter()
             try:
-                self.script.load()
+                try:
+                    self.script.load()
+                except Exception as e:
+                    if not bytecode_key or load_timeout:
+                        raise
+                    # 字节码与目标端 Frida 不兼容：删除缓存并回退源码
+                    log_warning(f"⚠️ 缓存字节码加载失败，回退源码加载: {e}")
+                    invalidate_bytecode(bytecode_key)
+                    bytecode_key = None
+                    self.script = self.target_process.create_script(js_script)
+                    self.script.on('message', self.on_message)
+                    self.script.load()
             except Exception as e:
                 timer.cancel()  # 确保先取消定时器
                 error_msg = str(e).lower()
@@ -505,12 +520,30 @@ class FridacSession:
                 return False
             finally:
                 timer.cancel()
+            load_end = time.perf_counter()
+            profiler.record('script.load()', load_start, load_end)
+            
+            load_msg = "⏱️ 脚本加载耗时 {:.0f} ms ({} KB{})".format(
+                (load_end - load_start) * 1000, len(js_script.encode('utf-8')) // 1024,
+                '，字节码' if bytecode_key else '')
+            features, minify = get_build_options()
+            if features is not None or minify:
+                log_info(load_msg)
+            else:
+                log_debug(load_msg)
+            
+            if not bytecode_key:
+                # 后台编译字节码，下次连接直接加载
+                schedule_bytecode_compile(self.target_process, js_script)
             
             # 初始化任务管理器
             self._setup_task_manager()
             
             self.running = True
             log_success("Frida 脚本已加载，会话建立成功!")
+            
+            if os.environ.get('FRIDAC_HOT_RELOAD') == '1':
+                self.start_hot_reload()
             return True
             
         except frida.ProcessNotFoundError:
@@ -842,15 +875,36 @@ class FridacSession:
         except Exception as e:
             log_debug(f"拉起应用失败 (非致命): {e}")
     
+    def start_hot_reload(self):
+        """开启自定义脚本热重载"""
+        custom_manager = get_custom_script_manager()
+        if not custom_manager:
+            log_warning("⚠️ 自定义脚本管理器未初始化（--no-scripts？），无法开启热重载")
+            return False
+        if self.hot_reloader is None:
+            from .hot_reload import HotReloader
+            self.hot_reloader = HotReloader(self, custom_manager, on_reloaded=_refresh_completer)
+        return self.hot_reloader.start()
+    
+    def stop_hot_reload(self):
+        """关闭热重载并卸载热加载的脚本（函数回到主脚本中的版本）"""
+        if self.hot_reloader:
+            self.hot_reloader.stop(unload=True)
+            self.hot_reloader = None
+    
+    @profiled_phase('_setup_task_manager')
     def _setup_task_manager(self):
         """初始化任务管理器"""
         try:
             # 传递会话信息给任务管理器
             self.task_manager = FridaTaskManager(self.target_process)
+            self.task_manager.event_log = self.event_log
+            self.task_manager.dispatcher = self.dispatcher
             
             # 初始化脚本模板引擎
             script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             self.script_engine = ScriptTemplateEngine(script_dir)
+            self.task_manager.script_engine = self.script_engine
             
             log_success("🎯 任务管理器初始化成功")
             
@@ -861,6 +915,70 @@ class FridacSession:
     
     # ===== 新的任务管理命令 =====
     
+    def _generate_task_script(self, task_type, target, options=None):
+        """
+        生成任务脚本
+        
+        Returns:
+            (script_source, description, TaskType)，不支持的类型返回 None
+        """
+        if task_type == "method":
+            class_name, method_name = target.rsplit('.', 1)
+            script_source = self.script_engine.generate_method_hook_script(
+                class_name, method_name, options or {}, 0  # task_id will be set by manager
+            )
+            description = f"Hook方法: {target}"
+            task_type_enum = TaskType.METHOD_HOOK
+        elif task_type == "class":
+            script_source = self.script_engine.generate_class_hook_script(
+                target, options or {}, 0
+            )
+            description = f"Hook类: {target}"
+            task_type_enum = TaskType.CLASS_HOOK
+        elif task_type == "location":
+            hook_type = options.get('hook_type', 'base64')
+            script_source = self.script_engine.generate_location_hook_script(
+                hook_type, options or {}, 0
+            )
+            description = f"定位Hook: {hook_type}"
+            task_type_enum = TaskType.LOCATION_HOOK
+        elif task_type == "native":
+            script_source = self.script_engine.generate_native_hook_script(
+                target, options or {}, 0
+            )
+            description = f"Native Hook: {target}"
+            task_type_enum = TaskType.NATIVE_HOOK
+        # 新增任务类型
+        elif task_type == "trace_class":
+            script_source = self.script_engine.generate_trace_class_script(
+                target, options or {}, 0
+            )
+            description = f"追踪类: {target}"
+            task_type_enum = TaskType.TRACE_CLASS
+        elif task_type == "trace_method":
+            script_source = self.script_engine.generate_trace_method_script(
+                target, options or {}, 0
+            )
+            description = f"追踪方法: {target}"
+            task_type_enum = TaskType.TRACE_METHOD
+        elif task_type == "advanced_trace":
+            script_source = self.script_engine.generate_advanced_trace_script(
+                target, options or {}, 0
+            )
+            description = f"高级追踪: {target}"
+            task_type_enum = TaskType.ADVANCED_TRACE
+        elif task_type == "network_fetch":
+            filter_str = options.get('filter', '') if options else ''
+            script_source = self.script_engine.generate_network_fetch_script(
+                filter_str, options or {}, 0
+            )
+            description = f"网络抓包: {filter_str or '全部'}"
+            task_type_enum = TaskType.NETWORK_FETCH
+        else:
+            log_error(f"❌ 不支持的任务类型: {task_type}")
+            return None
+        return script_source, description, task_type_enum
+    
     def create_hook_task(self, task_type, target, options=None):
         """创建Hook任务"""
         if not self.task_manager or not self.script_engine:
@@ -868,62 +986,10 @@ class FridacSession:
             return -1
         
         try:
-            # 生成脚本
-            if task_type == "method":
-                class_name, method_name = target.rsplit('.', 1)
-                script_source = self.script_engine.generate_method_hook_script(
-                    class_name, method_name, options or {}, 0  # task_id will be set by manager
-                )
-                description = f"Hook方法: {target}"
-                task_type_enum = TaskType.METHOD_HOOK
-            elif task_type == "class":
-                script_source = self.script_engine.generate_class_hook_script(
-                    target, options or {}, 0
-                )
-                description = f"Hook类: {target}"
-                task_type_enum = TaskType.CLASS_HOOK
-            elif task_type == "location":
-                hook_type = options.get('hook_type', 'base64')
-                script_source = self.script_engine.generate_location_hook_script(
-                    hook_type, options or {}, 0
-                )
-                description = f"定位Hook: {hook_type}"
-                task_type_enum = TaskType.LOCATION_HOOK
-            elif task_type == "native":
-                script_source = self.script_engine.generate_native_hook_script(
-                    target, options or {}, 0
-                )
-                description = f"Native Hook: {target}"
-                task_type_enum = TaskType.NATIVE_HOOK
-            # 新增任务类型
-            elif task_type == "trace_class":
-                script_source = self.script_engine.generate_trace_class_script(
-                    target, options or {}, 0
-                )
-                description = f"追踪类: {target}"
-                task_type_enum = TaskType.TRACE_CLASS
-            elif task_type == "trace_method":
-                script_source = self.script_engine.generate_trace_method_script(
-                    target, options or {}, 0
-                )
-                description = f"追踪方法: {target}"
-                task_type_enum = TaskType.TRACE_METHOD
-            elif task_type == "advanced_trace":
-                script_source = self.script_engine.generate_advanced_trace_script(
-                    target, options or {}, 0
-                )
-                description = f"高级追踪: {target}"
-                task_type_enum = TaskType.ADVANCED_TRACE
-            elif task_type == "network_fetch":
-                filter_str = options.get('filter', '') if options else ''
-                script_source = self.script_engine.generate_network_fetch_script(
-                    filter_str, options or {}, 0
-                )
-                description = f"网络抓包: {filter_str or '全部'}"
-                task_type_enum = TaskType.NETWORK_FETCH
-            else:
-                log_error(f"❌ 不支持的任务类型: {task_type}")
+            generated = self._generate_task_script(task_type, target, options)
+            if generated is None:
                 return -1
+            script_source, description, task_type_enum = generated
             
             # 创建任务
             task_id = self.task_manager.create_task(
@@ -935,7 +1001,36 @@ class FridacSession:
         except Exception as e:
             log_error(f"❌ 创建任务失败: {e}")
             return -1
-    
+
+    def create_hook_tasks(self, task_type, targets, options=None):
+        """
+        批量创建同类型Hook任务（脚本并发编译/加载，结束后统一汇报）
+
+        Returns:
+            [(target, task_id 或 -1, 错误信息)]
+        """
+        if not self.task_manager or not self.script_engine:
+            log_error("❌ 任务管理器未初始化")
+            return []
+
+        specs = []
+        results = []
+        for target in targets:
+            try:
+                generated = self._generate_task_script(task_type, target, options)
+            except Exception as e:
+                results.append((target, -1, f"生成脚本失败: {e}"))
+                continue
+            if generated is None:
+                results.append((target, -1, f"不支持的任务类型: {task_type}"))
+                continue
+            script_source, description, task_type_enum = generated
+            specs.append((task_type_enum, target, script_source, description, dict(options or {})))
+
+        results.extend(self.task_manager.create_tasks(specs))
+        self.task_manager.show_batch_report(results)
+        return results
+
     def list_tasks(self, status_filter=None):
         """列出所有任务"""
         if not self.task_manager:
@@ -996,6 +1091,11 @@ class FridacSession:
         """从目标断开并做善后清理（优先快速、避免卡死）"""
         self.running = False
 
+        # 0) 停止脚本监视（热加载的脚本随会话分离一并销毁）
+        if self.hot_reloader:
+            self.hot_reloader.stop(unload=False)
+            self.hot_reloader = None
+
         detach_ok = False
         # 1) 优先分离进程（detach 会隐式销毁所有脚本，避免逐个 unload 卡住）
         if self.target_process:
@@ -1026,7 +1126,23 @@ class FridacSession:
             except Exception as e:
                 log_error(f"清理任务时出错: {e}")
 
-        # 4) 关闭输出文件
+        # 4) 排空渲染队列，确保断开前的输出都已显示
+        try:
+            get_render_queue().stop(timeout=2.0)
+        except Exception:
+            pass
+
+        # 5) 关闭专用处理器句柄、事件日志与输出文件
+        self.dispatcher.close()
+        if self.event_log:
+            try:
+                self.event_log.close()
+                log_info(f"📁 事件日志已关闭: {self.event_log.path} ({self.event_log.records} 条)")
+            except Exception as e:
+                log_error(f"关闭事件日志失败: {e}")
+            finally:
+                self.event_log = None
+
         if self.output_handle:
             try:
                 from datetime import datetime
@@ -1049,6 +1165,8 @@ def run_interactive_session(session):
     # 检测是否可以使用 prompt_toolkit
     use_prompt_toolkit = False
     pt_session = None
+    profiler = get_startup_profiler()
+    prompt_setup_start = time.perf_counter()
     completer = FridacCompleter()
     
     try:
@@ -1069,6 +1187,7 @@ def run_interactive_session(session):
     if not use_prompt_toolkit:
         # 回退到 readline 模式
         setup_history()
+    profiler.record('提示符初始化', prompt_setup_start, time.perf_counter())
     
     # 显示交互模式提示信息
     if RICH_AVAILABLE and console:
@@ -1079,6 +1198,8 @@ def run_interactive_session(session):
     # 非交互环境降级提示
     if not stdin_is_tty:
         log_warning("检测到非交互输入环境（可能通过管道或不支持的终端运行），输入将降级处理。建议直接在终端运行 fridac 以获得最佳体验。")
+    
+    profiler.report()
 
     # 简单的输入读取封装（readline 模式），处理 OSError(Errno 22) 等异常
     def _read_user_input_readline(prompt: str) -> str:
@@ -1149,6 +1270,106 @@ def run_interactive_session(session):
             log_info("正在退出...")
             break
 
+_BOOL_ARGS = ('true', 'false', '1', '0', 'yes', 'no')
+
+
+_GATE_OPTIONS = ('max_per_sec', 'sample', 'auto_pause_after')
+
+
+def _parse_gate_option(key, value):
+    """解析节流选项值；sample 支持 1/N 写法"""
+    if key == 'sample' and '/' in value:
+        numerator, denominator = value.split('/', 1)
+        if int(numerator) != 1:
+            raise ValueError(f"sample 只支持 1/N: {value}")
+        value = denominator
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"{key} 不能为负数: {value}")
+    return number
+
+
+def _parse_hook_targets(parts):
+    """
+    解析 hook/trace 命令参数：
+    <target> [<target> ...] [show_stack] [stack_lines] [max_per_sec=N] [sample=1/N] [auto_pause_after=N]
+
+    布尔值与数字视为选项，key=value 为节流选项，其余均为目标（类名/方法名/函数名不会是纯数字）
+
+    Returns:
+        (targets, options)
+    """
+    targets = []
+    flags = []
+    gate = {}
+    for arg in parts[1:]:
+        key, sep, value = arg.partition('=')
+        if sep and key.lower() in _GATE_OPTIONS:
+            try:
+                gate[key.lower()] = _parse_gate_option(key.lower(), value)
+            except ValueError as e:
+                log_warning(f"⚠️ 忽略无效选项 {arg}: {e}")
+            continue
+        if arg.lower() in _BOOL_ARGS or arg.isdigit():
+            flags.append(arg)
+        else:
+            targets.append(arg)
+    show_stack = bool(flags) and flags[0].lower() in ['true', '1', 'yes']
+    options = {'show_stack': show_stack}
+    if len(flags) > 1:
+        try:
+            options['stack_lines'] = int(flags[1])
+        except Exception:
+            pass
+    options.update(gate)
+    return targets, options
+
+
+def _parse_task_events_args(user_input):
+    """
+    解析 taskevents 参数（支持引号包裹的 --grep 模式）
+    
+    Returns:
+        (task_id, last, pattern, event_type, clear)，参数非法时返回 None
+    """
+    try:
+        parts = shlex.split(user_input)
+    except ValueError:
+        parts = user_input.split()
+    if len(parts) < 2:
+        return None
+    try:
+        task_id = int(parts[1])
+    except ValueError:
+        return None
+    
+    last, pattern, event_type, clear = 50, None, None, False
+    i = 2
+    while i < len(parts):
+        arg = parts[i]
+        if arg == '--clear':
+            clear = True
+            i += 1
+            continue
+        if arg not in ('--last', '--grep', '--type') or i + 1 >= len(parts):
+            return None
+        value = parts[i + 1]
+        if arg == '--last':
+            if value.lower() == 'all':
+                last = None
+            else:
+                try:
+                    last = max(0, int(value))
+                except ValueError:
+                    return None
+        elif arg == '--grep':
+            pattern = value
+        else:
+            event_type = value
+        i += 2
+    return task_id, last, pattern, event_type, clear
+
+
 def _handle_task_commands(session, user_input):
     """
     处理新的任务管理命令
@@ -1224,23 +1445,118 @@ def _handle_task_commands(session, user_input):
         session.show_task_stats()
         return True
     
+    # 渲染队列统计 / 策略调整
+    elif cmd == 'renderstats':
+        render_queue = get_render_queue()
+        if len(parts) > 1 and parts[1].lower() == 'reset':
+            render_queue.reset_stats()
+            log_success("✅ 渲染统计已清零")
+        else:
+            render_queue.show_stats()
+        return True
+    
+    elif cmd == 'renderpolicy':
+        if len(parts) < 2:
+            log_error("❌ 用法: renderpolicy <block|drop-oldest|drop-newest|sample> [queue_size] [sample_rate]")
+            return True
+        try:
+            max_size = int(parts[2]) if len(parts) > 2 else None
+            sample_rate = int(parts[3]) if len(parts) > 3 else None
+        except ValueError:
+            log_error("❌ 队列容量和采样间隔必须是数字")
+            return True
+        if get_render_queue().configure(parts[1].lower(), max_size, sample_rate):
+            log_success(f"✅ 渲染策略已切换: {parts[1].lower()}")
+        else:
+            log_error(f"❌ 未知的渲染策略: {parts[1]}")
+        return True
+    
+    # 控制台重复输出合并
+    elif cmd == 'coalesce':
+        coalescer = get_render_queue().coalescer
+        if len(parts) < 2:
+            log_info(f"当前合并模式: {coalescer.mode} (已合并 {coalescer.coalesced} 条)")
+            log_info("用法: coalesce <off|exact|template>")
+            return True
+        if coalescer.set_mode(parts[1].lower()):
+            log_success(f"✅ 重复输出合并: {parts[1].lower()}")
+        else:
+            log_error(f"❌ 未知的合并模式: {parts[1]}")
+        return True
+    
+    elif cmd in ['taskprof', 'jobprof']:
+        if not session.task_manager:
+            log_error("❌ 任务管理器未初始化")
+            return True
+        sort_by = parts[1].lower() if len(parts) > 1 else 'latency'
+        if sort_by in ['on', 'off']:
+            # 开销统计在生成 Hook 时注入，只影响之后创建的任务
+            os.environ['FRIDAC_TASK_PROFILE'] = '1' if sort_by == 'on' else ''
+            log_success(f"✅ 任务开销统计已{'开启' if sort_by == 'on' else '关闭'} (对之后创建的任务生效)")
+            return True
+        if sort_by not in ['latency', 'rate']:
+            log_error("❌ 用法: taskprof [latency|rate|on|off]")
+            return True
+        session.task_manager.show_profile(sort_by)
+        return True
+    
+    elif cmd in ['taskevents', 'jobevents']:
+        if not session.task_manager:
+            log_error("❌ 任务管理器未初始化")
+            return True
+        parsed = _parse_task_events_args(user_input)
+        if parsed is None:
+            log_error("❌ 用法: taskevents <task_id> [--last N] [--grep 正则] [--type 类型] [--clear]")
+            return True
+        task_id, last, pattern, event_type, clear = parsed
+        if clear:
+            session.task_manager.event_buffer.clear(task_id)
+            log_success(f"✅ 已清空任务 #{task_id} 的事件缓冲")
+        else:
+            session.task_manager.show_task_events(task_id, last=last, pattern=pattern, event_type=event_type)
+        return True
+    
+    elif cmd == 'hotreload':
+        action = parts[1].lower() if len(parts) > 1 else 'status'
+        if action == 'on':
+            session.start_hot_reload()
+        elif action == 'off':
+            session.stop_hot_reload()
+            log_success("✅ 脚本热重载已关闭，热加载的脚本已卸载")
+        elif action == 'status':
+            reloader = session.hot_reloader
+            if not reloader or not reloader.running:
+                log_info("♻️ 脚本热重载未开启 (hotreload on 开启)")
+            else:
+                log_info(f"♻️ 脚本热重载运行中 ({reloader.watcher.backend.name})，已热加载 {len(reloader.scripts)} 个脚本")
+                for line in reloader.status():
+                    log_info(f"  {line}")
+        else:
+            log_error("❌ 用法: hotreload <on|off|status>")
+        return True
+    
+    elif cmd == 'hitevents':
+        if not session.task_manager:
+            log_error("❌ 任务管理器未初始化")
+            return True
+        if len(parts) < 2 or parts[1].lower() not in ['on', 'off']:
+            log_error("❌ 用法: hitevents <on|off>")
+            return True
+        enabled = parts[1].lower() == 'on'
+        updated = session.task_manager.set_hit_events(enabled)
+        log_success(f"✅ 逐次命中事件已{'开启' if enabled else '关闭'} ({updated} 个脚本)，命中计数不受影响")
+        return True
+    
     # traceclass - 使用新任务系统创建类追踪任务
     elif cmd == 'traceclass':
-        if len(parts) < 2:
-            log_error("❌ 用法: traceclass <classname> [show_stack] [stack_lines]")
+        targets, options = _parse_hook_targets(parts)
+        if not targets:
+            log_error("❌ 用法: traceclass <classname> [<classname> ...] [show_stack] [stack_lines]")
             return True
-        target = parts[1]
-        show_stack = len(parts) > 2 and parts[2].lower() in ['true', '1', 'yes']
-        stack_lines = None
-        if len(parts) > 3:
-            try:
-                stack_lines = int(parts[3])
-            except Exception:
-                stack_lines = None
-        options = {'show_stack': show_stack}
-        if stack_lines is not None:
-            options['stack_lines'] = stack_lines
-        task_id = session.create_hook_task('trace_class', target, options)
+        if len(targets) > 1:
+            session.create_hook_tasks('trace_class', targets, options)
+            return True
+        task_id = session.create_hook_task('trace_class', targets[0], options)
         if task_id > 0:
             log_success(f"✅ 类追踪任务已创建: #{task_id}")
         else:
@@ -1249,21 +1565,14 @@ def _handle_task_commands(session, user_input):
     
     # tracemethod - 使用新任务系统创建方法追踪任务
     elif cmd == 'tracemethod':
-        if len(parts) < 2:
-            log_error("❌ 用法: tracemethod <class.method> [show_stack] [stack_lines]")
+        targets, options = _parse_hook_targets(parts)
+        if not targets:
+            log_error("❌ 用法: tracemethod <class.method> [<class.method> ...] [show_stack] [stack_lines]")
             return True
-        target = parts[1]
-        show_stack = len(parts) > 2 and parts[2].lower() in ['true', '1', 'yes']
-        stack_lines = None
-        if len(parts) > 3:
-            try:
-                stack_lines = int(parts[3])
-            except Exception:
-                stack_lines = None
-        options = {'show_stack': show_stack}
-        if stack_lines is not None:
-            options['stack_lines'] = stack_lines
-        task_id = session.create_hook_task('trace_method', target, options)
+        if len(targets) > 1:
+            session.create_hook_tasks('trace_method', targets, options)
+            return True
+        task_id = session.create_hook_task('trace_method', targets[0], options)
         if task_id > 0:
             log_success(f"✅ 方法追踪任务已创建: #{task_id}")
         else:
@@ -1287,61 +1596,40 @@ def _handle_task_commands(session, user_input):
 
     # 创建Hook任务的简化命令
     elif cmd == 'hookmethod':
-        if len(parts) < 2:
-            log_error("❌ 用法: hookmethod <class.method> [show_stack]")
+        targets, options = _parse_hook_targets(parts)
+        if not targets:
+            log_error("❌ 用法: hookmethod <class.method> [<class.method> ...] [show_stack]")
             return True
-        target = parts[1]
-        show_stack = len(parts) > 2 and parts[2].lower() in ['true', '1', 'yes']
-        stack_lines = None
-        if len(parts) > 3:
-            try:
-                stack_lines = int(parts[3])
-            except Exception:
-                stack_lines = None
-        options = {'show_stack': show_stack}
-        if stack_lines is not None:
-            options['stack_lines'] = stack_lines
-        task_id = session.create_hook_task('method', target, options)
+        if len(targets) > 1:
+            session.create_hook_tasks('method', targets, options)
+            return True
+        task_id = session.create_hook_task('method', targets[0], options)
         if task_id > 0:
             log_success(f"✅ 方法Hook任务已创建: #{task_id}")
         return True
     
     elif cmd == 'hookclass':
-        if len(parts) < 2:
-            log_error("❌ 用法: hookclass <classname> [show_stack]")
+        targets, options = _parse_hook_targets(parts)
+        if not targets:
+            log_error("❌ 用法: hookclass <classname> [<classname> ...] [show_stack]")
             return True
-        target = parts[1]
-        show_stack = len(parts) > 2 and parts[2].lower() in ['true', '1', 'yes']
-        stack_lines = None
-        if len(parts) > 3:
-            try:
-                stack_lines = int(parts[3])
-            except Exception:
-                stack_lines = None
-        options = {'show_stack': show_stack}
-        if stack_lines is not None:
-            options['stack_lines'] = stack_lines
-        task_id = session.create_hook_task('class', target, options)
+        if len(targets) > 1:
+            session.create_hook_tasks('class', targets, options)
+            return True
+        task_id = session.create_hook_task('class', targets[0], options)
         if task_id > 0:
             log_success(f"✅ 类Hook任务已创建: #{task_id}")
         return True
     
     elif cmd == 'hooknative':
-        if len(parts) < 2:
-            log_error("❌ 用法: hooknative <function_name> [show_stack]")
+        targets, options = _parse_hook_targets(parts)
+        if not targets:
+            log_error("❌ 用法: hooknative <function_name> [<function_name> ...] [show_stack]")
             return True
-        target = parts[1]
-        show_stack = len(parts) > 2 and parts[2].lower() in ['true', '1', 'yes']
-        stack_lines = None
-        if len(parts) > 3:
-            try:
-                stack_lines = int(parts[3])
-            except Exception:
-                stack_lines = None
-        options = {'show_stack': show_stack}
-        if stack_lines is not None:
-            options['stack_lines'] = stack_lines
-        task_id = session.create_hook_task('native', target, options)
+        if len(targets) > 1:
+            session.create_hook_tasks('native', targets, options)
+            return True
+        task_id = session.create_hook_task('native', targets[0], options)
         if task_id > 0:
             log_success(f"✅ Native Hook任务已创建: #{task_id}")
         return True
@@ -1919,13 +2207,20 @@ def _show_task_help():
             ("killall [type]", "终止所有任务", "killall, killall method_hook"),
             ("taskinfo <id>", "显示任务详情", "taskinfo 1"),
             ("taskstats", "显示任务统计", "taskstats"),
+            ("renderstats [reset]", "渲染队列统计(丢弃/已渲染)", "renderstats"),
+            ("renderpolicy <policy>", "切换渲染队列溢出策略", "renderpolicy sample 5000 10"),
+            ("coalesce <mode>", "合并连续重复输出(xN)", "coalesce template"),
+            ("taskprof [latency|rate|on|off]", "任务插桩开销排行(on 开启统计)", "taskprof on, taskprof rate"),
+            ("taskevents <id> [--last N] [--grep 正则]", "检索任务最近事件(内存缓冲)", "taskevents 3 --last 200 --grep token"),
+            ("hitevents <on|off>", "开关逐次 task_hit 事件(计数照常)", "hitevents off"),
+            ("hotreload <on|off|status>", "监视脚本目录，变化文件即时热加载", "hotreload on"),
             # 类/方法追踪
             ("traceclass", "追踪类的所有方法", "traceclass com.app.Main true"),
             ("tracemethod", "追踪特定方法", "tracemethod com.app.Class.method true"),
             ("advancedtrace", "高级追踪(带字段)", "advancedtrace com.app.Class.method true"),
             # Hook 任务
             ("hookmethod", "创建方法Hook任务", "hookmethod com.app.Class.method true"),
-            ("hookclass", "创建类Hook任务", "hookclass com.app.MainActivity"),
+            ("hookclass", "创建类Hook任务(可多个类并发创建)", "hookclass com.app.A com.app.B"),
             ("hooknative", "创建Native Hook任务", "hooknative open true"),
             # 定位 Hook
             ("hookbase64", "Base64 Hook", "hookbase64 true"),
@@ -1954,6 +2249,8 @@ def _show_task_help():
         console.print(help_table)
         console.print()
         console.print("💡 [yellow]提示[/yellow]: 所有命令支持 [show_stack] [stack_lines] 参数控制调用栈显示")
+        console.print("🐢 [yellow]节流[/yellow]: hookmethod/hookclass/traceclass/tracemethod 支持 max_per_sec=N sample=1/N auto_pause_after=N")
+        console.print("📦 [yellow]批量[/yellow]: traceclass/tracemethod/hookclass/hookmethod/hooknative 可一次给出多个目标，脚本并发加载")
         console.print("🗑️  [yellow]优势[/yellow]: 基于脚本隔离的任务系统，killall 可以真正清理所有Hook")
         console.print()
     else:
@@ -1965,6 +2262,13 @@ def _show_task_help():
         log_info("  killall [type]  - 终止所有任务")
         log_info("  taskinfo <id>   - 显示任务详情")
         log_info("  taskstats       - 显示任务统计")
+        log_info("  renderstats     - 渲染队列统计 (reset 清零)")
+        log_info("  renderpolicy    - 切换渲染策略 (block/drop-oldest/drop-newest/sample)")
+        log_info("  coalesce <mode> - 合并连续重复输出 (off/exact/template)")
+        log_info("  taskprof [rate|on|off] - 任务插桩开销排行 (附加延迟 / 调用频率，on 开启统计)")
+        log_info("  taskevents <id> [--last N] [--grep 正则] [--type 类型] - 检索任务最近事件")
+        log_info("  hitevents <on|off> - 开关逐次命中事件 (命中计数照常)")
+        log_info("  hotreload <on|off|status> - 脚本变化时即时热加载 (无需重连)")
         log_info("")
         log_info("🔍 类/方法追踪:")
         log_info("  traceclass <class> [show_stack]     - 追踪类的所有方法")
@@ -1975,6 +2279,8 @@ def _show_task_help():
         log_info("  hookmethod <class.method> [stack]   - 方法Hook")
         log_info("  hookclass <class> [stack]           - 类Hook")
         log_info("  hooknative <func> [stack]           - Native Hook")
+        log_info("  (以上命令可一次给出多个目标并发创建，如 hookclass A B C true)")
+        log_info("  (节流选项: max_per_sec=N sample=1/N auto_pause_after=N)")
         log_info("")
         log_info("📍 定位Hook:")
         log_info("  hookbase64, hooktoast, hookurl, hookhashmap,")
@@ -2029,6 +2335,17 @@ def _show_basic_interactive_info():
     print("退出: q 或 exit")
     print("="*50 + "\n")
 
+def _refresh_completer():
+    """自定义函数变化后更新补全器"""
+    try:
+        completer = FridacCompleter()
+        completer.reload_custom_functions()
+        readline.set_completer(completer.complete)
+        log_debug("✅ 补全器已更新")
+    except Exception as e:
+        log_warning(f"⚠️ 更新补全器失败: {e}")
+
+
 def _handle_reload_scripts():
     """处理脚本重载命令"""
     try:
@@ -2036,15 +2353,7 @@ def _handle_reload_scripts():
         if custom_manager:
             count = custom_manager.reload_scripts()
             log_success(f"🔄 已重新加载 {count} 个自定义脚本")
-            
-            # 更新补全器
-            try:
-                completer = FridacCompleter()
-                completer.reload_custom_functions()
-                readline.set_completer(completer.complete)
-                log_debug("✅ 补全器已更新")
-            except Exception as e:
-                log_warning(f"⚠️ 更新补全器失败: {e}")
+            _refresh_completer()
         else:
             log_warning("⚠️ 自定义脚本管理器未初始化")
     except Exception as e:
@@ -2425,6 +2734,11 @@ def _handle_custom_function_command(session, cmd, parts):
             # 无参数
             js_call = f"{cmd}()"
         
+        # 热重载过的函数在其独立脚本中执行（主脚本中仍是旧版本）
+        if session.hot_reloader and session.hot_reloader.handles(cmd):
+            session.hot_reloader.call(cmd, js_call)
+            return True
+        
         # 如果函数支持任务管理，创建任务
         if custom_function.task_capable and session.task_manager and session.script_engine:
             try:
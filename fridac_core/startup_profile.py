@@ -0,0 +1,135 @@
+"""
+fridac 启动阶段计时模块
+--profile-startup 时记录启动各阶段耗时（导入与参数解析、环境检测、设备连接、
+spawn/attach、脚本拼装与加载、任务管理器与提示符初始化），进入 REPL 前输出分解，
+可选写入 JSON 以便跨版本跟踪首个 Hook 可用前的耗时
+
+FRIDAC_PROFILE_STARTUP=1 开启，值为路径时同时写入 JSON
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .logger import log_info, log_success, log_warning
+
+
+class StartupProfiler:
+    """启动阶段计时器（未开启时各方法为空操作）"""
+
+    def __init__(self):
+        self.enabled = False
+        self.json_path = None  # type: Optional[str]
+        self.origin = time.perf_counter()
+        self.phases = []  # type: List[Dict[str, Any]]
+        self.annotations = {}  # type: Dict[str, Any]
+        self._depth = threading.local()
+        self._reported = False
+
+    def enable(self, json_path: Optional[str] = None, origin: Optional[float] = None):
+        """
+        开启计时
+
+        Args:
+            json_path: 分解结果写入的 JSON 路径（可选）
+            origin: 计时起点（perf_counter 值，默认为当前）
+        """
+        self.enabled = True
+        self.json_path = json_path or None
+        if origin is not None:
+            self.origin = origin
+
+    def record(self, name: str, start: float, end: float, depth: Optional[int] = None):
+        """记录一个已完成的阶段（start / end 为 perf_counter 值）"""
+        if not self.enabled:
+            return
+        self.phases.append({
+            'name': name,
+            'depth': getattr(self._depth, 'value', 0) if depth is None else depth,
+            'start_ms': round((start - self.origin) * 1000, 1),
+            'duration_ms': round((end - start) * 1000, 1),
+        })
+
+    @contextmanager
+    def phase(self, name: str):
+        """计时一个阶段（可嵌套，嵌套阶段缩进显示）"""
+        if not self.enabled:
+            yield
+            return
+        depth = getattr(self._depth, 'value', 0)
+        self._depth.value = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth.value = depth
+            self.record(name, start, time.perf_counter(), depth)
+
+    def annotate(self, key: str, value: Any):
+        """附加一项指标（如脚本包大小）"""
+        if self.enabled:
+            self.annotations[key] = value
+
+    def report(self):
+        """输出启动耗时分解（只输出一次），并按需写入 JSON"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        total_ms = round((time.perf_counter() - self.origin) * 1000, 1)
+        phases = sorted(self.phases, key=lambda p: p['start_ms'])
+
+        log_info("⏱️  启动耗时分解:")
+        for item in phases:
+            indent = '  ' * (item['depth'] + 1)
+            share = item['duration_ms'] / total_ms * 100 if total_ms else 0
+            log_info(f"{indent}{item['name']:<32} {item['duration_ms']:>9.1f} ms  {share:5.1f}%")
+        for key, value in self.annotations.items():
+            log_info(f"  {key}: {value}")
+        log_success(f"⏱️  进入交互前总耗时: {total_ms:.1f} ms")
+
+        if self.json_path:
+            result = {
+                'total_ms': total_ms,
+                'phases': phases,
+                'annotations': self.annotations,
+                'timestamp': int(time.time()),
+            }
+            try:
+                with open(self.json_path, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2)
+                log_info(f"📝 启动耗时已写入: {self.json_path}")
+            except OSError as e:
+                log_warning(f"⚠️ 写入启动耗时失败: {e}")
+
+
+_profiler = None  # type: Optional[StartupProfiler]
+_profiler_lock = threading.Lock()
+
+
+def get_startup_profiler() -> StartupProfiler:
+    """获取全局启动计时器（按 FRIDAC_PROFILE_STARTUP 初始化）"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                profiler = StartupProfiler()
+                value = os.environ.get('FRIDAC_PROFILE_STARTUP', '')
+                if value:
+                    profiler.enable(None if value == '1' else value)
+                _profiler = profiler
+    return _profiler
+
+
+def profiled_phase(name: str):
+    """装饰器：将函数调用记为一个启动阶段"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_startup_profiler().phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -3,13 +3,35 @@ fridacli 多脚本任务管理器
 基于 Frida Script 隔离的真正任务管理实现
 """
 
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional, List, Any
-from dataclasses import dataclass
+from typing import Dict, Optional, List, Any, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
-from .logger import log_info, log_success, log_warning, log_error, get_console, render_structured_event
+from .logger import log_info, log_success, log_warning, log_error, render_structured_event, render_binary_event, render_text_message
+from .transport import iter_payloads
+from .hexdump import BinaryPayload, is_binary_message
+from .render_queue import get_render_queue
+from .event_buffer import TaskEventBuffer, KIND_BINARY, KIND_TEXT
+from .bundle_cache import create_script_cached, invalidate_bytecode, schedule_bytecode_compile
+
+# 批量创建任务时的并发数（create_script/load 主要在 frida-core 中等待，释放 GIL）
+DEFAULT_BATCH_WORKERS = 8
+
+# 任务脚本模式：shared 为共享运行时（基础函数只加载一次），isolated 为每任务独立脚本
+RUNTIME_SHARED = 'shared'
+RUNTIME_ISOLATED = 'isolated'
+TASK_ENVELOPE_TYPE = '__fridac_task'
+
+# 命中计数拉取间隔（秒）
+DEFAULT_HIT_POLL_INTERVAL = 1.0
+
+# 单个任务卸载的最长等待（秒）
+DEFAULT_UNLOAD_TIMEOUT = 3.0
 
 class TaskType(Enum):
     """任务类型枚举"""
@@ -49,15 +71,22 @@ class TaskInfo:
     error_message: Optional[str] = None
     hit_count: int = 0
     last_hit: Optional[datetime] = None
+    shared: bool = False  # 是否运行在共享任务运行时中
+    # 节流状态（max_per_sec / sample / auto_pause_after，由命中计数拉取同步）
+    suppressed: int = 0
+    throttled: bool = False
+    paused: bool = False
+    # Hook 开销统计（Agent 端累计：calls / total / original 毫秒 / since 起始时间戳）
+    profile: Dict[str, Any] = field(default_factory=dict)
 
 class FridaTaskManager:
     """
     Frida 多脚本任务管理器
     
     核心特性：
-    1. 每个任务创建独立的 Frida Script
-    2. 任务完全隔离，互不干扰
-    3. 通过 script.unload() 实现真正的清理
+    1. 任务默认注册到共享运行时脚本，只提交 Hook 主体；无法共享时退回独立 Frida Script
+    2. 任务互不干扰，运行时按任务记录其安装的 Hook
+    3. 通过 removeTask / script.unload() 实现真正的清理
     4. 保持与现有Hook函数的兼容性
     """
     
@@ -74,8 +103,38 @@ class FridaTaskManager:
         
         self.tasks: Dict[int, TaskInfo] = {}
         self.next_task_id = 1
+        self._id_lock = threading.Lock()
+        
+        # 结构化事件日志与专用事件分发器（由 FridacSession 设置）
+        self.event_log = None
+        self.dispatcher = None
+        
+        # 共享任务运行时（由 FridacSession 设置 script_engine 后按需加载）
+        self.script_engine = None
+        self.runtime_mode = os.environ.get('FRIDAC_TASK_RUNTIME', '') or RUNTIME_SHARED
+        self.runtime_script = None
+        self._runtime_failed = False
+        self._runtime_lock = threading.Lock()
+        
+        # Agent 端命中计数：定时批量拉取；已成功拉取过的任务不再按消息计数
+        try:
+            self.hit_poll_interval = float(os.environ.get('FRIDAC_HIT_POLL_MS', '') or DEFAULT_HIT_POLL_INTERVAL * 1000) / 1000.0
+        except ValueError:
+            self.hit_poll_interval = DEFAULT_HIT_POLL_INTERVAL
+        self._polled_tasks = set()
+        # 每任务最近事件的内存环形缓冲（taskevents 检索）
+        self.event_buffer = TaskEventBuffer.from_env()
         
-        log_info("🎯 任务管理器已初始化 (多脚本隔离模式)")
+        try:
+            self.unload_timeout = float(os.environ.get('FRIDAC_UNLOAD_TIMEOUT', '') or DEFAULT_UNLOAD_TIMEOUT)
+        except ValueError:
+            self.unload_timeout = DEFAULT_UNLOAD_TIMEOUT
+        self._poll_lock = threading.Lock()
+        self._poll_stop = threading.Event()
+        self._poll_thread = None  # type: Optional[threading.Thread]
+        
+        mode = '共享运行时' if self.runtime_mode == RUNTIME_SHARED else '多脚本隔离'
+        log_info(f"🎯 任务管理器已初始化 ({mode}模式)")
     
     def create_task(self, task_type: TaskType, target: str, script_source: str, 
                    description: str = "", options: Dict[str, Any] = None) -> int:
@@ -92,85 +151,367 @@ class FridaTaskManager:
         Returns:
             任务 ID，失败返回 -1
         """
-        if options is None:
-            options = {}
-            
-        task_id = self.next_task_id
-        self.next_task_id += 1
-        
+        task_id = self._allocate_task_id()
         try:
-            # 创建独立脚本（重用主 session 以避免重复 attach）
-            script_source_with_id = script_source.replace('var TASK_ID = 0;', f'var TASK_ID = {task_id};')
-            script = self.main_session.create_script(script_source_with_id)
-            
-            # 设置消息处理（可扩展）
-            def on_message(message, data):
-                try:
-                    msg_type = message.get('type')
-                    if msg_type == 'send':
-                        payload = message.get('payload')
-                        # 任务统计：识别带 task_id 的结构化消息
-                        if isinstance(payload, dict):
-                            if payload.get('task_id') == task_id:
-                                self._update_task_stats(task_id)
-                            # 使用统一结构化渲染，并附带任务前缀
-                            render_structured_event(payload, task_id=task_id)
-                        else:
-                             # 普通文本日志（来自 LOG）
-                            text = '' if payload is None else str(payload)
-                            console = get_console()
-                            if console:
-                                from rich.text import Text
-                                style = None
-                                if text.startswith('✅') or text.startswith('🟢'):
-                                    style = 'green'
-                                elif text.startswith('❌') or text.startswith('🔴'):
-                                    style = 'red'
-                                elif text.startswith('⚠️') or text.startswith('🟡'):
-                                    style = 'yellow'
-                                elif text.startswith('🔍') or text.startswith('📚') or text.startswith('🌐'):
-                                    style = 'cyan'
-                                elif text.startswith('🔧') or text.startswith('🎯'):
-                                    style = 'bright_white'
-                                console.print(Text(f"[#${task_id}] {text}", style=style or 'white'))
-                            else:
-                                log_info(f"[#${task_id}] {text}")
-                    elif msg_type == 'error':
-                        desc = message.get('description') or message
-                        log_error(f"任务 #{task_id} 脚本错误: {desc}")
-                except Exception as e:
-                    log_error(f"任务 #{task_id} 消息处理失败: {e}")
-            
-            script.on('message', on_message)
-            
-            # 加载脚本
-            script.load()
-            
-            # 创建任务信息
-            task_info = TaskInfo(
-                task_id=task_id,
-                task_type=task_type,
-                target=target,
-                description=description or f"{task_type.value}: {target}",
-                script_handle=script,
-                session_handle=None,  # 重用主session
-                status=TaskStatus.RUNNING,
-                created_at=datetime.now(),
-                options=options
-            )
-            
+            task_info = self._load_task(task_id, task_type, target, script_source, description, options)
             self.tasks[task_id] = task_info
-            
+            self._ensure_hit_poller()
             log_success(f"✅ 任务 #{task_id} 创建成功: {task_info.description}")
             return task_id
-            
+
         except Exception as e:
             log_error(f"❌ 创建任务失败: {e}")
             return -1
-    
+
+    def create_tasks(self, specs: List[Tuple[TaskType, str, str, str, Dict[str, Any]]],
+                     max_workers: int = DEFAULT_BATCH_WORKERS) -> List[Tuple[str, int, Optional[str]]]:
+        """
+        批量创建任务：脚本在线程池中并发 create_script + load
+
+        Args:
+            specs: [(task_type, target, script_source, description, options)]
+            max_workers: 并发数
+
+        Returns:
+            按 specs 顺序的 [(target, task_id 或 -1, 错误信息)]
+        """
+        if not specs:
+            return []
+
+        # 任务ID在提交前按顺序分配，保证编号与输入顺序一致
+        jobs = [(self._allocate_task_id(), spec) for spec in specs]
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))),
+                                thread_name_prefix='fridac-task') as pool:
+            futures = [pool.submit(self._load_task, task_id, *spec) for task_id, spec in jobs]
+            for (task_id, spec), future in zip(jobs, futures):
+                target = spec[1]
+                try:
+                    task_info = future.result()
+                except Exception as e:
+                    results.append((target, -1, str(e)))
+                    continue
+                self.tasks[task_id] = task_info
+                results.append((target, task_id, None))
+        self._ensure_hit_poller()
+        return results
+
+    def show_batch_report(self, results: List[Tuple[str, int, Optional[str]]]):
+        """汇总显示批量创建结果"""
+        ok = sum(1 for _, task_id, _ in results if task_id > 0)
+        log_info(f"\n📦 批量创建任务: 成功 {ok} / {len(results)}")
+        for target, task_id, error in results:
+            if task_id > 0:
+                log_success(f"  ✅ #{task_id} {target}")
+            else:
+                log_error(f"  ❌ {target}: {error}")
+
+    def _allocate_task_id(self) -> int:
+        with self._id_lock:
+            task_id = self.next_task_id
+            self.next_task_id += 1
+        return task_id
+
+    def _load_task(self, task_id: int, task_type: TaskType, target: str, script_source: str,
+                   description: str = "", options: Dict[str, Any] = None) -> TaskInfo:
+        """创建并加载任务脚本，失败时抛出异常（可在工作线程中调用）"""
+        if options is None:
+            options = {}
+
+        # 优先注册到共享运行时，只提交 Hook 主体
+        body = self.script_engine.extract_task_body(script_source) if self.script_engine else None
+        if body is not None:
+            runtime = self._ensure_runtime()
+            if runtime is not None:
+                try:
+                    runtime.exports.add_task(task_id, body)
+                    return TaskInfo(
+                        task_id=task_id,
+                        task_type=task_type,
+                        target=target,
+                        description=description or f"{task_type.value}: {target}",
+                        script_handle=None,
+                        session_handle=None,
+                        status=TaskStatus.RUNNING,
+                        created_at=datetime.now(),
+                        options=options,
+                        shared=True
+                    )
+                except Exception as e:
+                    log_warning(f"⚠️ 任务 #{task_id} 无法加入共享运行时，改用独立脚本: {e}")
+
+        # 创建独立脚本（重用主 session 以避免重复 attach）
+        script_source_with_id = script_source.replace('var TASK_ID = 0;', f'var TASK_ID = {task_id};')
+        script = self.main_session.create_script(script_source_with_id)
+        
+        # 设置消息处理（可扩展）
+        def on_message(message, data):
+            try:
+                msg_type = message.get('type')
+                if msg_type == 'send':
+                    # Agent 端批量发送：逐条展开；控制台渲染交给渲染队列，避免阻塞消息线程
+                    render_queue = get_render_queue()
+                    for payload in iter_payloads(message.get('payload')):
+                        self._handle_task_payload(task_id, payload, data, render_queue)
+                elif msg_type == 'error':
+                    desc = message.get('description') or message
+                    log_error(f"任务 #{task_id} 脚本错误: {desc}")
+            except Exception as e:
+                log_error(f"任务 #{task_id} 消息处理失败: {e}")
+        
+        script.on('message', on_message)
+        
+        # 加载脚本
+        script.load()
+        
+        # 创建任务信息
+        task_info = TaskInfo(
+            task_id=task_id,
+            task_type=task_type,
+            target=target,
+            description=description or f"{task_type.value}: {target}",
+            script_handle=script,
+            session_handle=None,  # 重用主session
+            status=TaskStatus.RUNNING,
+            created_at=datetime.now(),
+            options=options
+        )
+
+        return task_info
+
+    def _handle_task_payload(self, task_id: Optional[int], payload: Any, data: Optional[bytes], render_queue):
+        """处理任务发来的单条消息（落盘、命中统计、专用分发、渲染）"""
+        if self.event_log:
+            self.event_log.write(payload, data, task_id=task_id)
+        if task_id is not None:
+            self.event_buffer.append(task_id, payload, data if is_binary_message(payload, data) else None)
+        # 任务统计：识别带 task_id 的结构化消息
+        if is_binary_message(payload, data):
+            # 原始字节附件（命中已由 task_hit 统计），hexdump 在宿主端生成
+            render_queue.submit(render_binary_event, payload, BinaryPayload(payload, data), task_id=task_id)
+        elif isinstance(payload, dict):
+            if task_id is not None and payload.get('task_id') == task_id and task_id not in self._polled_tasks:
+                # Agent 端计数尚不可用（如独立的 fetch 脚本）时按消息计数
+                self._update_task_stats(task_id)
+            # 专用事件（如 hookfetch 的 fetch_request）交给分发器落盘
+            if self.dispatcher and self.dispatcher.dispatch(payload, data, task_id):
+                return
+            # 使用统一结构化渲染，并附带任务前缀
+            render_queue.submit(render_structured_event, payload, task_id=task_id)
+        else:
+            # 普通文本日志（来自 LOG）
+            text = '' if payload is None else str(payload)
+            render_queue.submit(render_text_message, text, task_id=task_id)
+
+    def _ensure_runtime(self):
+        """按需加载共享任务运行时脚本，失败后本会话不再尝试（任务改用独立脚本）"""
+        if self.runtime_mode != RUNTIME_SHARED or self._runtime_failed or self.script_engine is None:
+            return None
+        if self.runtime_script is not None:
+            return self.runtime_script
+        with self._runtime_lock:
+            if self.runtime_script is None and not self._runtime_failed:
+                try:
+                    source = self.script_engine.generate_task_runtime_script()
+                    script, bytecode_key = create_script_cached(self.main_session, source)
+                    script.on('message', self._on_runtime_message)
+                    try:
+                        script.load()
+                    except Exception:
+                        if not bytecode_key:
+                            raise
+                        invalidate_bytecode(bytecode_key)
+                        bytecode_key = None
+                        script = self.main_session.create_script(source)
+                        script.on('message', self._on_runtime_message)
+                        script.load()
+                    if not bytecode_key:
+                        schedule_bytecode_compile(self.main_session, source)
+                    self.runtime_script = script
+                    log_info("🧩 共享任务运行时已加载")
+                except Exception as e:
+                    self._runtime_failed = True
+                    log_warning(f"⚠️ 共享任务运行时加载失败，任务将使用独立脚本: {e}")
+        return self.runtime_script
+
+    def _on_runtime_message(self, message, data):
+        """共享运行时消息：按信封还原任务归属"""
+        try:
+            msg_type = message.get('type')
+            if msg_type == 'send':
+                render_queue = get_render_queue()
+                for payload in iter_payloads(message.get('payload')):
+                    if isinstance(payload, dict) and payload.get('type') == TASK_ENVELOPE_TYPE:
+                        self._handle_task_payload(payload.get('task_id'), payload.get('payload'), data, render_queue)
+                        continue
+                    task_id = payload.get('task_id') if isinstance(payload, dict) else None
+                    self._handle_task_payload(task_id if task_id in self.tasks else None, payload, data, render_queue)
+            elif msg_type == 'error':
+                desc = message.get('description') or message
+                log_error(f"任务运行时脚本错误: {desc}")
+        except Exception as e:
+            log_error(f"任务运行时消息处理失败: {e}")
+
+    def _ensure_hit_poller(self):
+        if self.hit_poll_interval <= 0:
+            return
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            return
+        self._poll_stop.clear()
+        self._poll_thread = threading.Thread(target=self._hit_poll_loop, name='fridac-hit-poll', daemon=True)
+        self._poll_thread.start()
+
+    def _hit_poll_loop(self):
+        while not self._poll_stop.wait(self.hit_poll_interval):
+            if not self.tasks:
+                continue
+            self.poll_hit_counters()
+
+    def poll_hit_counters(self):
+        """
+        拉取 Agent 端命中计数并更新 hit_count / last_hit
+
+        共享运行时一次 rpc 覆盖其中全部任务；独立脚本各自一次
+        """
+        with self._poll_lock:
+            tasks = list(self.tasks.values())
+            sources = []
+            if self.runtime_script is not None and any(t.shared for t in tasks):
+                sources.append((self.runtime_script, [t for t in tasks if t.shared]))
+            for t in tasks:
+                if not t.shared and t.script_handle is not None:
+                    sources.append((t.script_handle, [t]))
+
+            for script, owned in sources:
+                try:
+                    counters = script.exports.task_hit_counters() or {}
+                except Exception:
+                    continue
+                for task in owned:
+                    entry = counters.get(str(task.task_id))
+                    self._polled_tasks.add(task.task_id)
+                    if not entry:
+                        continue
+                    task.hit_count = int(entry.get('count', 0))
+                    last = entry.get('last')
+                    if last:
+                        task.last_hit = datetime.fromtimestamp(last / 1000.0)
+                    task.suppressed = int(entry.get('suppressed', 0))
+                    task.throttled = bool(entry.get('throttled'))
+                    task.paused = bool(entry.get('paused'))
+                    if entry.get('prof'):
+                        task.profile = entry['prof']
+
+    def set_hit_events(self, enabled: bool) -> int:
+        """
+        开关逐次命中的 task_hit 事件（计数不受影响）
+
+        Returns:
+            成功设置的脚本数
+        """
+        scripts = []
+        if self.runtime_script is not None:
+            scripts.append(self.runtime_script)
+        scripts.extend(t.script_handle for t in self.tasks.values() if not t.shared and t.script_handle is not None)
+        updated = 0
+        for script in scripts:
+            try:
+                script.exports.set_hit_events(enabled)
+                updated += 1
+            except Exception:
+                pass
+        return updated
+
+    def _unload_task(self, task: TaskInfo):
+        """卸载单个任务的 Hook（可在工作线程中调用，失败时抛出异常）"""
+        if task.shared:
+            # 共享运行时：只撤销该任务记录的 Hook
+            if self.runtime_script is not None:
+                self.runtime_script.exports.remove_task(task.task_id)
+        elif task.script_handle:
+            # 卸载脚本 - 这会完全清理所有 Hook
+            task.script_handle.unload()
+        # 注意：重用主 session，无需在此处 detach session
+
+    def _forget_task(self, task_id: int):
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            task.status = TaskStatus.CANCELLED
+        self._polled_tasks.discard(task_id)
+
+    def _teardown_tasks(self, task_ids: List[int], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        并发卸载任务，整体最多等待 timeout 秒（约等于最慢的一个）
+
+        超时的卸载在后台继续，完成后自动从任务表移除
+
+        Returns:
+            {'killed': [id], 'destroyed': [id], 'failed': [(id, 错误)], 'timed_out': [id]}
+        """
+        timeout = self.unload_timeout if timeout is None else timeout
+        outcomes = {}  # type: Dict[int, Optional[str]]
+        lock = threading.Lock()
+        abandoned = set()
+
+        def worker(task):
+            try:
+                self._unload_task(task)
+                outcome = None
+            except Exception as e:
+                outcome = str(e)
+            with lock:
+                outcomes[task.task_id] = outcome
+                late = task.task_id in abandoned
+            if late and (outcome is None or 'destroyed' in outcome.lower()):
+                # 超时后才完成的卸载：静默移除
+                self._forget_task(task.task_id)
+
+        threads = []
+        for task_id in task_ids:
+            task = self.tasks.get(task_id)
+            if task is None:
+                continue
+            thread = threading.Thread(target=worker, args=(task,), name=f'fridac-unload-{task_id}', daemon=True)
+            thread.start()
+            threads.append((task_id, thread))
+
+        deadline = time.time() + timeout
+        for _, thread in threads:
+            thread.join(max(0.0, deadline - time.time()))
+
+        report = {'killed': [], 'destroyed': [], 'failed': [], 'timed_out': []}
+        with lock:
+            for task_id, _ in threads:
+                if task_id not in outcomes:
+                    abandoned.add(task_id)
+                    report['timed_out'].append(task_id)
+                    continue
+                outcome = outcomes[task_id]
+                if outcome is None:
+                    report['killed'].append(task_id)
+                elif 'destroyed' in outcome.lower():
+                    # 脚本已销毁，无需重复报错，直接从任务表移除
+                    report['destroyed'].append(task_id)
+                else:
+                    report['failed'].append((task_id, outcome))
+
+        for task_id in report['killed'] + report['destroyed']:
+            self._forget_task(task_id)
+        for task_id, error in report['failed']:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                task.status = TaskStatus.FAILED
+                task.error_message = error
+        for task_id in report['timed_out']:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                task.status = TaskStatus.FAILED
+                task.error_message = f"卸载超时 (>{timeout:g}s)，仍在后台卸载"
+        return report
+
     def kill_task(self, task_id: int) -> bool:
         """
-        终止指定任务（完全清理）
+        终止指定任务（完全清理，最多等待 unload_timeout 秒）
         
         Args:
             task_id: 任务ID
@@ -183,67 +524,71 @@ class FridaTaskManager:
             return False
         
         task = self.tasks[task_id]
-        
-        try:
-            # 卸载脚本 - 这会完全清理所有 Hook
-            if task.script_handle:
-                task.script_handle.unload()
-            
-            # 注意：重用主 session，无需在此处 detach session
-            
-            # 更新状态
-            task.status = TaskStatus.CANCELLED
-            
-            # 从活跃任务中移除
-            del self.tasks[task_id]
-            
+        report = self._teardown_tasks([task_id])
+        if report['killed']:
             log_success(f"🗑️ 任务 #{task_id} 已终止: {task.description}")
             return True
-            
-        except Exception as e:
-            # 如果脚本已销毁，无需重复报错，直接从任务表移除
-            msg = str(e)
-            if 'destroyed' in msg or 'Script is destroyed' in msg or 'script is destroyed' in msg:
-                try:
-                    if task_id in self.tasks:
-                        del self.tasks[task_id]
-                except Exception:
-                    pass
-                log_warning(f"⚠️  任务 #{task_id} 的脚本已销毁，已从任务列表移除")
-                return True
-            log_error(f"❌ 终止任务 #{task_id} 失败: {e}")
-            task.status = TaskStatus.FAILED
-            task.error_message = msg
+        if report['destroyed']:
+            log_warning(f"⚠️  任务 #{task_id} 的脚本已销毁，已从任务列表移除")
+            return True
+        if report['timed_out']:
+            log_warning(f"⏱️ 任务 #{task_id} 卸载超时 (>{self.unload_timeout:g}s)，已转入后台继续卸载")
             return False
+        log_error(f"❌ 终止任务 #{task_id} 失败: {report['failed'][0][1]}")
+        return False
     
-    def kill_all_tasks(self, task_type_filter: Optional[TaskType] = None) -> int:
+    def kill_all_tasks(self, task_type_filter: Optional[TaskType] = None, force_detach: bool = False) -> int:
         """
-        终止所有任务
+        终止所有任务（并发卸载，单个脚本卡住不阻塞其余任务）
         
         Args:
             task_type_filter: 可选的任务类型过滤器
+            force_detach: 有任务卸载超时时分离整个会话（退出时使用）
             
         Returns:
             成功终止的任务数量
         """
-        tasks_to_kill = []
-        
-        for task_id, task in self.tasks.items():
-            if task_type_filter is None or task.task_type == task_type_filter:
-                tasks_to_kill.append(task_id)
+        tasks_to_kill = [task_id for task_id, task in self.tasks.items()
+                         if task_type_filter is None or task.task_type == task_type_filter]
         
         if not tasks_to_kill:
             filter_msg = f" (类型: {task_type_filter.value})" if task_type_filter else ""
             log_info(f"📋 没有找到要终止的任务{filter_msg}")
             return 0
         
-        killed_count = 0
-        for task_id in tasks_to_kill:
-            if self.kill_task(task_id):
-                killed_count += 1
+        started = time.time()
+        report = self._teardown_tasks(tasks_to_kill)
+        killed_count = len(report['killed']) + len(report['destroyed'])
+        
+        for task_id, error in report['failed']:
+            log_error(f"❌ 终止任务 #{task_id} 失败: {error}")
+        if report['timed_out']:
+            ids = ', '.join(f"#{task_id}" for task_id in report['timed_out'])
+            log_warning(f"⏱️ {len(report['timed_out'])} 个任务卸载超时 (>{self.unload_timeout:g}s): {ids}")
+            if force_detach:
+                self._force_detach()
         
-        log_success(f"🧹 已终止 {killed_count}/{len(tasks_to_kill)} 个任务")
+        log_success(f"🧹 已终止 {killed_count}/{len(tasks_to_kill)} 个任务 ({time.time() - started:.2f}s)")
         return killed_count
+
+    def _force_detach(self):
+        """卸载超时兜底：后台分离整个会话（会销毁所有脚本）"""
+        def detach():
+            try:
+                self.main_session.detach()
+            except Exception:
+                pass
+
+        thread = threading.Thread(target=detach, name='fridac-force-detach', daemon=True)
+        thread.start()
+        thread.join(self.unload_timeout)
+        if thread.is_alive():
+            log_warning("⚠️ 强制分离会话超时，放弃等待")
+        else:
+            log_warning("🔌 已强制分离会话，剩余脚本随之销毁")
+            self.tasks.clear()
+            self._polled_tasks.clear()
+            self.runtime_script = None
     
     def list_tasks(self, status_filter: Optional[TaskStatus] = None) -> List[TaskInfo]:
         """
@@ -281,6 +626,7 @@ class FridaTaskManager:
         Args:
             status_filter: 可选的状态过滤器
         """
+        self.poll_hit_counters()
         tasks = self.list_tasks(status_filter)
         
         if not tasks:
@@ -300,6 +646,10 @@ class FridaTaskManager:
             status_icon = self._get_status_icon(task.status)
             created_time = task.created_at.strftime("%H:%M:%S")
             hit_info = f" (命中:{task.hit_count})" if task.hit_count > 0 else ""
+            if task.paused:
+                hit_info += f" ⏸️ 已暂停(抑制:{task.suppressed})"
+            elif task.throttled or task.suppressed:
+                hit_info += f" 🐢 节流(抑制:{task.suppressed})"
             
             log_info(f"{task.task_id:<4} {task.task_type.value:<12} "
                     f"{status_icon}{task.status.value:<7} "
@@ -319,6 +669,7 @@ class FridaTaskManager:
         if not task:
             log_warning(f"⚠️ 任务 #{task_id} 不存在")
             return
+        self.poll_hit_counters()
         
         log_info(f"\n🔍 任务 #{task.task_id} 详细信息")
         log_info("=" * 50)
@@ -327,29 +678,84 @@ class FridaTaskManager:
         log_info(f"描述: {task.description}")
         log_info(f"状态: {self._get_status_icon(task.status)}{task.status.value}")
         log_info(f"创建时间: {task.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        log_info(f"脚本模式: {'共享运行时' if task.shared else '独立脚本'}")
         
         if task.hit_count > 0:
             log_info(f"命中次数: {task.hit_count}")
             if task.last_hit:
                 log_info(f"最后命中: {task.last_hit.strftime('%H:%M:%S')}")
         
+        if task.suppressed or task.paused:
+            state = '已暂停' if task.paused else ('节流中' if task.throttled else '正常')
+            log_info(f"节流状态: {state} (抑制 {task.suppressed} 次)")
+        
         if task.error_message:
             log_error(f"错误信息: {task.error_message}")
         
         if task.options:
             log_info(f"选项: {task.options}")
+        
+        buffered = self.event_buffer.stats(task_id)
+        if buffered['events']:
+            log_info(f"缓冲事件: {buffered['events']} 条 ({buffered['bytes'] / 1024:.1f} KB，taskevents {task_id} 查看)")
     
-    def cleanup(self):
+    def show_task_events(self, task_id: int, last: Optional[int] = 50, pattern: Optional[str] = None,
+                         event_type: Optional[str] = None):
         """
-        清理所有任务（程序退出时调用）
+        从内存缓冲中检索并重新渲染任务事件（无需重新 Hook）
+        
+        Args:
+            task_id: 任务ID
+            last: 只显示最后 N 条匹配
+            pattern: 正则/子串过滤（不区分大小写）
+            event_type: 只显示该类型的事件（text 为文本日志）
         """
-        if not self.tasks:
+        if not self.event_buffer.enabled:
+            log_warning("⚠️ 任务事件缓冲已关闭 (FRIDAC_TASK_EVENTS=0)")
+            return
+        buffered = self.event_buffer.stats(task_id)
+        if not buffered['events']:
+            if task_id in self.tasks:
+                log_info(f"📭 任务 #{task_id} 暂无缓冲事件")
+            else:
+                log_warning(f"⚠️ 任务 #{task_id} 不存在或没有缓冲事件")
             return
         
-        log_info("🧹 正在清理所有任务...")
-        task_count = len(self.tasks)
-        self.kill_all_tasks()
-        log_success(f"✅ 已清理 {task_count} 个任务")
+        events = self.event_buffer.query(task_id, last=last, pattern=pattern, event_type=event_type)
+        for event in events:
+            payload = event.payload
+            if event.kind == KIND_BINARY:
+                render_binary_event(payload, BinaryPayload(payload, event.data), task_id=task_id)
+            elif event.kind == KIND_TEXT or not isinstance(payload, dict):
+                render_text_message(payload, task_id=task_id)
+            else:
+                render_structured_event(payload, task_id=task_id)
+        
+        filters = []
+        if pattern:
+            filters.append(f"匹配 '{pattern}'")
+        if event_type:
+            filters.append(f"类型 {event_type}")
+        filter_msg = f"，{'，'.join(filters)}" if filters else ''
+        log_info(f"📜 任务 #{task_id}: 显示 {len(events)} 条 (缓冲 {buffered['events']} 条{filter_msg})")
+    
+    def cleanup(self):
+        """
+        清理所有任务（程序退出时调用）
+        """
+        if self.tasks:
+            log_info("🧹 正在清理所有任务...")
+            task_count = len(self.tasks)
+            self.kill_all_tasks(force_detach=True)
+            log_success(f"✅ 已清理 {task_count} 个任务")
+        
+        self._poll_stop.set()
+        if self.runtime_script is not None:
+            try:
+                self.runtime_script.unload()
+            except Exception:
+                pass
+            self.runtime_script = None
     
     def _update_task_stats(self, task_id: int):
         """
@@ -414,10 +820,63 @@ class FridaTaskManager:
             'next_task_id': self.next_task_id
         }
     
+    def get_profile_rows(self) -> List[Dict[str, Any]]:
+        """汇总每个任务的插桩开销（附加延迟 = Hook 总耗时 - 原方法耗时）"""
+        now_ms = time.time() * 1000
+        rows = []
+        for task in self.tasks.values():
+            prof = task.profile or {}
+            calls = int(prof.get('calls', 0))
+            total = float(prof.get('total', 0.0))
+            original = float(prof.get('original', 0.0))
+            added = max(0.0, total - original)
+            elapsed = max((now_ms - float(prof.get('since', now_ms))) / 1000.0, 1e-3)
+            rows.append({
+                'task': task,
+                'calls': calls,
+                'rate': calls / elapsed if prof else 0.0,
+                'added_ms': added,
+                'avg_added_us': added * 1000.0 / calls if calls else 0.0,
+                'avg_original_us': original * 1000.0 / calls if calls else 0.0,
+            })
+        return rows
+
+    def show_profile(self, sort_by: str = 'latency'):
+        """
+        显示任务开销排行
+
+        Args:
+            sort_by: latency 按附加延迟总计排序 / rate 按每秒调用数排序
+        """
+        self.poll_hit_counters()
+        rows = self.get_profile_rows()
+        if not rows:
+            log_info("📋 没有运行中的任务")
+            return
+        key = 'rate' if sort_by == 'rate' else 'added_ms'
+        rows.sort(key=lambda r: r[key], reverse=True)
+
+        log_info(f"\n⏱️  任务开销排行 (按{'调用频率' if key == 'rate' else '附加延迟'}排序)")
+        log_info("=" * 96)
+        log_info(f"{'ID':<4} {'目标':<30} {'调用':>8} {'调用/秒':>9} {'附加总计(ms)':>13} "
+                 f"{'平均附加(µs)':>13} {'原方法(µs)':>11}")
+        log_info("-" * 96)
+        for r in rows:
+            task = r['task']
+            if not task.profile:
+                log_info(f"{task.task_id:<4} {task.target[:28]:<30} {'-':>8} (无开销统计，taskprof on 后创建的任务才统计)")
+                continue
+            log_info(f"{task.task_id:<4} {task.target[:28]:<30} {r['calls']:>8} {r['rate']:>9.1f} "
+                     f"{r['added_ms']:>13.2f} {r['avg_added_us']:>13.1f} {r['avg_original_us']:>11.1f}")
+        log_info("-" * 96)
+        total_added = sum(r['added_ms'] for r in rows)
+        log_info(f"📊 插桩附加延迟合计: {total_added:.2f} ms")
+
     def show_stats(self):
         """
         显示任务统计信息
         """
+        self.poll_hit_counters()
         stats = self.get_stats()
         
         log_info("\n📊 任务统计信息")
@@ -0,0 +1,78 @@
+"""
+fridac 消息传输模块
+处理 Agent 端批量发送（LOG / emitEvent 合并为数组）的配置与宿主侧解包
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator
+
+# Agent 端批量消息的保留类型（与 frida_common_new.js 中的 __fridacTransport 保持一致）
+BATCH_MESSAGE_TYPE = '__fridac_batch'
+
+# 默认刷新策略：累计 64KB 或 50ms 即发送
+DEFAULT_FLUSH_MS = 50
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+def _read_int_env(name: str, default: int) -> int:
+    """读取整数环境变量，非法值回退默认"""
+    value = os.environ.get(name, '')
+    if value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def get_batch_config() -> Dict[str, Any]:
+    """
+    获取批量传输配置
+
+    环境变量：
+        FRIDAC_BATCH_MS: 刷新延迟（毫秒），0 表示关闭批量发送
+        FRIDAC_BATCH_BYTES: 单批最大字节数
+
+    Returns:
+        {'enabled': bool, 'flushMs': int, 'maxBytes': int}
+    """
+    flush_ms = max(0, _read_int_env('FRIDAC_BATCH_MS', DEFAULT_FLUSH_MS))
+    max_bytes = max(1, _read_int_env('FRIDAC_BATCH_BYTES', DEFAULT_MAX_BYTES))
+    return {
+        'enabled': flush_ms > 0,
+        'flushMs': flush_ms,
+        'maxBytes': max_bytes,
+    }
+
+
+def build_batch_prelude() -> str:
+    """
+    生成注入到脚本最前面的批量配置覆盖代码
+
+    Returns:
+        JavaScript 代码（定义 __FRIDAC_BATCH_OVERRIDE）
+    """
+    return f"var __FRIDAC_BATCH_OVERRIDE = {json.dumps(get_batch_config())};\n"
+
+
+def is_batch_payload(payload: Any) -> bool:
+    """判断 payload 是否为 Agent 端批量消息"""
+    return isinstance(payload, dict) and payload.get('type') == BATCH_MESSAGE_TYPE
+
+
+def iter_payloads(payload: Any) -> Iterator[Any]:
+    """
+    展开批量消息，逐条产出原始 payload（非批量消息原样产出）
+
+    Args:
+        payload: send() 消息中的 payload
+
+    Yields:
+        单条 payload（字符串或结构化事件字典）
+    """
+    if is_batch_payload(payload):
+        for entry in payload.get('entries') or []:
+            yield entry
+    else:
+        yield payload